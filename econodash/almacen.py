@@ -0,0 +1,151 @@
+"""Almacén local particionado con el catálogo completo de indicadores.
+
+Lo construye ``src/ingesta_masiva.py`` y tiene una partición por indicador:
+
+    cache/almacen/
+        catalogo.json                    Países (código -> nombre), años y particiones
+        ultimos.json                     Última observación por (indicador, país), ver ultimos.py
+        indicador=NY.GDP.PCAP.CD/        Instantánea memmap (ver instantaneas.py)
+            valores.npy                  Cubo 1 x país x año
+            indice.json
+        indicador=FP.CPI.TOTL.ZG/
+        ...
+
+Cada partición se escribe de forma atómica y por separado, así que se puede
+reconstruir un indicador sin tocar el resto y leer el almacén mientras se
+actualiza. Las filas siguen el ESQUEMA (codigo_pais, anio, valor).
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import ultimos
+from bloqueo_archivo import bloqueado
+from instantaneas import abrir_instantanea, escribir_instantanea, existe_instantanea
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ALMACEN_DIR = os.path.join(BASE_DIR, 'cache', 'almacen')
+ARCHIVO_CATALOGO = 'catalogo.json'
+ARCHIVO_ULTIMOS = 'ultimos.json'
+
+# Columnas y tipos de las filas del almacén
+ESQUEMA = {'codigo_pais': 'object', 'anio': 'int64', 'valor': 'float64'}
+COLUMNAS = tuple(ESQUEMA)
+
+# Años válidos para los datos del Banco Mundial
+ANIO_MINIMO, ANIO_MAXIMO = 1960, 2100
+
+
+class ErrorEsquema(ValueError):
+    """Los datos descargados no tienen la forma esperada."""
+
+
+def validar_esquema(df, paises_esperados=None, anio_inicio=ANIO_MINIMO, anio_fin=ANIO_MAXIMO):
+    """
+    Comprueba y normaliza un lote de filas (codigo_pais, anio, valor).
+
+    Descarta las filas sin valor y lanza ErrorEsquema si falta alguna
+    columna, si hay años o valores no numéricos o fuera de rango, o países
+    que no se pidieron.
+
+    Returns:
+        DataFrame: Filas válidas con los tipos de ESQUEMA
+    """
+    faltan = [c for c in COLUMNAS if c not in df.columns]
+    if faltan:
+        raise ErrorEsquema(f"Faltan columnas: {', '.join(faltan)}")
+
+    df = df[list(COLUMNAS)]
+    anios = pd.to_numeric(df['anio'], errors='coerce')
+    valores = pd.to_numeric(df['valor'], errors='coerce')
+
+    if anios.isna().any():
+        raise ErrorEsquema(f"Años no numéricos: {df.loc[anios.isna(), 'anio'].unique()[:5].tolist()}")
+    fuera_de_rango = (anios < anio_inicio) | (anios > anio_fin)
+    if fuera_de_rango.any():
+        raise ErrorEsquema(f"Años fuera de {anio_inicio}-{anio_fin}: {sorted(anios[fuera_de_rango].unique())[:5]}")
+    no_numericos = valores.isna() & df['valor'].notna()
+    if no_numericos.any():
+        raise ErrorEsquema(f"Valores no numéricos: {df.loc[no_numericos, 'valor'].unique()[:5].tolist()}")
+    if np.isinf(valores).any():
+        raise ErrorEsquema("Valores infinitos")
+    if paises_esperados is not None:
+        inesperados = set(df['codigo_pais']) - set(paises_esperados)
+        if inesperados:
+            raise ErrorEsquema(f"Países no solicitados: {sorted(inesperados)[:5]}")
+
+    return pd.DataFrame({
+        'codigo_pais': df['codigo_pais'].astype(str),
+        'anio': anios.astype('int64'),
+        'valor': valores.astype('float64')
+    })[valores.notna()].reset_index(drop=True)
+
+
+def ruta_particion(codigo, raiz=ALMACEN_DIR):
+    return os.path.join(raiz, f"indicador={codigo}")
+
+
+def escribir_particion(codigo, df, raiz=ALMACEN_DIR, metadatos=None):
+    """Escribe (o sustituye) la partición de un indicador."""
+    return escribir_instantanea(ruta_particion(codigo, raiz), {codigo: df}, columnas=COLUMNAS, metadatos=metadatos)
+
+
+def existe_particion(codigo, raiz=ALMACEN_DIR):
+    return existe_instantanea(ruta_particion(codigo, raiz))
+
+
+def abrir_particion(codigo, raiz=ALMACEN_DIR):
+    """Instantánea memmap de un indicador."""
+    return abrir_instantanea(ruta_particion(codigo, raiz))
+
+
+def particiones(raiz=ALMACEN_DIR):
+    """Códigos de los indicadores con partición en el almacén."""
+    if not os.path.isdir(raiz):
+        return []
+    return sorted(
+        nombre.split('=', 1)[1] for nombre in os.listdir(raiz)
+        if nombre.startswith('indicador=') and existe_instantanea(os.path.join(raiz, nombre))
+    )
+
+
+def leer_indicador(codigo, paises=None, anio_inicio=None, anio_fin=None, raiz=ALMACEN_DIR):
+    """Filas (codigo_pais, anio, valor) de un indicador, recortadas sin parsear nada."""
+    return abrir_particion(codigo, raiz).a_dataframe(codigo, paises, anio_inicio, anio_fin, columnas=COLUMNAS)
+
+
+def leer_catalogo(raiz=ALMACEN_DIR):
+    ruta = os.path.join(raiz, ARCHIVO_CATALOGO)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def escribir_catalogo(contenido, raiz=ALMACEN_DIR):
+    """Guarda el catálogo del almacén de forma atómica."""
+    os.makedirs(raiz, exist_ok=True)
+    ruta = os.path.join(raiz, ARCHIVO_CATALOGO)
+    ruta_tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(contenido, f, ensure_ascii=False, indent=1)
+    os.replace(ruta_tmp, ruta)
+    return ruta
+
+
+def leer_ultimos(raiz=ALMACEN_DIR):
+    """Índice de la última observación por (indicador, país) del almacén."""
+    return ultimos.cargar(os.path.join(raiz, ARCHIVO_ULTIMOS), COLUMNAS)
+
+
+def actualizar_ultimos(codigo, df, raiz=ALMACEN_DIR):
+    """Incorpora al índice de últimos datos las filas recién escritas de un indicador."""
+    os.makedirs(raiz, exist_ok=True)
+    ruta = os.path.join(raiz, ARCHIVO_ULTIMOS)
+    with open(f"{ruta}.lock", 'a+b') as archivo, bloqueado(archivo):
+        indice = ultimos.cargar(ruta, COLUMNAS)
+        indice.actualizar(codigo, df)
+        ultimos.guardar(indice, ruta)
+    return indice
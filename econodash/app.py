@@ -1,17 +1,27 @@
 import streamlit as st
-import plotly.express as px
-import pandas as pd
-import numpy as np
-import world_bank_data as wb
 from datetime import datetime
 import os
-from streamlit_option_menu import option_menu
 
-# ------------ FIX DEFINITIVO PARA STREAMLIT CLOUD ----------------
-import plotly.io as pio
-pio.renderers.default = "browser"     
-pio.kaleido.scope.mathjax = None      
-pio.kaleido.scope.chromium_args = ()  
+# ------------ ARRANQUE RÁPIDO ----------------
+# Las dependencias pesadas se importan en su primer uso (ver importaciones.py).
+# Las apps no exportan imágenes estáticas: los ajustes de kaleido para
+# Streamlit Cloud los aplica importaciones.configurar_exportacion_estatica()
+# justo antes de exportarlas (src/panel_interactivo.py).
+from importaciones import modulo_perezoso
+import bitacora
+import conjuntos
+import estadisticas
+import formato
+import relleno
+import rendimiento
+import transporte
+import ultimos
+import vuelo_unico
+px = modulo_perezoso('plotly.express')
+go = modulo_perezoso('plotly.graph_objects')
+pd = modulo_perezoso('pandas', al_cargar=conjuntos.activar_copy_on_write)
+np = modulo_perezoso('numpy')
+wb = modulo_perezoso('world_bank_data', al_cargar=transporte.instalar)
 # -----------------------------------------------------------------
 
 # Configuración de la página
@@ -26,93 +36,11 @@ st.set_page_config(
 OUTPUT_DIR = 'output'
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Definición de indicadores
-INDICADORES = {
-    'NY.GDP.PCAP.CD': {
-        'nombre': 'PIB per cápita',
-        'unidad': 'US$',
-        'es_porcentaje': False,
-        'descripcion': 'Producto Interno Bruto per cápita en dólares estadounidenses actuales. Mide el valor económico por persona y es un indicador clave del nivel de vida.'
-    },
-    'NY.GDP.MKTP.KD.ZG': {
-        'nombre': 'Crecimiento del PIB',
-        'unidad': '%',
-        'es_porcentaje': True,
-        'descripcion': 'Tasa de crecimiento anual del PIB basada en moneda local a precios constantes. Indica la velocidad de crecimiento económico de un país.'
-    },
-    'FP.CPI.TOTL.ZG': {
-        'nombre': 'Inflación anual',
-        'unidad': '%',
-        'es_porcentaje': True,
-        'descripcion': 'Tasa de inflación porcentual anual basada en el índice de precios al consumidor. Mide la variación porcentual en el costo de vida.'
-    },
-    'SL.UEM.TOTL.ZS': {
-        'nombre': 'Tasa de desempleo',
-        'unidad': '%',
-        'es_porcentaje': True,
-        'descripcion': 'Porcentaje de la población activa que no tiene empleo pero busca trabajo y está disponible para trabajar.'
-    },
-    'GC.DOD.TOTL.GD.ZS': {
-        'nombre': 'Deuda Pública',
-        'unidad': '% del PIB',
-        'es_porcentaje': True,
-        'descripcion': 'Deuda bruta del gobierno general como porcentaje del PIB.'
-    },
-    'NE.EXP.GNFS.ZS': {
-        'nombre': 'Exportaciones',
-        'unidad': '% del PIB',
-        'es_porcentaje': True,
-        'descripcion': 'Exportaciones de bienes y servicios como porcentaje del PIB.'
-    },
-    'NE.IMP.GNFS.ZS': {
-        'nombre': 'Importaciones',
-        'unidad': '% del PIB',
-        'es_porcentaje': True,
-        'descripcion': 'Importaciones de bienes y servicios como porcentaje del PIB.'
-    },
-    'BX.KLT.DINV.WD.GD.ZS': {
-        'nombre': 'Inversión Extranjera Directa',
-        'unidad': '% del PIB',
-        'es_porcentaje': True,
-        'descripcion': 'Entradas netas de IED como porcentaje del PIB.'
-    },
-    'SE.XPD.TOTL.GD.ZS': {
-        'nombre': 'Gasto en Educación',
-        'unidad': '% del PIB',
-        'es_porcentaje': True,
-        'descripcion': 'Gasto público total en educación como porcentaje del PIB.'
-    },
-    'SH.XPD.CHEX.GD.ZS': {
-        'nombre': 'Gasto en Salud',
-        'unidad': '% del PIB',
-        'es_porcentaje': True,
-        'descripcion': 'Gasto en salud como porcentaje del PIB.'
-    },
-    'SP.DYN.LE00.IN': {
-        'nombre': 'Esperanza de Vida',
-        'unidad': 'años',
-        'es_porcentaje': False,
-        'descripcion': 'Esperanza de vida al nacer, en años.'
-    },
-    'SP.POP.TOTL': {
-        'nombre': 'Población Total',
-        'unidad': 'personas',
-        'es_porcentaje': False,
-        'descripcion': 'Población total medida por residencia.'
-    },
-    'SI.POV.GINI': {
-        'nombre': 'Coeficiente de Gini',
-        'unidad': 'índice',
-        'es_porcentaje': False,
-        'descripcion': 'Índice de desigualdad del ingreso.'
-    },
-    'NY.GDP.PCAP.PP.CD': {
-        'nombre': 'PIB per cápita (PPA)',
-        'unidad': 'US$',
-        'es_porcentaje': False,
-        'descripcion': 'PIB per cápita ajustado por PPP.'
-    }
-}
+# Definición de indicadores (compartida con los scripts de src/)
+from indicadores import INDICADORES
+
+# Registro estructurado (logs/econodash.jsonl)
+log = bitacora.obtener_logger('app')
 
 # Diccionario de países
 PAISES = {
@@ -133,7 +61,13 @@ PAISES = {
     'IND': 'India'
 }
 
-@st.cache_data(ttl=86400)  # Cachear por 24 horas
+def indice_ultimos(paises, anio_inicio=None, anio_fin=None):
+    """Índice de la última observación por (indicador, país) de una descarga."""
+    return ultimos.indice(ultimos.clave_fuente(paises, anio_inicio, anio_fin), columnas=('Pais', 'Año', 'Valor'))
+
+@rendimiento.medido(cache=True, carga=True)
+@conjuntos.compartido(ttl=86400)  # Cachear por 24 horas, un solo conjunto para todas las sesiones
+@rendimiento.medido(rendimiento.FALLO_CACHE)
 def obtener_datos_banco_mundial(paises, indicadores, anio_inicio=None, anio_fin=None):
     """Obtiene datos del Banco Mundial para los países e indicadores especificados."""
     datos_completos = {}
@@ -169,8 +103,16 @@ def obtener_datos_banco_mundial(paises, indicadores, anio_inicio=None, anio_fin=
                 with st.spinner(f"Obteniendo datos para {info['nombre']}..."):
                     # Intentar obtener los datos con un timeout
                     try:
-                        data = wb.get_series(codigo, country=paises, mrv=30)  # Últimos 30 años
+                        with rendimiento.tramo('wb.get_series', indicador=codigo) as t:
+                            # Con id_or_value='id' el índice trae códigos ISO3 (no nombres en inglés).
+                            # Las sesiones que piden lo mismo a la vez comparten una sola descarga
+                            data = vuelo_unico.ejecutar(
+                                vuelo_unico.clave_serie(codigo, paises, mrv=30, id_or_value='id'),
+                                lambda: wb.get_series(codigo, country=paises, mrv=30, id_or_value='id')  # Últimos 30 años
+                            )
+                            t.medir_carga(data)
                     except Exception as e:
+                        log.warning("Error al obtener datos", extra={'indicador': codigo, 'error': str(e)})
                         st.warning(f"⚠️ Error al obtener datos para {info['nombre']}: {str(e)}")
                         continue
                 
@@ -190,6 +132,7 @@ def obtener_datos_banco_mundial(paises, indicadores, anio_inicio=None, anio_fin=
                         'Year': 'Año',
                         codigo: 'Valor'
                     })
+                    df['Año'] = df['Año'].astype(int)
                     
                     # Filtrar por rango de años si se especifica
                     if anio_inicio and anio_fin:
@@ -209,18 +152,23 @@ def obtener_datos_banco_mundial(paises, indicadores, anio_inicio=None, anio_fin=
                     # Solo guardar si hay datos válidos
                     if not df.empty:
                         datos_completos[info['nombre']] = df[['Pais', 'Año', 'Valor']]
+                        # Sólo se llega aquí con datos recién descargados: mantener el índice de últimos datos
+                        indice_ultimos(paises, anio_inicio, anio_fin).actualizar(info['nombre'], df)
                     else:
                         st.warning(f"⚠️ No hay datos válidos para {info['nombre']} después de filtrar valores faltantes")
                         
                 except Exception as e:
+                    log.exception("Error al procesar datos", extra={'indicador': codigo})
                     st.warning(f"⚠️ Error al procesar datos para {info['nombre']}: {str(e)}")
                     continue
                     
             except Exception as e:
+                log.exception("No se pudieron obtener datos", extra={'indicador': codigo})
                 st.warning(f"⚠️ No se pudieron obtener datos para {info['nombre']}: {str(e)}")
                 continue
                 
     except Exception as e:
+        log.exception("Error inesperado al obtener datos")
         st.error(f"❌ Error inesperado al obtener datos: {str(e)}")
     finally:
         # Asegurarse de que la barra de progreso se complete
@@ -240,13 +188,15 @@ def obtener_datos_banco_mundial(paises, indicadores, anio_inicio=None, anio_fin=
     
     return datos_completos
 
-def mostrar_grafico(df, indicador_info, paises_seleccionados):
+@rendimiento.medido()
+def mostrar_grafico(df, indicador_info, paises_seleccionados, version=None):
     """Muestra un gráfico interactivo con los datos proporcionados."""
     if df is None or df.empty:
         st.warning("No hay datos disponibles para el indicador seleccionado.")
         return
     
     # Filtrar por países seleccionados
+    df_indicador = df
     df = df[df['Pais'].isin(paises_seleccionados)]
     
     # Determinar el tipo de gráfico basado en el indicador
@@ -306,25 +256,36 @@ def mostrar_grafico(df, indicador_info, paises_seleccionados):
     )
     
     # Personalizar tooltips
-    if indicador_info['es_porcentaje']:
-        hovertemplate = '%{y:.2f}%<extra>%{x}</extra>'
-    else:
-        if 'US$' in indicador_info['unidad'] or 'dólar' in indicador_info['unidad'].lower():
-            hovertemplate = 'US$ %{y:,.2f}<extra>%{x}</extra>'
-        elif 'personas' in indicador_info['unidad'].lower():
-            hovertemplate = '%{y:,.0f} personas<extra>%{x}</extra>'
-        else:
-            hovertemplate = '%{y:,.2f}<extra>%{x}</extra>'
+    hovertemplate = f"{formato.plantilla_hover(indicador_info)}<extra>%{{x}}</extra>"
     
     for trace in fig.data:
         trace.hovertemplate = f'<b>%{{data.name}}</b><br>{hovertemplate}'
     
+    # Marcar los valores imputados (ver relleno.py) sobre las líneas de cada país
+    imputados = df[df['Imputado']] if 'Imputado' in df.columns else df.iloc[:0]
+    if not imputados.empty:
+        fig.add_scatter(
+            x=imputados['Año'],
+            y=imputados['Valor'],
+            mode='markers',
+            marker=dict(symbol='circle-open', size=9, color='gray', line=dict(width=2)),
+            name='Valor imputado',
+            customdata=imputados['Pais'],
+            hovertemplate=f"<b>%{{customdata}} (imputado)</b><br>{hovertemplate}",
+            showlegend=True
+        )
+        df_indicador = df_indicador[~df_indicador['Imputado']]
+    
+    # Estadísticas del indicador completo (sólo datos observados), calculadas una vez por versión de la descarga
+    materializado = estadisticas.materializar(indicador_info['nombre'], df_indicador, 'Pais', 'Año', 'Valor',
+                                              version)
+    
     # Añadir línea de promedio si es relevante
     if len(paises_seleccionados) > 1 and not df.empty and not 'población' in indicador_info['nombre'].lower():
-        promedio = df.groupby('Año')['Valor'].mean().reset_index()
+        promedio = materializado.promedio_anual(paises_seleccionados)
         fig.add_scatter(
-            x=promedio['Año'],
-            y=promedio['Valor'],
+            x=promedio.index,
+            y=promedio.to_numpy(),
             mode='lines',
             line=dict(dash='dash', color='red', width=2),
             name='Promedio',
@@ -334,32 +295,28 @@ def mostrar_grafico(df, indicador_info, paises_seleccionados):
     
     # Mostrar estadísticas resumidas
     with st.expander("📊 Estadísticas descriptivas", expanded=False):
-        stats = df.groupby('Pais')['Valor'].agg(['mean', 'min', 'max', 'std']).reset_index()
-        stats.columns = ['País', 'Promedio', 'Mínimo', 'Máximo', 'Desv. Estándar']
-        
-        # Formatear valores según el tipo de indicador
-        if indicador_info['es_porcentaje'] or 'US$' in indicador_info['unidad']:
-            for col in ['Promedio', 'Mínimo', 'Máximo', 'Desv. Estándar']:
-                if indicador_info['es_porcentaje']:
-                    stats[col] = stats[col].apply(lambda x: f"{x:.2f}%")
-                else:
-                    stats[col] = stats[col].apply(lambda x: f"${x:,.2f}")
+        stats = materializado.seleccion(paises_seleccionados, nombres=True).rename_axis('País').reset_index()
         
+        # Los valores siguen siendo numéricos (ordenables); el formato del indicador va en column_config
+        columnas_valor = [estadisticas.COLUMNAS[c] for c in estadisticas.COLUMNAS_VALOR]
         st.dataframe(
             stats,
             use_container_width=True,
             hide_index=True,
             column_config={
                 'País': st.column_config.TextColumn("País"),
-                'Promedio': st.column_config.NumberColumn("Promedio"),
-                'Mínimo': st.column_config.NumberColumn("Mínimo"),
-                'Máximo': st.column_config.NumberColumn("Máximo"),
-                'Desv. Estándar': st.column_config.NumberColumn("Desv. Estándar")
+                'Observaciones': st.column_config.NumberColumn("Observaciones", format="%d"),
+                **{col: formato.columna(indicador_info, col) for col in columnas_valor},
+                'Primer año': st.column_config.NumberColumn("Primer año", format="%d"),
+                'Último año': st.column_config.NumberColumn("Último año", format="%d")
             }
         )
     
-    # Mostrar el gráfico
-    st.plotly_chart(fig, use_container_width=True)
+    # Mostrar el gráfico (serializa la figura y la envía al navegador)
+    with rendimiento.tramo('st.plotly_chart', trazas=len(fig.data)):
+        st.plotly_chart(fig, use_container_width=True)
+    if not imputados.empty:
+        st.caption(f"⚪ {len(imputados)} valores imputados de {len(df)} (rellenado de huecos activo)")
     
     # Opciones de descarga
     col1, col2 = st.columns(2)
@@ -373,11 +330,20 @@ def mostrar_grafico(df, indicador_info, paises_seleccionados):
         )
     with col2:
         # Botón para expandir/contraer el gráfico
-        if st.button("🔄 Actualizar vista", use_container_width=True):
+        if st.button("🔄 Actualizar vista", key=f"actualizar_vista_{indicador_info['nombre']}",
+                     use_container_width=True):
             st.rerun()
 
-def mostrar_resumen(datos_por_indicador, indicadores_seleccionados):
-    """Muestra un resumen con los últimos datos disponibles de manera visual."""
+@rendimiento.medido()
+def mostrar_resumen(datos_por_indicador, indicadores_seleccionados, indice=None):
+    """
+    Muestra un resumen con los últimos datos disponibles de manera visual.
+    
+    Los últimos datos de cada país salen de ``indice`` (ver ultimos.py), que
+    se mantiene al descargar; sin él se construye uno para esta llamada.
+    """
+    if indice is None:
+        indice = ultimos.IndiceUltimos(columnas=('Pais', 'Año', 'Valor'))
     st.subheader("📊 Resumen de Datos")
     st.caption("Comparación de los últimos datos disponibles para los indicadores seleccionados.")
     
@@ -400,8 +366,13 @@ def mostrar_resumen(datos_por_indicador, indicadores_seleccionados):
             if info is None:
                 continue
                 
-            # Obtener el último año con datos para cada país
-            ultimos_datos = df.sort_values('Año').groupby('Pais').last().reset_index()
+            # Último año con datos para cada país, desde el índice de últimos datos
+            # (completado con los países del conjunto que aún no tenga)
+            observados = df[~df['Imputado']] if 'Imputado' in df.columns else df
+            faltan = indice.faltantes(indicador, observados['Pais'])
+            if faltan:
+                indice.actualizar(indicador, observados[observados['Pais'].isin(faltan)])
+            ultimos_datos = indice.consultar(indicador, df['Pais'].unique())
             ultimo_anio = ultimos_datos['Año'].max()
             
             # Mostrar título y descripción
@@ -422,58 +393,39 @@ def mostrar_resumen(datos_por_indicador, indicadores_seleccionados):
                     min_val = ultimos_datos['Valor'].min()
                     avg_val = ultimos_datos['Valor'].mean()
                     
-                    # Formatear valores según el tipo de indicador
-                    def formatear_valor(valor, es_porcentaje, unidad):
-                        if es_porcentaje:
-                            return f"{valor:.2f}%"
-                        elif 'US$' in unidad or 'dólar' in unidad.lower():
-                            return f"${valor:,.2f}"
-                        elif 'personas' in unidad.lower():
-                            return f"{valor:,.0f}"
-                        return f"{valor:,.2f}"
-                    
                     # Mostrar métricas
                     st.metric(
                         label="País con el valor más alto",
                         value=ultimos_datos.loc[ultimos_datos['Valor'].idxmax()]['Pais'],
-                        delta=formatear_valor(max_val, info['es_porcentaje'], info['unidad'])
+                        delta=formato.formatear_valor(max_val, info)
                     )
                     
                     st.metric(
                         label="País con el valor más bajo",
                         value=ultimos_datos.loc[ultimos_datos['Valor'].idxmin()]['Pais'],
-                        delta=formatear_valor(min_val, info['es_porcentaje'], info['unidad'])
+                        delta=formato.formatear_valor(min_val, info)
                     )
                     
                     st.metric(
                         label="Promedio entre países",
-                        value=formatear_valor(avg_val, info['es_porcentaje'], info['unidad'])
+                        value=formato.formatear_valor(avg_val, info)
                     )
                     
                     # Mostrar tabla con todos los datos
                     st.markdown("#### 📋 Datos por país")
                     
-                    # Formatear valores para la tabla
-                    datos_tabla = ultimos_datos[['Pais', 'Año', 'Valor']].copy()
-                    datos_tabla['Año'] = datos_tabla['Año'].astype(int)
-                    
-                    if info['es_porcentaje']:
-                        datos_tabla['Valor'] = datos_tabla['Valor'].apply(lambda x: f"{x:.2f}%")
-                    else:
-                        if 'US$' in info['unidad'] or 'dólar' in info['unidad'].lower():
-                            datos_tabla['Valor'] = datos_tabla['Valor'].apply(lambda x: f"${x:,.2f}")
-                        else:
-                            datos_tabla['Valor'] = datos_tabla['Valor'].apply(lambda x: f"{x:,.2f}")
+                    # Tabla numérica (ordenable); el formato del indicador va en column_config
+                    datos_tabla = ultimos_datos[['Pais', 'Año', 'Valor']].astype({'Año': int})
                     
                     st.dataframe(
-                        datos_tabla.rename(columns={
-                            'Pais': 'País',
-                            'Año': 'Año',
-                            'Valor': info['unidad']
-                        }),
+                        datos_tabla.rename(columns={'Pais': 'País'}),
                         use_container_width=True,
                         hide_index=True,
-                        height=300
+                        height=300,
+                        column_config={
+                            'Año': st.column_config.NumberColumn("Año", format="%d"),
+                            'Valor': formato.columna(info, info['unidad'])
+                        }
                     )
                     
                     # Botón de descarga
@@ -516,15 +468,7 @@ def mostrar_resumen(datos_por_indicador, indicadores_seleccionados):
                     )
                     
                     # Personalizar tooltips
-                    if info['es_porcentaje']:
-                        hovertemplate = '%{y:.2f}%<extra>%{x}</extra>'
-                    else:
-                        if 'US$' in info['unidad'] or 'dólar' in info['unidad'].lower():
-                            hovertemplate = 'US$ %{y:,.2f}<extra>%{x}</extra>'
-                        elif 'personas' in info['unidad'].lower():
-                            hovertemplate = '%{y:,.0f} personas<extra>%{x}</extra>'
-                        else:
-                            hovertemplate = '%{y:,.2f}<extra>%{x}</extra>'
+                    hovertemplate = f"{formato.plantilla_hover(info)}<extra>%{{x}}</extra>"
                     
                     for trace in fig.data:
                         trace.hovertemplate = f'<b>%{{data.name}}</b><br>{hovertemplate}'
@@ -558,6 +502,7 @@ def mostrar_resumen(datos_por_indicador, indicadores_seleccionados):
             
             st.divider()
 
+@rendimiento.medido()
 def analizar_correlacion(datos_por_indicador, indicadores_seleccionados, pais):
     """Analiza la correlación entre diferentes indicadores para un país específico."""
     if len(indicadores_seleccionados) < 2:
@@ -569,8 +514,8 @@ def analizar_correlacion(datos_por_indicador, indicadores_seleccionados, pais):
     
     for indicador in indicadores_seleccionados:
         if indicador in datos_por_indicador:
-            df = datos_por_indicador[indicador].copy()
-            df = df[df['Pais'] == pais]  # Filtrar por país
+            df = datos_por_indicador[indicador]
+            df = df[df['Pais'] == pais]  # Filtrar por país (vista del conjunto compartido, sin copiar)
             
             if df.empty:
                 continue
@@ -597,6 +542,7 @@ def analizar_correlacion(datos_por_indicador, indicadores_seleccionados, pais):
     
     return df_combinado, corr_matrix
 
+@rendimiento.medido()
 def mostrar_analisis_correlacion(datos_por_indicador, indicadores_seleccionados, paises_seleccionados):
     """Muestra el análisis de correlación entre indicadores."""
     st.subheader("🔍 Análisis de Correlación")
@@ -705,15 +651,23 @@ def mostrar_analisis_correlacion(datos_por_indicador, indicadores_seleccionados,
                 df_scatter, 
                 x=ind1, 
                 y=ind2,
-                trendline="ols",
                 title=f"Relación entre {ind1} y {ind2}",
                 labels={
                     ind1: f"{ind1} ({INDICADORES.get(ind1, {}).get('unidad', '')})",
                     ind2: f"{ind2} ({INDICADORES.get(ind2, {}).get('unidad', '')})",
-                },
-                trendline_color_override="red"
+                }
             )
             
+            # Línea de tendencia por mínimos cuadrados (sin statsmodels)
+            x_tendencia = np.linspace(df_scatter[ind1].min(), df_scatter[ind1].max(), 100)
+            fig.add_trace(go.Scatter(
+                x=x_tendencia,
+                y=p(x_tendencia),
+                mode='lines',
+                line=dict(color='red'),
+                name='Tendencia'
+            ))
+            
             # Mejorar diseño
             fig.update_layout(
                 xaxis_title=f"{ind1} ({INDICADORES.get(ind1, {}).get('unidad', '')})",
@@ -743,6 +697,7 @@ def mostrar_analisis_correlacion(datos_por_indicador, indicadores_seleccionados,
             else:
                 st.info(f"No hay una correlación clara entre {ind1} y {ind2}.")
 
+@rendimiento.rerun_medido('app')
 def main():
     # Configuración de la página
     st.set_page_config(
@@ -818,6 +773,23 @@ def main():
             key="rango_anios"
         )
         
+        # Relleno de huecos en series con años sin dato (Gini, gasto en educación...)
+        st.subheader("Huecos en los datos")
+        metodo_relleno = st.selectbox(
+            "Rellenar años sin dato:",
+            options=[None, *relleno.METODOS],
+            format_func=lambda metodo: "Sin rellenar" if metodo is None else relleno.METODOS[metodo],
+            key="metodo_relleno"
+        )
+        limite_relleno = st.slider(
+            "Años máximos a rellenar:",
+            min_value=1,
+            max_value=10,
+            value=3,
+            key="limite_relleno",
+            disabled=metodo_relleno is None
+        )
+        
         # Botón para actualizar datos
         actualizar_datos = st.button("🔄 Actualizar Datos", use_container_width=True)
         
@@ -851,7 +823,8 @@ def main():
             
             # Verificar conexión inicial
             st.write("🔌 Probando conexión con la API...")
-            test_data = wb.get_series('NY.GDP.PCAP.CD', country='MEX', mrv=1)
+            with rendimiento.tramo('wb.get_series', indicador='NY.GDP.PCAP.CD', prueba=True):
+                test_data = wb.get_series('NY.GDP.PCAP.CD', country='MEX', mrv=1)
             if not test_data.empty:
                 st.success("✅ Conexión exitosa con la API del Banco Mundial")
             
@@ -864,6 +837,13 @@ def main():
                     anio_inicio,
                     anio_fin
                 )
+                # Identifica la descarga en caché (cambia sólo al volver a descargar)
+                version_descarga = obtener_datos_banco_mundial.version(
+                    paises_codigos,
+                    indicadores_filtrados,
+                    anio_inicio,
+                    anio_fin
+                )
                 
             if not datos_por_indicador:
                 st.error("❌ No se pudieron obtener datos. Por favor verifica tu conexión e inténtalo de nuevo.")
@@ -879,6 +859,7 @@ def main():
             status.update(label="¡Listo! Datos cargados correctamente.", state="complete", expanded=False)
             
         except Exception as e:
+            log.exception("Error al obtener datos", extra={'paises': paises_seleccionados})
             st.error(f"❌ Error al obtener datos: {str(e)}")
             st.exception(e)
             st.markdown("""
@@ -890,6 +871,15 @@ def main():
             """)
             return
     
+    # Rellenar huecos: una operación vectorizada por indicador sobre la matriz país x año
+    if metodo_relleno is not None:
+        with rendimiento.tramo('relleno.rellenar', metodo=metodo_relleno, indicadores=len(datos_por_indicador)):
+            datos_por_indicador = {
+                indicador: relleno.rellenar(df, 'Pais', 'Año', 'Valor', metodo_relleno, limite_relleno,
+                                            col_imputado='Imputado')
+                for indicador, df in datos_por_indicador.items()
+            }
+    
     # Mostrar pestañas
     tab1, tab2, tab3 = st.tabs(["📊 Gráficos", "📋 Resumen", "🔍 Análisis"])
     
@@ -900,12 +890,14 @@ def main():
                 mostrar_grafico(
                     datos_por_indicador[indicador],
                     next((v for k, v in INDICADORES.items() if v['nombre'] == indicador), None),
-                    paises_seleccionados
+                    paises_seleccionados,
+                    version_descarga
                 )
     
     with tab2:
         # Mostrar resumen de datos
-        mostrar_resumen(datos_por_indicador, indicadores_seleccionados)
+        mostrar_resumen(datos_por_indicador, indicadores_seleccionados,
+                        indice_ultimos(paises_codigos, anio_inicio, anio_fin))
     
     with tab3:
         # Mostrar análisis de correlación
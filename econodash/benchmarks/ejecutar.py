@@ -0,0 +1,279 @@
+"""Benchmarks sin red de las etapas de EconoDash.
+
+Sustituye la API del Banco Mundial por wb_grabado (fixtures sintéticas, o
+grabadas si las hay, con latencia configurable) y mide por separado cada etapa del flujo de datos:
+
+    fetch      app.obtener_datos_banco_mundial, simple_app.obtener_datos_indicador
+               e ingesta.ejecutar_plan (src/)
+    clean      simple_app.limpiar_datos
+    aggregate  simple_app.agregar_promedios y app.analizar_correlacion
+    render     app.mostrar_grafico, simple_app.crear_grafico_indicador y
+               panel_interactivo.generar_dashboard (src/)
+
+para 5, 50 y 250 países por 1, 4 y 14 indicadores (limitados a los que
+tiene cada app). Las funciones cacheadas (conjuntos.compartido) se llaman desenvueltas
+(``inspect.unwrap``) para medir el trabajo real y no la caché.
+
+Uso:
+    python benchmarks/ejecutar.py
+    python benchmarks/ejecutar.py --paises 5 50 --indicadores 1 4 --latencia-ms 50
+    python benchmarks/ejecutar.py --salida base.json
+    python benchmarks/ejecutar.py --comparar base.json --tolerancia 0.25
+
+El resultado es un JSON (por defecto en benchmarks/resultados/) con una
+fila por escenario, etapa y tamaño. Con --comparar devuelve código de
+salida 1 si alguna etapa es más lenta que la referencia más allá de la
+tolerancia.
+"""
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+sys.path.append(BASE_DIR)
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+
+import pandas as pd
+import streamlit.config
+import streamlit.logger
+
+import wb_grabado
+
+RESULTADOS_DIR = os.path.join(BENCH_DIR, 'resultados')
+
+PAISES_POR_DEFECTO = [5, 50, 250]
+INDICADORES_POR_DEFECTO = [1, 4, 14]
+
+# Años que piden las apps en los benchmarks
+ANIO_INICIO, ANIO_FIN = 2000, 2023
+
+
+def medir(funcion, repeticiones):
+    """Ejecuta ``funcion`` varias veces; devuelve su último resultado y los tiempos en ms."""
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return resultado, tiempos
+
+
+def _silencioso(funcion):
+    """Envuelve ``funcion`` para descartar lo que imprime por consola."""
+    def envoltura():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return funcion()
+    return envoltura
+
+
+def etapas_app(paises, indicadores):
+    """Etapas de app.py: descarga por lotes, correlación y gráfico por indicador."""
+    import app
+
+    nombres = [app.PAISES.get(p, p) for p in paises]
+    datos = {}
+
+    def fetch():
+        datos.clear()
+        datos.update(inspect.unwrap(app.obtener_datos_banco_mundial)(paises, indicadores))
+        return datos
+
+    def aggregate():
+        seleccionados = list(datos)
+        return [app.analizar_correlacion(datos, seleccionados, pais) for pais in nombres]
+
+    def render():
+        for nombre, info in zip(datos, indicadores.values()):
+            app.mostrar_grafico(datos[nombre], info, nombres)
+
+    return [('fetch', fetch), ('aggregate', aggregate), ('render', render)]
+
+
+def etapas_simple_app(paises, indicadores):
+    """Etapas de simple_app.py: descarga por país, limpieza, promedios y gráficos."""
+    import simple_app
+
+    _sin_cache = inspect.unwrap(simple_app.obtener_datos_indicador)
+    datos = {}
+
+    def fetch():
+        datos.clear()
+        for codigo in indicadores:
+            datos[codigo] = _sin_cache(codigo, paises, ANIO_INICIO, ANIO_FIN)
+        return datos
+
+    def clean():
+        return {codigo: simple_app.limpiar_datos(df) for codigo, df in datos.items()}
+
+    def aggregate():
+        return {codigo: simple_app.agregar_promedios(df) for codigo, df in datos.items()}
+
+    def render():
+        for codigo, df in datos.items():
+            simple_app.crear_grafico_indicador(df, codigo, ANIO_INICIO, ANIO_FIN)
+
+    return [('fetch', fetch), ('clean', clean), ('aggregate', aggregate), ('render', render)]
+
+
+def etapas_src(paises, indicadores):
+    """Etapas de los scripts de src/: plan de descarga paralelo y dashboard HTML."""
+    import ingesta
+    import panel_interactivo
+
+    datos = {}
+    salida = tempfile.mkdtemp(prefix='econodash_bench_')
+
+    def fetch():
+        datos.clear()
+        datos.update(ingesta.ejecutar_plan(ingesta.planificar_descarga(paises, indicadores))[0])
+        return datos
+
+    def render():
+        return panel_interactivo.generar_dashboard(datos, salida, indicadores)
+
+    return [('fetch', _silencioso(fetch)), ('render', _silencioso(render))]
+
+
+def escenarios():
+    """Escenarios disponibles con el catálogo de indicadores de cada uno."""
+    from indicadores import INDICADORES
+    import simple_app
+
+    return {
+        'app': (etapas_app, INDICADORES),
+        'simple_app': (etapas_simple_app, simple_app.INDICADORES),
+        'src': (etapas_src, INDICADORES),
+    }
+
+
+def paises_disponibles():
+    """Códigos de país (sin agregados) de las fixtures, en orden estable."""
+    paises = wb_grabado.get_countries()
+    return paises.index[paises['region'] != 'Aggregates'].tolist()
+
+
+def ejecutar(tamanos_paises, tamanos_indicadores, repeticiones=3, latencia_ms=0, seleccion=None):
+    """Ejecuta todos los benchmarks y devuelve el informe como diccionario."""
+    # Fuera de `streamlit run` cada st.* avisa de que no hay contexto de ejecución;
+    # se lee la configuración antes para que no restaure el nivel de log después
+    streamlit.config.get_option('logger.level')
+    streamlit.logger.set_log_level('error')
+
+    wb_grabado.instalar(latencia_ms)
+    todos_los_paises = paises_disponibles()
+    filas = []
+
+    for nombre, (construir_etapas, catalogo) in escenarios().items():
+        if seleccion and nombre not in seleccion:
+            continue
+        for n_paises in tamanos_paises:
+            paises = todos_los_paises[:n_paises]
+            # Cada app tiene su propio catálogo: evitar medir dos veces el mismo tamaño
+            for n_indicadores in sorted({min(n, len(catalogo)) for n in tamanos_indicadores}):
+                indicadores = dict(list(catalogo.items())[:n_indicadores])
+                print(f"{nombre:>10} | {len(paises):3d} países x {n_indicadores:2d} indicadores", flush=True)
+
+                for etapa, funcion in construir_etapas(paises, indicadores):
+                    llamadas_antes = wb_grabado.llamadas()
+                    _, tiempos = medir(funcion, repeticiones)
+                    fila = {
+                        'escenario': nombre,
+                        'etapa': etapa,
+                        'paises': len(paises),
+                        'indicadores': n_indicadores,
+                        'mediana_ms': round(statistics.median(tiempos), 2),
+                        'min_ms': round(min(tiempos), 2),
+                        'max_ms': round(max(tiempos), 2),
+                        'llamadas_api': (wb_grabado.llamadas() - llamadas_antes) // repeticiones
+                    }
+                    filas.append(fila)
+                    print(f"{'':>10} | {etapa:<9} mediana {fila['mediana_ms']:10.1f} ms"
+                          f"  (min {fila['min_ms']:.1f}, {fila['llamadas_api']} llamadas)", flush=True)
+
+    wb_grabado.desinstalar()
+    return {
+        'generado': datetime.now().isoformat(timespec='seconds'),
+        'entorno': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'plataforma': platform.platform(),
+        },
+        'latencia_ms': latencia_ms,
+        'repeticiones': repeticiones,
+        'resultados': filas
+    }
+
+
+def _clave(fila):
+    return (fila['escenario'], fila['etapa'], fila['paises'], fila['indicadores'])
+
+
+def comparar(informe, referencia, tolerancia):
+    """
+    Compara un informe con otro de referencia.
+
+    Returns:
+        list: Filas más lentas que la referencia en más de ``tolerancia`` (0.25 = 25%)
+    """
+    base = {_clave(fila): fila for fila in referencia['resultados']}
+    regresiones = []
+    for fila in informe['resultados']:
+        anterior = base.get(_clave(fila))
+        if anterior is None or anterior['mediana_ms'] <= 0:
+            continue
+        cambio = fila['mediana_ms'] / anterior['mediana_ms'] - 1
+        if cambio > tolerancia:
+            regresiones.append(dict(fila, referencia_ms=anterior['mediana_ms'], cambio=round(cambio, 3)))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks sin red de EconoDash")
+    parser.add_argument('--paises', type=int, nargs='+', default=PAISES_POR_DEFECTO)
+    parser.add_argument('--indicadores', type=int, nargs='+', default=INDICADORES_POR_DEFECTO)
+    parser.add_argument('--escenarios', nargs='+', choices=['app', 'simple_app', 'src'],
+                        help="Escenarios a medir (por defecto: todos)")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--latencia-ms', type=float, default=0,
+                        help="Latencia simulada por llamada a la API")
+    parser.add_argument('--salida', help="Archivo JSON de salida")
+    parser.add_argument('--comparar', help="Informe JSON de referencia")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="Empeoramiento máximo admitido frente a la referencia (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    informe = ejecutar(args.paises, args.indicadores, args.repeticiones, args.latencia_ms, args.escenarios)
+
+    salida = args.salida or os.path.join(
+        RESULTADOS_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados guardados en: {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            referencia = json.load(f)
+        regresiones = comparar(informe, referencia, args.tolerancia)
+        for fila in regresiones:
+            print(f"  [X] {fila['escenario']}/{fila['etapa']} {fila['paises']}x{fila['indicadores']}: "
+                  f"{fila['referencia_ms']:.1f} -> {fila['mediana_ms']:.1f} ms (+{fila['cambio']:.0%})")
+        if regresiones:
+            sys.exit(1)
+        print("  [OK] Sin regresiones frente a la referencia")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Sustituto sin red de world_bank_data que reproduce fixtures locales.
+
+Reemplaza ``wb.get_series`` y ``wb.get_countries`` por versiones que leen
+fixtures locales y devuelven exactamente la misma forma que la API real
+(MultiIndex Country/Series/Year, años como texto, NaN donde no hay dato,
+``id_or_value``, ``simplify_index``, ``mrv`` y ``date``). Opcionalmente
+añade una latencia artificial por llamada para simular la red.
+
+Por defecto se usan fixtures sintéticas deterministas, generadas en
+cache/fixtures_sinteticas/: paseos aleatorios con ~10% de huecos sobre el
+catálogo de países incluido más países ficticios hasta PAISES_SINTETICOS.
+Miden el coste de procesar datos con la forma y el tamaño de la API, no los
+valores reales.
+
+Opcionalmente se pueden grabar respuestas reales (el repositorio no incluye
+ninguna) con ``python benchmarks/wb_grabado.py --grabar`` (requiere
+conexión); si existen, tienen preferencia sobre las sintéticas:
+    benchmarks/fixtures/paises.csv               Respuesta de wb.get_countries()
+    benchmarks/fixtures/series/<indicador>.csv.gz
+                                                 Serie completa de cada indicador
+"""
+import os
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+SINTETICAS_DIR = os.path.join(BASE_DIR, 'cache', 'fixtures_sinteticas')
+
+# Años que cubren las fixtures sintéticas
+ANIOS_SINTETICOS = range(1990, 2025)
+
+# Número de países (no agregados) de las fixtures sintéticas
+PAISES_SINTETICOS = 260
+
+_estado = {'latencia': 0.0, 'llamadas': 0, 'originales': None}
+_series = {}
+_lock = threading.Lock()
+
+
+def _ruta_serie(directorio, indicador):
+    return os.path.join(directorio, 'series', f"{indicador}.csv.gz")
+
+
+# ---------------------------------------------------------------------------
+# Grabación y generación de fixtures
+# ---------------------------------------------------------------------------
+
+def grabar_fixtures(indicadores, directorio=FIXTURES_DIR):
+    """Descarga de la API real los países y las series indicadas y las guarda como fixtures."""
+    import world_bank_data as wb
+
+    os.makedirs(os.path.join(directorio, 'series'), exist_ok=True)
+    paises = wb.get_countries()
+    paises.to_csv(os.path.join(directorio, 'paises.csv'))
+    nombres = paises['name']
+
+    for indicador in indicadores:
+        serie = wb.get_series(indicador, id_or_value='id', date='1960:2030')
+        df = serie.reset_index()
+        df.columns = ['codigo_pais', 'serie', 'anio', 'valor']
+        etiqueta = wb.get_indicators(indicador)['name'].iloc[0]
+        df['serie'] = etiqueta
+        df['pais'] = df['codigo_pais'].map(nombres)
+        df[['codigo_pais', 'pais', 'serie', 'anio', 'valor']].to_csv(
+            _ruta_serie(directorio, indicador), index=False, compression='gzip'
+        )
+        print(f"  [OK] {indicador}: {len(df)} filas")
+
+
+def generar_fixtures_sinteticas(indicadores, directorio=SINTETICAS_DIR):
+    """Genera fixtures deterministas (misma forma que la API) sin usar la red."""
+    from catalogo_paises import obtener_paises
+
+    os.makedirs(os.path.join(directorio, 'series'), exist_ok=True)
+    ruta_paises = os.path.join(directorio, 'paises.csv')
+
+    if not os.path.exists(ruta_paises):
+        catalogo = obtener_paises(refrescar=False)
+        codigos = list(catalogo)
+        nombres = [catalogo[c]['nombre_ingles'] for c in codigos]
+        iso2 = [catalogo[c]['iso2'] for c in codigos]
+        i = 0
+        while len(codigos) < PAISES_SINTETICOS:
+            codigo = f"Z{i // 26 % 26 + 65:c}{i % 26 + 65:c}"
+            i += 1
+            if codigo in catalogo:
+                continue
+            codigos.append(codigo)
+            nombres.append(f"Synthetic {codigo}")
+            iso2.append(codigo[1:])
+        paises = pd.DataFrame({
+            'iso2Code': iso2,
+            'name': nombres,
+            'region': 'Synthetic',
+            'adminregion': '',
+            'incomeLevel': 'Not classified',
+            'lendingType': 'Not classified',
+            'capitalCity': '',
+            'longitude': 0.0,
+            'latitude': 0.0
+        }, index=pd.Index(codigos, name='id'))
+        # Algunos agregados, como en la API real
+        agregados = pd.DataFrame({
+            'iso2Code': ['1W', 'ZJ', 'Z7'],
+            'name': ['World', 'Latin America & Caribbean', 'Europe & Central Asia'],
+            'region': 'Aggregates',
+            'adminregion': '', 'incomeLevel': 'Aggregates', 'lendingType': 'Aggregates',
+            'capitalCity': '', 'longitude': np.nan, 'latitude': np.nan
+        }, index=pd.Index(['WLD', 'LCN', 'ECS'], name='id'))
+        pd.concat([paises, agregados]).to_csv(ruta_paises)
+
+    paises = pd.read_csv(ruta_paises, index_col='id', keep_default_na=False, na_values=[''])
+    for indicador in indicadores:
+        ruta = _ruta_serie(directorio, indicador)
+        if os.path.exists(ruta):
+            continue
+        rng = np.random.default_rng(zlib.crc32(indicador.encode('utf-8')))
+        anios = np.array(ANIOS_SINTETICOS)
+        n_paises, n_anios = len(paises), len(anios)
+        # Paseo aleatorio por país, con ~10% de huecos
+        base = rng.uniform(1, 100, size=(n_paises, 1))
+        valores = base * np.cumprod(1 + rng.normal(0.02, 0.05, size=(n_paises, n_anios)), axis=1)
+        valores[rng.random((n_paises, n_anios)) < 0.1] = np.nan
+        pd.DataFrame({
+            'codigo_pais': np.repeat(paises.index.to_numpy(), n_anios),
+            'pais': np.repeat(paises['name'].to_numpy(), n_anios),
+            'serie': f"Synthetic {indicador}",
+            'anio': np.tile(anios, n_paises).astype(str),
+            'valor': valores.ravel()
+        }).to_csv(ruta, index=False, compression='gzip')
+
+
+def _directorio_fixtures(indicador):
+    if os.path.exists(_ruta_serie(FIXTURES_DIR, indicador)):
+        return FIXTURES_DIR
+    if not os.path.exists(_ruta_serie(SINTETICAS_DIR, indicador)):
+        generar_fixtures_sinteticas([indicador])
+    return SINTETICAS_DIR
+
+
+def _cargar_serie(indicador):
+    with _lock:
+        if indicador not in _series:
+            ruta = _ruta_serie(_directorio_fixtures(indicador), indicador)
+            _series[indicador] = pd.read_csv(ruta, dtype={'anio': str, 'codigo_pais': str},
+                                             keep_default_na=False, na_values=[''])
+        return _series[indicador]
+
+
+# ---------------------------------------------------------------------------
+# Sustitutos de la API
+# ---------------------------------------------------------------------------
+
+def _esperar():
+    with _lock:
+        _estado['llamadas'] += 1
+    if _estado['latencia']:
+        time.sleep(_estado['latencia'])
+
+
+def get_countries(country=None, language=None, id_or_value=None, **params):
+    """Sustituto de wb.get_countries()."""
+    _esperar()
+    directorio = FIXTURES_DIR if os.path.exists(os.path.join(FIXTURES_DIR, 'paises.csv')) else SINTETICAS_DIR
+    ruta = os.path.join(directorio, 'paises.csv')
+    if not os.path.exists(ruta):
+        generar_fixtures_sinteticas([])
+    paises = pd.read_csv(ruta, index_col='id', keep_default_na=False, na_values=[''])
+    if country not in (None, 'all'):
+        codigos = [country] if isinstance(country, str) else list(country)
+        paises = paises.loc[paises.index.intersection(codigos)]
+    return paises
+
+
+def get_series(indicator, country=None, id_or_value=None, simplify_index=False, **params):
+    """Sustituto de wb.get_series() con los parámetros que usa EconoDash."""
+    _esperar()
+    datos = _cargar_serie(indicator)
+
+    if country not in (None, 'all'):
+        codigos = [country] if isinstance(country, str) else list(country)
+        codigos = ';'.join(codigos).split(';')
+        datos = datos[datos['codigo_pais'].isin(codigos)]
+        if datos.empty:
+            raise ValueError(f"The provided parameter value is not valid: {country}")
+
+    anios = sorted(datos['anio'].unique(), key=int)
+    if 'date' in params:
+        inicio, _, fin = str(params['date']).partition(':')
+        fin = fin or inicio
+        anios = [a for a in anios if int(inicio) <= int(a) <= int(fin)]
+    if params.get('mrv'):
+        con_datos = sorted(datos.loc[datos['valor'].notna(), 'anio'].unique(), key=int)
+        anios = con_datos[-int(params['mrv']):]
+    datos = datos[datos['anio'].isin(anios)]
+
+    usar_etiquetas = (id_or_value or 'value') == 'value'
+    paises = datos.drop_duplicates('codigo_pais')
+    etiquetas_pais = paises['pais' if usar_etiquetas else 'codigo_pais'].to_numpy()
+    etiqueta_serie = datos['serie'].iloc[0] if usar_etiquetas and not datos.empty else indicator
+
+    # La API devuelve el producto completo país x año (NaN donde no hay dato)
+    tabla = datos.pivot_table(index='codigo_pais', columns='anio', values='valor',
+                              aggfunc='first', dropna=False)
+    tabla = tabla.reindex(index=paises['codigo_pais'].to_numpy(), columns=anios[::-1])
+    indice = [
+        pd.Index(etiquetas_pais, name='Country'),
+        pd.Index([etiqueta_serie], name='Series'),
+        pd.Index(anios[::-1], name='Year')
+    ]
+    if simplify_index:
+        indice = [nivel for nivel in indice if len(nivel) != 1]
+
+    valores = tabla.to_numpy().ravel()
+    if len(indice) > 1:
+        indice = pd.MultiIndex.from_product(indice)
+    elif len(indice) == 1:
+        indice = indice[0]
+    else:
+        return valores[0]
+    return pd.Series(valores, index=indice, name=indicator)
+
+
+def instalar(latencia_ms=0):
+    """Sustituye world_bank_data.get_series/get_countries por las que leen las fixtures."""
+    import world_bank_data as wb
+
+    if _estado['originales'] is None:
+        _estado['originales'] = (wb.get_series, wb.get_countries)
+    _estado['latencia'] = latencia_ms / 1000
+    wb.get_series = get_series
+    wb.get_countries = get_countries
+
+
+def desinstalar():
+    """Restaura las funciones originales de world_bank_data."""
+    import world_bank_data as wb
+
+    if _estado['originales'] is not None:
+        wb.get_series, wb.get_countries = _estado['originales']
+        _estado['originales'] = None
+
+
+def llamadas():
+    """Número de llamadas a la API simulada desde que se importó el módulo."""
+    return _estado['llamadas']
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, BASE_DIR)
+    from indicadores import INDICADORES
+
+    if '--grabar' in sys.argv:
+        print(f"Grabando fixtures en {FIXTURES_DIR}...")
+        grabar_fixtures(list(INDICADORES))
+    else:
+        print(f"Generando fixtures sintéticas en {SINTETICAS_DIR}...")
+        generar_fixtures_sinteticas(list(INDICADORES))
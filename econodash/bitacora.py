@@ -0,0 +1,190 @@
+"""Registro estructurado (JSON lines) de las apps, sin coste en el hilo de la app.
+
+Sustituye a las capturas de ``streamlit run app.py --logger.level=debug >
+debug.log``. Cada evento es una línea JSON con fecha, nivel, logger,
+mensaje, identificador de correlación (el del rerun en curso) y los campos
+pasados en ``extra``:
+
+    log = bitacora.obtener_logger('simple_app')
+    log.warning("Sin datos", extra={'indicador': codigo, 'pais': pais})
+
+El hilo de la app sólo encola el registro (QueueHandler); un hilo de fondo
+(QueueListener) lo formatea y lo escribe en logs/econodash.jsonl con
+rotación por tamaño. Los eventos DEBUG se muestrean por correlación: o se
+registran todos los de un rerun o ninguno.
+
+Variables de entorno:
+    ECONODASH_LOG_NIVEL     Nivel mínimo (por defecto DEBUG, muestreado)
+    ECONODASH_LOG_MUESTREO  Fracción de reruns con DEBUG (por defecto 0.01)
+    ECONODASH_LOG_RUTA      Archivo de salida
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import traceback
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RUTA_LOG = os.environ.get('ECONODASH_LOG_RUTA', os.path.join(BASE_DIR, 'logs', 'econodash.jsonl'))
+
+# Rotación: tamaño máximo de cada archivo y número de archivos anteriores que se conservan
+TAMANO_MAXIMO_BYTES = 5 * 1024 * 1024
+COPIAS_ROTADAS = 5
+
+NIVEL = os.environ.get('ECONODASH_LOG_NIVEL', 'DEBUG').upper()
+MUESTREO_DEBUG = float(os.environ.get('ECONODASH_LOG_MUESTREO', '0.01'))
+
+# Atributos propios de LogRecord (el resto son campos pasados en ``extra``)
+_ATRIBUTOS_ESTANDAR = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_correlacion = contextvars.ContextVar('correlacion_log', default=None)
+_estado = {'listener': None}
+_lock = threading.Lock()
+
+
+def correlacion_actual():
+    """Identificador de correlación del contexto actual (None si no hay)."""
+    return _correlacion.get()
+
+
+@contextmanager
+def correlacion(identificador=None):
+    """Asocia un identificador de correlación a todos los eventos del bloque."""
+    identificador = identificador or uuid.uuid4().hex[:12]
+    token = _correlacion.set(identificador)
+    try:
+        yield identificador
+    finally:
+        _correlacion.reset(token)
+
+
+def en_muestra(identificador=None):
+    """Indica si los eventos DEBUG de esta correlación se registran."""
+    if MUESTREO_DEBUG >= 1:
+        return True
+    if MUESTREO_DEBUG <= 0:
+        return False
+    identificador = identificador or _correlacion.get()
+    if identificador is None:
+        return random.random() < MUESTREO_DEBUG
+    # Decisión estable por correlación: todo el rerun entra en la muestra o nada
+    return zlib.crc32(identificador.encode('utf-8')) / 2 ** 32 < MUESTREO_DEBUG
+
+
+class FormateadorJSON(logging.Formatter):
+    """Una línea JSON por evento."""
+
+    def format(self, record):
+        datos = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+            'correlacion': getattr(record, 'correlacion', None),
+            'hilo': record.threadName,
+        }
+        for clave, valor in record.__dict__.items():
+            if clave not in _ATRIBUTOS_ESTANDAR and clave not in datos:
+                datos[clave] = valor
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class _FiltroContexto(logging.Filter):
+    """Añade la correlación y descarta los DEBUG que no entran en la muestra."""
+
+    def filter(self, record):
+        record.correlacion = _correlacion.get()
+        return record.levelno > logging.DEBUG or en_muestra(record.correlacion)
+
+
+class _ManejadorCola(logging.handlers.QueueHandler):
+    """QueueHandler que deja el formateo (JSON) al hilo de escritura."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.excepcion = ''.join(traceback.format_exception(*record.exc_info))
+            record.exc_info = None
+            record.exc_text = None
+        return record
+
+
+def configurar(ruta=RUTA_LOG, nivel=NIVEL):
+    """Prepara el logger raíz 'econodash' (sólo la primera vez). Devuelve el logger."""
+    raiz = logging.getLogger('econodash')
+    with _lock:
+        if _estado['listener'] is not None:
+            return raiz
+
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        archivo = logging.handlers.RotatingFileHandler(
+            ruta, maxBytes=TAMANO_MAXIMO_BYTES, backupCount=COPIAS_ROTADAS,
+            encoding='utf-8', delay=True
+        )
+        archivo.setFormatter(FormateadorJSON())
+
+        cola = queue.SimpleQueue()
+        manejador = _ManejadorCola(cola)
+        manejador.addFilter(_FiltroContexto())
+
+        raiz.setLevel(nivel)
+        raiz.addHandler(manejador)
+        raiz.propagate = False
+
+        listener = logging.handlers.QueueListener(cola, archivo, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        _estado['listener'] = listener
+    return raiz
+
+
+def obtener_logger(nombre):
+    """Logger ``econodash.<nombre>``, configurando el registro si aún no lo está."""
+    configurar()
+    return logging.getLogger(f"econodash.{nombre}")
+
+
+def mostrar_en_consola(nombre, nivel=logging.INFO):
+    """
+    Muestra también en stderr los eventos de ``econodash.<nombre>``.
+
+    Para los scripts de línea de comandos: los eventos siguen llegando al
+    archivo, y además se ven como ``  [NIVEL] mensaje``.
+    """
+    logger = obtener_logger(nombre)
+    if not any(getattr(m, '_consola', False) for m in logger.handlers):
+        consola = logging.StreamHandler(sys.stderr)
+        consola.setFormatter(logging.Formatter('  [%(levelname)s] %(message)s'))
+        consola.setLevel(nivel)
+        consola._consola = True
+        logger.addHandler(consola)
+    return logger
+
+
+def detener():
+    """Vacía la cola y detiene el hilo de escritura."""
+    with _lock:
+        listener = _estado['listener']
+        if listener is not None:
+            atexit.unregister(listener.stop)
+            listener.stop()
+            _estado['listener'] = None
+            raiz = logging.getLogger('econodash')
+            for manejador in list(raiz.handlers):
+                if isinstance(manejador, _ManejadorCola):
+                    raiz.removeHandler(manejador)
@@ -0,0 +1,41 @@
+"""Bloqueos exclusivos entre procesos sobre un archivo (fcntl en POSIX, msvcrt en Windows).
+
+Son bloqueos por descriptor: para excluir también a los hilos del mismo
+proceso hay que combinarlos con un ``threading.Lock``.
+"""
+from contextlib import contextmanager
+
+try:
+    import fcntl
+
+    def bloquear(archivo):
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_EX)
+
+    def desbloquear(archivo):
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+except ImportError:  # Windows
+    import msvcrt
+
+    def bloquear(archivo):
+        archivo.seek(0)
+        while True:
+            try:
+                msvcrt.locking(archivo.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK se rinde tras ~10 s; seguir esperando
+                continue
+
+    def desbloquear(archivo):
+        archivo.seek(0)
+        msvcrt.locking(archivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def bloqueado(archivo):
+    """Mantiene el bloqueo exclusivo de ``archivo`` (ya abierto) durante el bloque."""
+    bloquear(archivo)
+    try:
+        yield archivo
+    finally:
+        desbloquear(archivo)
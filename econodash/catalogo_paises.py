@@ -0,0 +1,165 @@
+"""Catálogo de países del Banco Mundial con arranque sin red.
+
+El catálogo se distribuye como una instantánea en datos/paises.json, que se
+carga en microsegundos la primera vez que se pide (no al importar el
+módulo). Si la instantánea tiene más de VIGENCIA_HORAS, se refresca en un
+hilo de fondo con wb.get_countries(); el resultado se guarda en
+cache/paises.json y sustituye al catálogo en memoria sin bloquear a nadie.
+
+Para regenerar la instantánea distribuida (con conexión a internet):
+
+    python catalogo_paises.py --actualizar-instantanea
+"""
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RUTA_INSTANTANEA = os.path.join(BASE_DIR, 'datos', 'paises.json')
+RUTA_ACTUALIZADA = os.path.join(BASE_DIR, 'cache', 'paises.json')
+
+# Horas tras las cuales se intenta refrescar el catálogo en segundo plano
+VIGENCIA_HORAS = 24
+
+_catalogo = None
+_nombres_ingles = None
+_lock = threading.Lock()
+_refresco_en_curso = threading.Event()
+
+
+def _leer(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _escribir(ruta, contenido):
+    """Escribe el catálogo de forma atómica (un país por línea)."""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    lineas = [
+        f"  {json.dumps(codigo)}: {json.dumps(datos, ensure_ascii=False)}"
+        for codigo, datos in contenido['paises'].items()
+    ]
+    texto = (
+        "{\n"
+        f" \"generado\": {json.dumps(contenido.get('generado'))},\n"
+        f" \"fuente\": {json.dumps(contenido.get('fuente'), ensure_ascii=False)},\n"
+        " \"paises\": {\n" + ",\n".join(lineas) + "\n }\n}\n"
+    )
+    ruta_tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        f.write(texto)
+    os.replace(ruta_tmp, ruta)
+
+
+def _cargar_instantanea():
+    """Carga la instantánea más reciente disponible (refrescada o distribuida)."""
+    for ruta in (RUTA_ACTUALIZADA, RUTA_INSTANTANEA):
+        if os.path.exists(ruta):
+            try:
+                return _leer(ruta), ruta
+            except (OSError, ValueError):
+                continue
+    return {'generado': None, 'fuente': None, 'paises': {}}, None
+
+
+def _instalar(paises):
+    """Sustituye el catálogo en memoria y su índice por nombre en inglés."""
+    global _catalogo, _nombres_ingles
+    _nombres_ingles = {datos['nombre_ingles'].upper(): datos['nombre'] for datos in paises.values()}
+    _catalogo = paises
+
+
+def fusionar_catalogo(paises_base, paises_wb):
+    """
+    Añade al catálogo base los países de wb.get_countries() que no estén ya en él.
+
+    Los nombres en español del catálogo base se conservan; los países nuevos
+    usan el nombre en inglés.
+    """
+    paises = dict(paises_base)
+    if paises_wb is None or paises_wb.empty:
+        return paises
+
+    # Filtrar solo países (excluir regiones agregadas que no tienen código de región)
+    paises_wb = paises_wb[paises_wb['region'].notna() & paises_wb['iso2Code'].notna()]
+    paises_wb = paises_wb[paises_wb.index.str.len() == 3]
+
+    for iso3, nombre_ingles, iso2 in zip(paises_wb.index, paises_wb['name'], paises_wb['iso2Code']):
+        if iso3 not in paises:
+            paises[iso3] = {
+                'nombre': nombre_ingles,  # Usar el nombre en inglés si no hay traducción
+                'nombre_ingles': nombre_ingles,
+                'iso2': iso2
+            }
+    return paises
+
+
+def actualizar_catalogo(ruta_destino=RUTA_ACTUALIZADA):
+    """Descarga la lista de países del Banco Mundial, la fusiona y la guarda."""
+    import world_bank_data as wb
+    import transporte
+
+    transporte.instalar()
+    contenido, _ = _cargar_instantanea()
+    paises = fusionar_catalogo(contenido['paises'], wb.get_countries())
+    _escribir(ruta_destino, {
+        'generado': datetime.now().isoformat(timespec='seconds'),
+        'fuente': 'wb.get_countries()',
+        'paises': paises
+    })
+    with _lock:
+        _instalar(paises)
+    return paises
+
+
+def _refrescar_en_segundo_plano():
+    try:
+        actualizar_catalogo()
+    except Exception:
+        # Sin red seguimos con la instantánea; se reintentará en el próximo arranque
+        pass
+    finally:
+        _refresco_en_curso.clear()
+
+
+def _necesita_refresco(ruta):
+    """Hay que refrescar si aún no hay catálogo descargado o si tiene más de VIGENCIA_HORAS."""
+    if ruta != RUTA_ACTUALIZADA:
+        return True
+    return time.time() - os.path.getmtime(ruta) > VIGENCIA_HORAS * 3600
+
+
+def obtener_paises(refrescar=True):
+    """
+    Devuelve el catálogo de países (ISO3 -> nombre, nombre en inglés, ISO2).
+
+    La primera llamada carga la instantánea local; si está desactualizada se
+    lanza un refresco en segundo plano y se devuelve la instantánea sin esperar.
+    """
+    if _catalogo is None:
+        with _lock:
+            if _catalogo is None:
+                contenido, ruta = _cargar_instantanea()
+                _instalar(contenido['paises'])
+                if refrescar and _necesita_refresco(ruta) and not _refresco_en_curso.is_set():
+                    _refresco_en_curso.set()
+                    threading.Thread(target=_refrescar_en_segundo_plano,
+                                     name='refresco_catalogo_paises', daemon=True).start()
+    return _catalogo
+
+
+def nombre_desde_ingles(nombre_ingles):
+    """Nombre en español a partir del nombre en inglés (None si no está en el catálogo)."""
+    obtener_paises()
+    return _nombres_ingles.get(str(nombre_ingles).strip().upper())
+
+
+if __name__ == "__main__":
+    if '--actualizar-instantanea' in sys.argv:
+        paises = actualizar_catalogo(RUTA_INSTANTANEA)
+        print(f"Instantánea actualizada con {len(paises)} países: {RUTA_INSTANTANEA}")
+    else:
+        print(f"{len(obtener_paises(refrescar=False))} países en el catálogo local.")
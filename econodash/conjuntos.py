@@ -0,0 +1,114 @@
+"""Registro de conjuntos de datos compartidos (de solo lectura) entre sesiones.
+
+``st.cache_data`` serializa el resultado y entrega a cada sesión, en cada
+acierto, una copia nueva deserializada: con muchas sesiones abiertas la
+memoria y la CPU crecen con el número de usuarios. ``compartido`` guarda el
+resultado una sola vez en el proceso (``st.cache_resource``) y entrega a
+cada llamada una vista sin copia:
+
+    @rendimiento.medido(cache=True, carga=True)
+    @conjuntos.compartido(ttl=86400)
+    @rendimiento.medido(rendimiento.FALLO_CACHE)
+    def obtener_datos_banco_mundial(...):
+        ...
+
+Con copy-on-write de pandas, las vistas son ``copy(deep=False)``: comparten
+los buffers del conjunto registrado, pero cualquier modificación (asignar una
+columna, cambiar un valor) copia sólo lo que cambia en la vista de esa
+sesión. Copy-on-write es el comportamiento de pandas 3; en pandas 2 cada app
+lo activa explícitamente al arrancar, como ``al_cargar`` de su pandas
+perezoso:
+
+    pd = modulo_perezoso('pandas', al_cargar=conjuntos.activar_copy_on_write)
+
+Si aun así no está activo (p. ej. un script que no lo activa), ``vista``
+entrega copias completas: más memoria, pero el conjunto compartido nunca se
+modifica.
+
+Cada conjunto registrado lleva un número de versión que cambia sólo cuando
+la función vuelve a ejecutarse (fallo de caché, TTL vencido o ``clear``).
+``funcion.version(...)``, con los mismos argumentos, lo devuelve sin recorrer
+los datos; sirve de clave para lo que se calcula a partir del conjunto (ver
+estadisticas.materializar).
+"""
+import functools
+import itertools
+
+import streamlit as st
+
+
+def _version_pandas(pd):
+    return int(pd.__version__.split('.')[0])
+
+
+def activar_copy_on_write(pd=None):
+    """
+    Activa copy-on-write de pandas en todo el proceso (en pandas 3 ya lo está).
+
+    Cambia la semántica de pandas para todos los módulos: se llama una sola
+    vez, al arrancar la app. Devuelve el módulo pandas.
+    """
+    if pd is None:
+        import pandas as pd
+    if _version_pandas(pd) < 3:
+        pd.set_option('mode.copy_on_write', True)
+    return pd
+
+
+def copy_on_write_activo():
+    """True si las modificaciones de una vista no alcanzan al objeto original."""
+    import pandas as pd
+
+    return _version_pandas(pd) >= 3 or pd.get_option('mode.copy_on_write') is True
+
+
+def vista(valor, sin_copia=None):
+    """
+    Vista de un conjunto compartido (DataFrame, Series, ndarray o dict/list/tuple de ellos).
+
+    Sin copia si copy-on-write está activo; si no, copia completa. Los arrays
+    de NumPy se entregan como vistas de solo lectura.
+    """
+    if sin_copia is None:
+        sin_copia = copy_on_write_activo()
+    if isinstance(valor, dict):
+        return {clave: vista(v, sin_copia) for clave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return type(valor)(vista(v, sin_copia) for v in valor)
+    if type(valor).__module__ == 'numpy' and type(valor).__name__ == 'ndarray':
+        resultado = valor.view()
+        resultado.flags.writeable = False
+        return resultado
+    if hasattr(valor, 'copy') and hasattr(valor, 'ndim'):
+        return valor.copy(deep=not sin_copia)
+    return valor
+
+
+_versiones = itertools.count(1)
+
+
+def compartido(ttl=None, max_entries=None):
+    """
+    Decorador: cachea el resultado una vez por proceso y devuelve vistas sin copia.
+
+    Acepta ``ttl`` y ``max_entries`` igual que ``st.cache_data``.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def con_version(*args, **kwargs):
+            return next(_versiones), funcion(*args, **kwargs)
+
+        en_cache = st.cache_resource(ttl=ttl, max_entries=max_entries)(con_version)
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            return vista(en_cache(*args, **kwargs)[1])
+
+        def version(*args, **kwargs):
+            """Versión del conjunto registrado para estos argumentos."""
+            return en_cache(*args, **kwargs)[0]
+
+        envoltura.clear = en_cache.clear
+        envoltura.version = version
+        return envoltura
+    return decorador
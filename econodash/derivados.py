@@ -0,0 +1,343 @@
+"""Motor de indicadores derivados (balanza comercial, PIB total, variaciones...).
+
+Cada indicador derivado de ``indicadores.DERIVADOS`` es una expresión sobre
+códigos de otros indicadores:
+
+    'NE.EXP.GNFS.ZS - NE.IMP.GNFS.ZS'      balanza comercial
+    'NY.GDP.PCAP.CD * SP.POP.TOTL'         PIB a partir del per cápita
+    'yoy(NY.GDP.PCAP.CD)'                  variación anual (%)
+    'cagr(NY.GDP.PCAP.CD, 5)'              crecimiento anual compuesto (%)
+
+Las expresiones se analizan con ``ast`` (sólo números, códigos, + - * / **
+y las funciones de FUNCIONES; nada se ejecuta con ``eval``) y se evalúan de
+una vez sobre matrices país x año alineadas, sin recorrer países.
+
+Las funciones miran hacia atrás (``yoy`` necesita el año anterior y
+``cagr(x, n)`` el de n años antes), así que cada serie base se pide desde
+los años antes del inicio de la ventana que necesitan las funciones que la
+leen (``retardos_bases``; 0 para las demás) y el resultado se recorta a la
+ventana. Uso desde una app:
+
+    retardos = derivados.retardos_bases(codigos)       # cada serie base una sola vez
+    datos = {c: descargar(c, anio_inicio - r, anio_fin) for c, r in retardos.items()}
+    datos.update(derivados.calcular(codigos, datos))   # sólo los derivados
+    datos = derivados.recortar(datos, anio_inicio, anio_fin)
+
+Los resultados se cachean por la versión (huella del contenido) de sus
+entradas: si ninguna serie base cambia, no se recalcula nada.
+"""
+import ast
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from exportacion import version_datos
+from importaciones import modulo_perezoso
+from indicadores import DERIVADOS
+
+np = modulo_perezoso('numpy')
+pd = modulo_perezoso('pandas')
+
+# Resultados derivados que se conservan en el proceso
+MAX_DERIVADOS = 128
+
+
+class ErrorExpresion(ValueError):
+    """Expresión de un indicador derivado no válida (sintaxis, función o dependencia circular)."""
+
+
+def _yoy(x):
+    """Variación porcentual respecto al año anterior."""
+    resultado = np.full(x.shape, np.nan)
+    resultado[:, 1:] = (x[:, 1:] / x[:, :-1] - 1) * 100
+    return resultado
+
+
+def _cagr(x, anios):
+    """Tasa de crecimiento anual compuesta (%) sobre ``anios`` años."""
+    anios = int(anios)
+    if anios < 1:
+        raise ErrorExpresion("cagr necesita al menos 1 año")
+    resultado = np.full(x.shape, np.nan)
+    if anios < x.shape[1]:
+        resultado[:, anios:] = ((x[:, anios:] / x[:, :-anios]) ** (1 / anios) - 1) * 100
+    return resultado
+
+
+FUNCIONES = {'yoy': _yoy, 'cagr': _cagr}
+
+# Años anteriores a cada resultado que lee cada función, según sus argumentos
+# (los numéricos llegan con su valor; las series, como None)
+RETARDOS = {
+    'yoy': lambda x: 1,
+    'cagr': lambda x, anios: int(anios),
+}
+
+_OPERADORES = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+    ast.Pow: lambda a, b: a ** b,
+}
+
+
+def _codigo(nodo):
+    """'NE.EXP.GNFS.ZS' se analiza como atributos encadenados; devuelve el código o None."""
+    partes = []
+    while isinstance(nodo, ast.Attribute):
+        partes.append(nodo.attr)
+        nodo = nodo.value
+    if not isinstance(nodo, ast.Name):
+        return None
+    partes.append(nodo.id)
+    return '.'.join(reversed(partes))
+
+
+def _validar(nodo, expresion):
+    """Sólo se admiten números, códigos, operadores aritméticos y llamadas a FUNCIONES."""
+    if isinstance(nodo, ast.Constant) and isinstance(nodo.value, (int, float)):
+        return
+    if isinstance(nodo, ast.BinOp) and type(nodo.op) in _OPERADORES:
+        _validar(nodo.left, expresion)
+        _validar(nodo.right, expresion)
+    elif isinstance(nodo, ast.UnaryOp) and isinstance(nodo.op, (ast.USub, ast.UAdd)):
+        _validar(nodo.operand, expresion)
+    elif isinstance(nodo, ast.Call):
+        if not isinstance(nodo.func, ast.Name) or nodo.func.id not in FUNCIONES or nodo.keywords:
+            raise ErrorExpresion(f"Función no permitida en {expresion!r} (disponibles: {', '.join(FUNCIONES)})")
+        for argumento in nodo.args:
+            _validar(argumento, expresion)
+    elif _codigo(nodo) is None:
+        raise ErrorExpresion(f"Elemento no permitido en {expresion!r}: {type(nodo).__name__}")
+
+
+@lru_cache(maxsize=256)
+def _compilar(expresion):
+    try:
+        arbol = ast.parse(expresion, mode='eval').body
+    except SyntaxError as e:
+        raise ErrorExpresion(f"Expresión no válida: {expresion!r} ({e.msg})") from None
+    _validar(arbol, expresion)
+    return arbol
+
+
+def _referencias(nodo, encontradas):
+    if isinstance(nodo, ast.Call):
+        for argumento in nodo.args:
+            _referencias(argumento, encontradas)
+    elif isinstance(nodo, ast.BinOp):
+        _referencias(nodo.left, encontradas)
+        _referencias(nodo.right, encontradas)
+    elif isinstance(nodo, ast.UnaryOp):
+        _referencias(nodo.operand, encontradas)
+    else:
+        codigo = _codigo(nodo)
+        if codigo is not None and codigo not in encontradas:
+            encontradas.append(codigo)
+    return encontradas
+
+
+def referencias(codigo, registro=DERIVADOS):
+    """Códigos que usa directamente la expresión de un derivado, en orden de aparición."""
+    return _referencias(_compilar(registro[codigo]['expresion']), [])
+
+
+def es_derivado(codigo, registro=DERIVADOS):
+    return codigo in registro
+
+
+def orden_de_calculo(codigos, registro=DERIVADOS):
+    """
+    Derivados necesarios para ``codigos`` (incluidos los intermedios), con sus dependencias primero.
+
+    Raises:
+        ErrorExpresion: Si hay una dependencia circular
+    """
+    orden, visitando = [], []
+
+    def visitar(codigo):
+        if codigo in orden or not es_derivado(codigo, registro):
+            return
+        if codigo in visitando:
+            raise ErrorExpresion(f"Dependencia circular: {' -> '.join(visitando + [codigo])}")
+        visitando.append(codigo)
+        for referencia in referencias(codigo, registro):
+            visitar(referencia)
+        visitando.pop()
+        orden.append(codigo)
+
+    for codigo in codigos:
+        visitar(codigo)
+    return orden
+
+
+def bases_necesarias(codigos, registro=DERIVADOS):
+    """
+    Indicadores base que hay que descargar para ``codigos``, cada uno una sola vez.
+
+    Conserva el orden: primero los base pedidos y luego las dependencias de los derivados.
+    """
+    bases = [c for c in codigos if not es_derivado(c, registro)]
+    for codigo in orden_de_calculo(codigos, registro):
+        bases.extend(r for r in referencias(codigo, registro) if not es_derivado(r, registro))
+    return list(dict.fromkeys(bases))
+
+
+def _retardos(nodo, registro, acumulado, visitando, resultado):
+    """Anota en ``resultado`` los años hacia atrás con que se lee cada base bajo ``nodo``."""
+    if isinstance(nodo, ast.Call):
+        constantes = [a.value if isinstance(a, ast.Constant) else None for a in nodo.args]
+        try:
+            propio = RETARDOS[nodo.func.id](*constantes)
+        except (TypeError, ValueError):
+            raise ErrorExpresion(f"{nodo.func.id}: los argumentos numéricos deben ser constantes") from None
+        for argumento in nodo.args:
+            _retardos(argumento, registro, acumulado + propio, visitando, resultado)
+    elif isinstance(nodo, ast.BinOp):
+        _retardos(nodo.left, registro, acumulado, visitando, resultado)
+        _retardos(nodo.right, registro, acumulado, visitando, resultado)
+    elif isinstance(nodo, ast.UnaryOp):
+        _retardos(nodo.operand, registro, acumulado, visitando, resultado)
+    else:
+        codigo = _codigo(nodo)
+        if codigo is None:
+            return
+        if not es_derivado(codigo, registro):
+            resultado[codigo] = max(resultado.get(codigo, 0), acumulado)
+            return
+        if codigo in visitando:
+            raise ErrorExpresion(f"Dependencia circular: {' -> '.join(visitando + [codigo])}")
+        _retardos(_compilar(registro[codigo]['expresion']), registro, acumulado, visitando + [codigo], resultado)
+
+
+def retardos_bases(codigos, registro=DERIVADOS):
+    """
+    Años antes del inicio de la ventana desde los que hay que descargar cada base de ``codigos``.
+
+    Devuelve {base: años} con las mismas bases y orden que ``bases_necesarias``;
+    sólo las que lee alguna función que mira hacia atrás tienen años > 0.
+    """
+    resultado = dict.fromkeys(bases_necesarias(codigos, registro), 0)
+    for codigo in codigos:
+        if es_derivado(codigo, registro):
+            _retardos(_compilar(registro[codigo]['expresion']), registro, 0, [codigo], resultado)
+    return resultado
+
+
+def retardo(codigo, registro=DERIVADOS):
+    """Años anteriores al primero calculado que necesita un derivado (0 para los base)."""
+    return max(retardos_bases([codigo], registro).values(), default=0)
+
+
+def recortar(datos, anio_inicio, anio_fin, col_anio='anio'):
+    """Las series de ``datos`` (dict código -> DataFrame) limitadas a los años de la ventana."""
+    return {
+        codigo: df[pd.to_numeric(df[col_anio], errors='coerce').between(anio_inicio, anio_fin)]
+        for codigo, df in datos.items()
+    }
+
+
+def _evaluar(nodo, matrices):
+    if isinstance(nodo, ast.Constant) and isinstance(nodo.value, (int, float)):
+        return nodo.value
+    if isinstance(nodo, ast.BinOp) and type(nodo.op) in _OPERADORES:
+        return _OPERADORES[type(nodo.op)](_evaluar(nodo.left, matrices), _evaluar(nodo.right, matrices))
+    if isinstance(nodo, ast.UnaryOp) and isinstance(nodo.op, (ast.USub, ast.UAdd)):
+        operando = _evaluar(nodo.operand, matrices)
+        return -operando if isinstance(nodo.op, ast.USub) else operando
+    if isinstance(nodo, ast.Call):
+        return FUNCIONES[nodo.func.id](*(_evaluar(a, matrices) for a in nodo.args))
+    return matrices[_codigo(nodo)]
+
+
+def _alinear(largos, columnas):
+    """
+    Matrices país x año alineadas (mismos países y rango continuo de años) a partir de DataFrames largos.
+
+    Returns:
+        tuple: (dict código -> ndarray, países, años)
+    """
+    col_pais, col_anio, col_valor = columnas
+    paises = pd.Index(sorted(set().union(*(df[col_pais].astype(str) for df in largos.values()))))
+    anios_df = {c: pd.to_numeric(df[col_anio], errors='coerce').to_numpy() for c, df in largos.items()}
+    anio_min = int(min(np.nanmin(a) for a in anios_df.values()))
+    anio_max = int(max(np.nanmax(a) for a in anios_df.values()))
+
+    matrices = {}
+    for codigo, df in largos.items():
+        matriz = np.full((len(paises), anio_max - anio_min + 1), np.nan)
+        anios = anios_df[codigo]
+        validos = ~np.isnan(anios)
+        filas = paises.get_indexer(df[col_pais].astype(str).to_numpy()[validos])
+        matriz[filas, anios[validos].astype(int) - anio_min] = pd.to_numeric(df[col_valor], errors='coerce').to_numpy()[validos]
+        matrices[codigo] = matriz
+    return matrices, paises, np.arange(anio_min, anio_max + 1)
+
+
+def evaluar(codigo, datos, columnas=('codigo_pais', 'anio', 'valor'), registro=DERIVADOS):
+    """
+    Evalúa un derivado con todas sus referencias ya presentes en ``datos``.
+
+    Returns:
+        DataFrame: Columnas ``columnas`` (país, año, valor), sin celdas vacías
+    """
+    col_pais, col_anio, col_valor = columnas
+    usadas = {r: datos[r] for r in referencias(codigo, registro) if datos.get(r) is not None and not datos[r].empty}
+    faltan = [r for r in referencias(codigo, registro) if r not in usadas]
+    if faltan or not usadas:
+        return pd.DataFrame(columns=list(columnas))
+
+    matrices, paises, anios = _alinear(usadas, columnas)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        resultado = np.asarray(_evaluar(_compilar(registro[codigo]['expresion']), matrices), dtype=float)
+    resultado = np.broadcast_to(resultado, (len(paises), len(anios)))
+    fila, columna = np.nonzero(np.isfinite(resultado))
+    return pd.DataFrame({
+        col_pais: paises.to_numpy()[fila],
+        col_anio: anios[columna],
+        col_valor: resultado[fila, columna],
+    })
+
+
+_resultados = OrderedDict()
+_lock = threading.Lock()
+
+
+def calcular(codigos, datos, columnas=('codigo_pais', 'anio', 'valor'), registro=DERIVADOS):
+    """
+    Calcula los derivados de ``codigos`` (y sus intermedios) a partir de las series de ``datos``.
+
+    Cada resultado se cachea con la versión de sus entradas: la huella del
+    contenido de cada serie base, o la clave del derivado intermedio.
+
+    Returns:
+        dict: código derivado -> DataFrame largo (sólo los pedidos en ``codigos``)
+    """
+    disponibles = dict(datos)
+    versiones = {}
+    for codigo in orden_de_calculo(codigos, registro):
+        entradas = []
+        for referencia in referencias(codigo, registro):
+            if referencia not in versiones:
+                df = disponibles.get(referencia)
+                serie = None if df is None else df[[c for c in columnas if c in df.columns]]
+                versiones[referencia] = version_datos({referencia: serie})
+            entradas.append((referencia, versiones[referencia]))
+        clave = (codigo, registro[codigo]['expresion'], tuple(columnas), tuple(entradas))
+        versiones[codigo] = hashlib.sha1(repr(clave).encode('utf-8')).hexdigest()
+
+        with _lock:
+            resultado = _resultados.get(clave)
+            if resultado is not None:
+                _resultados.move_to_end(clave)
+        if resultado is None:
+            resultado = evaluar(codigo, disponibles, columnas, registro)
+            with _lock:
+                _resultados[clave] = resultado
+                while len(_resultados) > MAX_DERIVADOS:
+                    _resultados.popitem(last=False)
+        disponibles[codigo] = resultado
+
+    return {codigo: disponibles[codigo] for codigo in codigos if es_derivado(codigo, registro)}
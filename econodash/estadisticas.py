@@ -0,0 +1,146 @@
+"""Estadísticas descriptivas materializadas por indicador y versión de datos.
+
+Los paneles de estadísticas recalculaban ``groupby(...).agg(...)`` y el
+promedio anual en cada rerun. ``materializar`` calcula una sola vez, para
+cada indicador y versión de sus datos:
+
+- una tabla por país con observaciones, media, mínimo, percentiles 25/50/75,
+  máximo, desviación estándar y primer y último año con dato;
+- una matriz país x año con los valores, para promedios de cualquier
+  selección de países sin volver a agrupar.
+
+La versión la da quien llama, sin recorrer los datos: la de la descarga en
+caché (``conjuntos.compartido``) más los parámetros que la transforman. Sin
+versión se calcula con ``exportacion.version_datos``, que sí lee todo el
+frame. Cualquier selección se resuelve después recortando esas tablas:
+
+    version = obtener_datos.version(paises, anio_inicio, anio_fin)
+    mat = estadisticas.materializar('PIB per cápita', df, 'Pais', 'Año', 'Valor', version)
+    mat.seleccion(['México', 'Chile'])           # filas de la tabla
+    mat.promedio_anual(['México', 'Chile'])      # Series año -> media
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from exportacion import version_datos
+from importaciones import modulo_perezoso
+
+np = modulo_perezoso('numpy')
+pd = modulo_perezoso('pandas')
+
+# Número máximo de indicadores/versiones materializados en el proceso
+MAX_MATERIALIZADOS = 64
+
+# Columnas de la tabla de estadísticas y su nombre para mostrar
+COLUMNAS = {
+    'n': 'Observaciones',
+    'media': 'Promedio',
+    'minimo': 'Mínimo',
+    'p25': 'P25',
+    'mediana': 'Mediana',
+    'p75': 'P75',
+    'maximo': 'Máximo',
+    'desv': 'Desv. Estándar',
+    'anio_inicial': 'Primer año',
+    'anio_final': 'Último año',
+}
+
+# Columnas con valores en la unidad del indicador (las que se formatean como tal)
+COLUMNAS_VALOR = ['media', 'minimo', 'p25', 'mediana', 'p75', 'maximo', 'desv']
+
+_materializados: "OrderedDict[tuple, Materializado]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def calcular_estadisticas(df: pd.DataFrame, col_grupo: str, col_anio: str, col_valor: str) -> pd.DataFrame:
+    """Tabla de estadísticas por grupo (país), con las columnas de COLUMNAS."""
+    validos = df[[col_grupo, col_anio, col_valor]].dropna(subset=[col_valor])
+    grupos = validos.groupby(col_grupo, sort=True)
+    tabla = grupos[col_valor].agg(n='count', media='mean', minimo='min', maximo='max', desv='std')
+    cuantiles = grupos[col_valor].quantile([0.25, 0.5, 0.75]).unstack()
+    tabla['p25'] = cuantiles[0.25]
+    tabla['mediana'] = cuantiles[0.5]
+    tabla['p75'] = cuantiles[0.75]
+    anios = grupos[col_anio].agg(['min', 'max'])
+    tabla['anio_inicial'] = anios['min']
+    tabla['anio_final'] = anios['max']
+    return tabla[list(COLUMNAS)]
+
+
+class Materializado:
+    """Estadísticas y matriz país x año de una versión de un indicador."""
+
+    def __init__(self, tabla: pd.DataFrame, matriz: pd.DataFrame):
+        self.tabla = tabla
+        self.matriz = matriz
+
+    def _filas(self, grupos: Optional[List[str]]):
+        if grupos is None:
+            return self.tabla.index
+        return self.tabla.index[self.tabla.index.isin(grupos)]
+
+    def seleccion(self, grupos: Optional[List[str]] = None, nombres: bool = False) -> pd.DataFrame:
+        """Filas de la tabla para ``grupos`` (todas si es None); con ``nombres``, columnas para mostrar."""
+        tabla = self.tabla.loc[self._filas(grupos)]
+        return tabla.rename(columns=COLUMNAS) if nombres else tabla
+
+    def promedio_anual(self, grupos: Optional[List[str]] = None) -> pd.Series:
+        """Media por año de los grupos seleccionados (sin contar los huecos)."""
+        matriz = self.matriz if grupos is None else self.matriz[self.matriz.index.isin(grupos)]
+        return matriz.mean(axis=0).dropna()
+
+
+def materializar(clave: str, df: pd.DataFrame, col_grupo: str, col_anio: str, col_valor: str,
+                 version=None) -> Materializado:
+    """
+    Estadísticas de ``df`` calculadas una vez por versión de datos.
+
+    Args:
+        clave: Indicador al que pertenecen los datos
+        df: Datos en formato largo (grupo, año, valor)
+        version: Identificador (hashable) de los datos de ``df``; si es None
+            se calcula con version_datos, recorriendo el frame completo
+    """
+    if version is None:
+        version = version_datos({clave: df[[col_grupo, col_anio, col_valor]]})
+    clave_cache = (clave, col_grupo, col_anio, col_valor, version)
+    with _lock:
+        materializado = _materializados.get(clave_cache)
+        if materializado is not None:
+            _materializados.move_to_end(clave_cache)
+            return materializado
+
+    materializado = Materializado(
+        calcular_estadisticas(df, col_grupo, col_anio, col_valor),
+        df.pivot_table(index=col_grupo, columns=col_anio, values=col_valor, aggfunc='mean')
+    )
+    with _lock:
+        _materializados[clave_cache] = materializado
+        while len(_materializados) > MAX_MATERIALIZADOS:
+            _materializados.popitem(last=False)
+    return materializado
+
+
+def comparar_con_promedios(tabla: pd.DataFrame, prefijo: str = 'Promedio ') -> pd.DataFrame:
+    """
+    Diferencia porcentual de la media de cada país frente a cada promedio.
+
+    Los promedios son las filas cuyo índice empieza por ``prefijo``. Devuelve
+    una tabla país x promedio (ordenada como un pivot) calculada de una vez
+    con operaciones de arrays.
+    """
+    es_promedio = tabla.index.str.startswith(prefijo)
+    paises, promedios = tabla.loc[~es_promedio, 'media'], tabla.loc[es_promedio, 'media']
+    base = promedios.to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diferencia = (paises.to_numpy(dtype=float)[:, None] - base[None, :]) / base[None, :] * 100
+    comparacion = pd.DataFrame(
+        np.round(diferencia, 2),
+        index=pd.Index(paises.index, name='País'),
+        columns=pd.Index(promedios.index.str.slice(len(prefijo)), name='Promedio')
+    )
+    return comparacion.sort_index().sort_index(axis=1)
+
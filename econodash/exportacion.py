@@ -0,0 +1,156 @@
+"""Exportación de los datos del panel a un libro Excel multi-hoja.
+
+El libro se escribe con xlsxwriter en modo ``constant_memory`` (fila a fila,
+sin mantener la hoja completa en memoria) en un único hilo de fondo, así que
+varias sesiones que piden los mismos datos esperan a la misma construcción.
+Los libros quedan en caché por versión de datos: mientras los datos no
+cambien, los reruns reutilizan el mismo archivo.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+
+from importaciones import modulo_perezoso
+
+np = modulo_perezoso('numpy')
+pd = modulo_perezoso('pandas')
+
+# Número máximo de libros que se mantienen en caché (uno por versión de datos)
+MAX_LIBROS_EN_CACHE = 8
+
+# Caracteres no permitidos por Excel en los nombres de hoja
+_CARACTERES_INVALIDOS_HOJA = str.maketrans({c: '_' for c in '[]:*?/\\'})
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='exportacion_excel')
+_libros: "OrderedDict[str, Future]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def version_datos(datos_por_indicador: Dict[str, pd.DataFrame]) -> str:
+    """Calcula una huella estable del contenido de los datos (cambia si cambian los datos)."""
+    huella = hashlib.sha1()
+    for codigo in sorted(datos_por_indicador):
+        df = datos_por_indicador[codigo]
+        huella.update(str(codigo).encode('utf-8'))
+        if df is None or df.empty:
+            continue
+        huella.update(','.join(map(str, df.columns)).encode('utf-8'))
+        huella.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return huella.hexdigest()
+
+
+def _nombre_hoja(nombre: str, usados: set) -> str:
+    """Devuelve un nombre de hoja válido (máx. 31 caracteres) y único dentro del libro."""
+    base = nombre.translate(_CARACTERES_INVALIDOS_HOJA).strip("'")[:31] or 'Hoja'
+    candidato, n = base, 2
+    while candidato.lower() in usados:
+        sufijo = f" ({n})"
+        candidato = base[:31 - len(sufijo)] + sufijo
+        n += 1
+    usados.add(candidato.lower())
+    return candidato
+
+
+def _tabla_pivote(df: pd.DataFrame) -> pd.DataFrame:
+    """Convierte los datos largos de un indicador en una tabla año x país."""
+    valor_col = 'valor' if 'valor' in df.columns else 'pib_per_capita_usd'
+    return df.pivot_table(index='anio', columns='pais', values=valor_col, aggfunc='first')
+
+
+def construir_libro_excel(datos_por_indicador: Dict[str, pd.DataFrame],
+                          indicadores: Dict[str, dict],
+                          version: Optional[str] = None) -> bytes:
+    """
+    Construye un libro Excel con una hoja por indicador y una hoja de metadatos.
+
+    Args:
+        datos_por_indicador: Diccionario código de indicador -> DataFrame en formato largo
+        indicadores: Metadatos de los indicadores (nombre, unidad, descripción)
+        version: Versión de los datos, se anota en la hoja de metadatos
+
+    Returns:
+        bytes: Contenido del archivo .xlsx
+    """
+    import xlsxwriter
+
+    salida = io.BytesIO()
+    libro = xlsxwriter.Workbook(salida, {'constant_memory': True})
+    formato_encabezado = libro.add_format({'bold': True, 'bg_color': '#DDEBF7'})
+    formato_numero = libro.add_format({'num_format': '#,##0.00'})
+
+    usados = set()
+    hoja_meta = libro.add_worksheet(_nombre_hoja('Metadatos', usados))
+    filas_meta = []
+
+    for codigo, df in datos_por_indicador.items():
+        if df is None or df.empty:
+            continue
+
+        info = indicadores.get(codigo, {})
+        nombre = info.get('nombre', codigo)
+        pivote = _tabla_pivote(df)
+        hoja = libro.add_worksheet(_nombre_hoja(nombre, usados))
+
+        # En modo constant_memory las filas deben escribirse en orden
+        hoja.write_row(0, 0, ['Año'] + [str(p) for p in pivote.columns], formato_encabezado)
+        hoja.set_column(1, len(pivote.columns), 14, formato_numero)
+
+        valores = pivote.to_numpy(dtype=float)
+        celdas = valores.astype(object)
+        celdas[np.isnan(valores)] = None  # Celdas vacías en lugar de errores #NUM!
+        for fila, (anio, datos_fila) in enumerate(zip(pivote.index, celdas), 1):
+            hoja.write_number(fila, 0, int(anio))
+            hoja.write_row(fila, 1, datos_fila.tolist())
+
+        filas_meta.append([
+            codigo,
+            nombre,
+            info.get('unidad', ''),
+            info.get('descripcion', ''),
+            len(pivote.columns),
+            int(pivote.index.min()) if len(pivote.index) else '',
+            int(pivote.index.max()) if len(pivote.index) else ''
+        ])
+
+    hoja_meta.write_row(0, 0, ['Código', 'Indicador', 'Unidad', 'Descripción',
+                               'Países', 'Año inicial', 'Año final'], formato_encabezado)
+    for fila, datos_fila in enumerate(filas_meta, 1):
+        hoja_meta.write_row(fila, 0, datos_fila)
+    fila = len(filas_meta) + 2
+    hoja_meta.write_row(fila, 0, ['Generado el', datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
+    if version:
+        hoja_meta.write_row(fila + 1, 0, ['Versión de datos', version])
+    hoja_meta.set_column(0, 0, 22)
+    hoja_meta.set_column(1, 3, 40)
+
+    libro.close()
+    return salida.getvalue()
+
+
+def solicitar_libro_excel(datos_por_indicador: Dict[str, pd.DataFrame],
+                          indicadores: Dict[str, dict],
+                          version: Optional[str] = None) -> Future:
+    """
+    Devuelve un Future con el libro Excel de los datos, generándolo en el hilo de fondo.
+
+    Si ya existe un libro (terminado o en curso) para la misma versión de datos
+    se reutiliza en lugar de volver a construirlo.
+    """
+    version = version or version_datos(datos_por_indicador)
+    with _lock:
+        futuro = _libros.get(version)
+        if futuro is not None and not (futuro.done() and futuro.exception() is not None):
+            _libros.move_to_end(version)
+            return futuro
+
+        futuro = _executor.submit(construir_libro_excel, datos_por_indicador, indicadores, version)
+        _libros[version] = futuro
+        while len(_libros) > MAX_LIBROS_EN_CACHE:
+            _libros.popitem(last=False)
+        return futuro
@@ -0,0 +1,100 @@
+"""Formato de los valores de un indicador según sus metadatos.
+
+Las tablas convertían cada celda en texto con ``.apply(lambda x: f"...")``:
+las columnas dejaban de ser numéricas y ``st.dataframe`` ya no podía
+ordenarlas por valor. Este módulo decide el formato a partir de
+``unidad`` y ``es_porcentaje`` y lo expresa en cada capa sin tocar los
+datos:
+
+- ``columna``/``formato_columna``: ``st.column_config.NumberColumn`` con
+  formato printf (las columnas siguen siendo numéricas);
+- ``formato_texto``: cadena para ``Styler.format`` o un valor suelto;
+- ``plantilla_hover``: formato d3 para los tooltips de plotly;
+- ``formatear_serie``: texto de muchos valores a la vez (anotaciones,
+  etiquetas), con operaciones de arrays en lugar de formatear uno a uno.
+"""
+from importaciones import modulo_perezoso
+
+np = modulo_perezoso('numpy')
+pd = modulo_perezoso('pandas')
+
+# Formato por tipo de valor: decimales, prefijo/sufijo del texto, formato
+# printf de st.column_config y plantilla d3 para plotly
+FORMATOS = {
+    'porcentaje': {'decimales': 2, 'prefijo': '', 'sufijo': '%', 'miles': False,
+                   'columna': '%.2f%%', 'hover': '%{{{campo}:.2f}}%'},
+    'moneda': {'decimales': 2, 'prefijo': '$', 'sufijo': '', 'miles': True,
+               'columna': '$%,.2f', 'hover': 'US$ %{{{campo}:,.2f}}'},
+    'personas': {'decimales': 0, 'prefijo': '', 'sufijo': '', 'miles': True,
+                 'columna': '%,.0f', 'hover': '%{{{campo}:,.0f}} personas'},
+    'numero': {'decimales': 2, 'prefijo': '', 'sufijo': '', 'miles': True,
+               'columna': '%,.2f', 'hover': '%{{{campo}:,.2f}}'},
+}
+
+
+def tipo_formato(info):
+    """
+    Tipo de formato ('porcentaje', 'moneda', 'personas' o 'numero') de un indicador.
+
+    Sin ``es_porcentaje`` en los metadatos, se deduce de la unidad ('%').
+    """
+    info = info or {}
+    unidad = info.get('unidad', '') or ''
+    if info.get('es_porcentaje', '%' in unidad):
+        return 'porcentaje'
+    if 'US$' in unidad or 'dólar' in unidad.lower():
+        return 'moneda'
+    if 'personas' in unidad.lower():
+        return 'personas'
+    return 'numero'
+
+
+def formato_columna(info):
+    """Formato printf para ``st.column_config.NumberColumn``."""
+    return FORMATOS[tipo_formato(info)]['columna']
+
+
+def columna(info, etiqueta=None):
+    """Columna numérica de ``st.dataframe`` con el formato del indicador."""
+    import streamlit as st
+
+    return st.column_config.NumberColumn(etiqueta, format=formato_columna(info))
+
+
+def formato_texto(info):
+    """Cadena de formato de Python (``Styler.format``, ``str.format``)."""
+    formato = FORMATOS[tipo_formato(info)]
+    miles = ',' if formato['miles'] else ''
+    return f"{formato['prefijo']}{{:{miles}.{formato['decimales']}f}}{formato['sufijo']}"
+
+
+def formatear_valor(valor, info):
+    """Texto de un único valor (métricas)."""
+    return formato_texto(info).format(valor)
+
+
+def plantilla_hover(info, campo='y'):
+    """Valor con formato d3 para un ``hovertemplate`` de plotly (p. ej. 'US$ %{y:,.2f}')."""
+    return FORMATOS[tipo_formato(info)]['hover'].format(campo=campo)
+
+
+def formatear_serie(valores, info):
+    """
+    Texto de muchos valores a la vez, igual que ``formatear_valor`` pero vectorizado.
+
+    Los valores que faltan quedan como cadena vacía. Conserva el índice si
+    ``valores`` es una Series.
+    """
+    formato = FORMATOS[tipo_formato(info)]
+    indice = valores.index if isinstance(valores, pd.Series) else None
+    numeros = np.asarray(valores, dtype=float)
+
+    if numeros.size == 0:
+        return pd.Series([], index=indice, dtype=object)
+
+    partes = pd.Series(np.char.mod(f"%.{formato['decimales']}f", numeros), index=indice).str.partition('.')
+    entero = partes[0]
+    if formato['miles']:
+        entero = entero.str.replace(r'(\d)(?=(\d{3})+$)', r'\1,', regex=True)
+    texto = formato['prefijo'] + entero + partes[1] + partes[2] + formato['sufijo']
+    return texto.where(~np.isnan(numeros), '')
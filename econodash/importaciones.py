@@ -0,0 +1,107 @@
+"""Importaciones diferidas para acelerar el arranque de las apps.
+
+pandas, plotly.express, world_bank_data y compañía tardan casi un segundo
+en importarse, y kaleido, statsmodels o los motores de Excel sólo se
+necesitan en acciones concretas. Con ``modulo_perezoso`` el módulo se
+importa la primera vez que se accede a uno de sus atributos, no al cargar
+la app:
+
+    pd = modulo_perezoso('pandas')
+    pd.DataFrame(...)   # aquí se importa pandas de verdad
+
+``tiempos_de_carga()`` indica qué módulos diferidos se han cargado ya y
+cuánto tardaron; perfil_arranque.py usa MODULOS_DIFERIDOS para comprobar
+que ninguno se cuela en el arranque.
+"""
+import importlib
+import sys
+import threading
+import time
+
+# Módulos que no deben importarse al arrancar las apps
+MODULOS_DIFERIDOS = [
+    'pandas',
+    'plotly.express',
+    'world_bank_data',
+    'kaleido',
+    'statsmodels',
+    'xlsxwriter',
+    'IPython',
+]
+
+_tiempos = {}
+_lock = threading.Lock()
+
+
+class ModuloPerezoso:
+    """Sustituto de un módulo que lo importa en el primer acceso a un atributo."""
+
+    def __init__(self, nombre, al_cargar=None):
+        self._nombre = nombre
+        self._modulo = None
+        self._al_cargar = al_cargar
+
+    def _cargar(self):
+        if self._modulo is None:
+            with _lock:
+                if self._modulo is None:
+                    inicio = time.perf_counter()
+                    ya_cargado = self._nombre in sys.modules
+                    modulo = importlib.import_module(self._nombre)
+                    if not ya_cargado:
+                        _tiempos[self._nombre] = time.perf_counter() - inicio
+                    if self._al_cargar is not None:
+                        self._al_cargar(modulo)
+                    self._modulo = modulo
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargar(), atributo)
+
+    def __repr__(self):
+        estado = 'cargado' if self._modulo is not None else 'sin cargar'
+        return f"<módulo perezoso {self._nombre!r} ({estado})>"
+
+
+def modulo_perezoso(nombre, al_cargar=None):
+    """
+    Devuelve un sustituto de ``nombre`` que se importa al usarse por primera vez.
+
+    ``al_cargar`` (opcional) recibe el módulo justo después de importarlo.
+    """
+    if nombre in sys.modules:
+        if al_cargar is not None:
+            al_cargar(sys.modules[nombre])
+        return sys.modules[nombre]
+    return ModuloPerezoso(nombre, al_cargar)
+
+
+def tiempos_de_carga():
+    """Segundos que tardó cada módulo diferido en importarse (sólo los ya cargados)."""
+    return dict(_tiempos)
+
+
+_exportacion_estatica_configurada = False
+
+
+def configurar_exportacion_estatica():
+    """
+    Prepara plotly.io/kaleido para exportar imágenes estáticas.
+
+    Ajustes necesarios en Streamlit Cloud (sin MathJax ni argumentos de
+    Chromium). Se llama justo antes de exportar una imagen (ver
+    src/panel_interactivo.py), para no cargar kaleido ni los renderizadores
+    de plotly al arrancar.
+    """
+    global _exportacion_estatica_configurada
+    if _exportacion_estatica_configurada:
+        return
+    import plotly.io as pio
+    pio.renderers.default = "browser"
+    if hasattr(pio, 'defaults'):
+        # plotly >= 6.1 (kaleido 1.x): los ajustes están en pio.defaults
+        pio.defaults.mathjax = None
+    elif getattr(pio.kaleido, 'scope', None) is not None:
+        pio.kaleido.scope.mathjax = None
+        pio.kaleido.scope.chromium_args = ()
+    _exportacion_estatica_configurada = True
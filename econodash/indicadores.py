@@ -0,0 +1,127 @@
+"""Catálogo de indicadores del Banco Mundial usado por EconoDash.
+
+Se comparte entre app.py y los scripts de src/ (que no pueden importar
+app.py porque configura la página de Streamlit al importarse).
+"""
+
+# Definición de indicadores
+INDICADORES = {
+    'NY.GDP.PCAP.CD': {
+        'nombre': 'PIB per cápita',
+        'unidad': 'US$',
+        'es_porcentaje': False,
+        'descripcion': 'Producto Interno Bruto per cápita en dólares estadounidenses actuales. Mide el valor económico por persona y es un indicador clave del nivel de vida.'
+    },
+    'NY.GDP.MKTP.KD.ZG': {
+        'nombre': 'Crecimiento del PIB',
+        'unidad': '%',
+        'es_porcentaje': True,
+        'descripcion': 'Tasa de crecimiento anual del PIB basada en moneda local a precios constantes. Indica la velocidad de crecimiento económico de un país.'
+    },
+    'FP.CPI.TOTL.ZG': {
+        'nombre': 'Inflación anual',
+        'unidad': '%',
+        'es_porcentaje': True,
+        'descripcion': 'Tasa de inflación porcentual anual basada en el índice de precios al consumidor. Mide la variación porcentual en el costo de vida.'
+    },
+    'SL.UEM.TOTL.ZS': {
+        'nombre': 'Tasa de desempleo',
+        'unidad': '%',
+        'es_porcentaje': True,
+        'descripcion': 'Porcentaje de la población activa que no tiene empleo pero busca trabajo y está disponible para trabajar.'
+    },
+    'GC.DOD.TOTL.GD.ZS': {
+        'nombre': 'Deuda Pública',
+        'unidad': '% del PIB',
+        'es_porcentaje': True,
+        'descripcion': 'Deuda bruta del gobierno general como porcentaje del PIB.'
+    },
+    'NE.EXP.GNFS.ZS': {
+        'nombre': 'Exportaciones',
+        'unidad': '% del PIB',
+        'es_porcentaje': True,
+        'descripcion': 'Exportaciones de bienes y servicios como porcentaje del PIB.'
+    },
+    'NE.IMP.GNFS.ZS': {
+        'nombre': 'Importaciones',
+        'unidad': '% del PIB',
+        'es_porcentaje': True,
+        'descripcion': 'Importaciones de bienes y servicios como porcentaje del PIB.'
+    },
+    'BX.KLT.DINV.WD.GD.ZS': {
+        'nombre': 'Inversión Extranjera Directa',
+        'unidad': '% del PIB',
+        'es_porcentaje': True,
+        'descripcion': 'Entradas netas de IED como porcentaje del PIB.'
+    },
+    'SE.XPD.TOTL.GD.ZS': {
+        'nombre': 'Gasto en Educación',
+        'unidad': '% del PIB',
+        'es_porcentaje': True,
+        'descripcion': 'Gasto público total en educación como porcentaje del PIB.'
+    },
+    'SH.XPD.CHEX.GD.ZS': {
+        'nombre': 'Gasto en Salud',
+        'unidad': '% del PIB',
+        'es_porcentaje': True,
+        'descripcion': 'Gasto en salud como porcentaje del PIB.'
+    },
+    'SP.DYN.LE00.IN': {
+        'nombre': 'Esperanza de Vida',
+        'unidad': 'años',
+        'es_porcentaje': False,
+        'descripcion': 'Esperanza de vida al nacer, en años.'
+    },
+    'SP.POP.TOTL': {
+        'nombre': 'Población Total',
+        'unidad': 'personas',
+        'es_porcentaje': False,
+        'descripcion': 'Población total medida por residencia.'
+    },
+    'SI.POV.GINI': {
+        'nombre': 'Coeficiente de Gini',
+        'unidad': 'índice',
+        'es_porcentaje': False,
+        'descripcion': 'Índice de desigualdad del ingreso.'
+    },
+    'NY.GDP.PCAP.PP.CD': {
+        'nombre': 'PIB per cápita (PPA)',
+        'unidad': 'US$',
+        'es_porcentaje': False,
+        'descripcion': 'PIB per cápita ajustado por PPP.'
+    }
+}
+
+# Indicadores derivados: se calculan a partir de los de arriba (ver derivados.py).
+# La expresión usa códigos de indicadores (base o derivados), números,
+# + - * / ** y las funciones yoy(x) y cagr(x, años).
+DERIVADOS = {
+    'DER.BALANZA.ZS': {
+        'nombre': 'Balanza comercial',
+        'unidad': '% del PIB',
+        'es_porcentaje': True,
+        'descripcion': 'Exportaciones menos importaciones de bienes y servicios, como porcentaje del PIB.',
+        'expresion': 'NE.EXP.GNFS.ZS - NE.IMP.GNFS.ZS'
+    },
+    'DER.PIB.CD': {
+        'nombre': 'PIB (per cápita x población)',
+        'unidad': 'US$',
+        'es_porcentaje': False,
+        'descripcion': 'Nivel del PIB en dólares actuales, calculado como PIB per cápita por población total.',
+        'expresion': 'NY.GDP.PCAP.CD * SP.POP.TOTL'
+    },
+    'DER.PIB.PCAP.YOY': {
+        'nombre': 'Variación anual del PIB per cápita',
+        'unidad': '%',
+        'es_porcentaje': True,
+        'descripcion': 'Variación porcentual del PIB per cápita (US$ actuales) respecto al año anterior.',
+        'expresion': 'yoy(NY.GDP.PCAP.CD)'
+    },
+    'DER.PIB.PCAP.CAGR5': {
+        'nombre': 'Crecimiento compuesto del PIB per cápita (5 años)',
+        'unidad': '%',
+        'es_porcentaje': True,
+        'descripcion': 'Tasa de crecimiento anual compuesta del PIB per cápita en los últimos 5 años.',
+        'expresion': 'cagr(NY.GDP.PCAP.CD, 5)'
+    }
+}
@@ -0,0 +1,220 @@
+"""Instantáneas masivas de indicadores en NumPy memmap, sin parsear CSV.
+
+Una instantánea es una carpeta con dos archivos:
+
+    valores.npy   Cubo float64 indicador x país x año (NaN donde no hay dato)
+    indice.json   Índice lateral: indicadores, países, años y forma del cubo
+
+Al abrirla, ``valores.npy`` se mapea en memoria (``np.load(mmap_mode='r')``):
+no se lee ni se infiere ningún tipo, el tiempo de apertura no depende del
+tamaño del archivo y todos los procesos de la máquina comparten las mismas
+páginas. Un país o un año se localizan con el índice lateral y se recortan
+como vistas del cubo:
+
+    inst = abrir_instantanea('datos_economicos_completos')
+    inst.valores('NY.GDP.PCAP.CD', paises=['Mexico'], anio_inicio=2015)
+    inst.a_dataframe('NY.GDP.PCAP.CD')    # Pais, Año, Valor (formato de los paneles)
+
+Para convertir un CSV largo (Pais, Año, Valor) ya existente:
+
+    python instantaneas.py datos_economicos_completos.csv [--indicador NY.GDP.PCAP.CD]
+"""
+import argparse
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ARCHIVO_VALORES = 'valores.npy'
+ARCHIVO_INDICE = 'indice.json'
+VERSION_FORMATO = 1
+
+_abiertas = {}
+_lock = threading.Lock()
+
+
+def _reemplazar_atomico(ruta, escribir):
+    ruta_tmp = os.path.join(os.path.dirname(ruta), f".{os.path.basename(ruta)}.{os.getpid()}.tmp")
+    try:
+        escribir(ruta_tmp)
+        os.replace(ruta_tmp, ruta)
+    finally:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+
+
+def construir_cubo(datos_por_indicador, columnas=('Pais', 'Año', 'Valor')):
+    """
+    Convierte DataFrames largos (uno por indicador) en un cubo indicador x país x año.
+
+    Los años se guardan como un rango continuo, de modo que la columna de un
+    año es ``anio - anio_inicial``.
+
+    Returns:
+        tuple: (cubo, indice) listos para ``escribir_instantanea``
+    """
+    col_pais, col_anio, col_valor = columnas
+    datos_por_indicador = {k: v for k, v in datos_por_indicador.items() if v is not None and not v.empty}
+    if not datos_por_indicador:
+        raise ValueError("No hay datos para construir la instantánea")
+
+    anios_por_df = {k: pd.to_numeric(df[col_anio], errors='coerce') for k, df in datos_por_indicador.items()}
+    anio_min = int(min(a.min() for a in anios_por_df.values()))
+    anio_max = int(max(a.max() for a in anios_por_df.values()))
+    paises = sorted(set().union(*(df[col_pais].dropna().astype(str) for df in datos_por_indicador.values())))
+    indicadores = list(datos_por_indicador)
+
+    cubo = np.full((len(indicadores), len(paises), anio_max - anio_min + 1), np.nan)
+    posicion_pais = pd.Index(paises)
+    for i, (indicador, df) in enumerate(datos_por_indicador.items()):
+        anios = anios_por_df[indicador]
+        validos = df[col_pais].notna() & anios.notna()
+        filas = posicion_pais.get_indexer(df.loc[validos, col_pais].astype(str))
+        columnas_cubo = anios[validos].astype(int).to_numpy() - anio_min
+        cubo[i, filas, columnas_cubo] = pd.to_numeric(df.loc[validos, col_valor], errors='coerce').to_numpy()
+
+    indice = {
+        'version': VERSION_FORMATO,
+        'creado': datetime.now().isoformat(timespec='seconds'),
+        'indicadores': indicadores,
+        'paises': paises,
+        'anio_inicial': anio_min,
+        'anio_final': anio_max,
+        'forma': list(cubo.shape),
+    }
+    return cubo, indice
+
+
+def escribir_instantanea(ruta, datos_por_indicador, columnas=('Pais', 'Año', 'Valor'), metadatos=None):
+    """
+    Escribe una instantánea en la carpeta ``ruta``.
+
+    Los valores se escriben antes que el índice y ambos se sustituyen de forma
+    atómica; quien ya tuviera abierta la versión anterior la sigue leyendo.
+    """
+    cubo, indice = construir_cubo(datos_por_indicador, columnas)
+    if metadatos:
+        indice['metadatos'] = metadatos
+    os.makedirs(ruta, exist_ok=True)
+
+    def escribir_valores(ruta_tmp):
+        with open(ruta_tmp, 'wb') as f:
+            np.save(f, cubo, allow_pickle=False)
+
+    def escribir_indice(ruta_tmp):
+        with open(ruta_tmp, 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False)
+
+    _reemplazar_atomico(os.path.join(ruta, ARCHIVO_VALORES), escribir_valores)
+    _reemplazar_atomico(os.path.join(ruta, ARCHIVO_INDICE), escribir_indice)
+    return ruta
+
+
+class Instantanea:
+    """Instantánea abierta: cubo mapeado en memoria más su índice lateral."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        for _ in range(2):
+            with open(os.path.join(ruta, ARCHIVO_INDICE), encoding='utf-8') as f:
+                indice = json.load(f)
+            cubo = np.load(os.path.join(ruta, ARCHIVO_VALORES), mmap_mode='r', allow_pickle=False)
+            # Si otro proceso estaba reescribiendo la instantánea, volver a leer
+            if list(cubo.shape) == indice['forma']:
+                break
+        else:
+            raise ValueError(f"Instantánea inconsistente en {ruta}")
+
+        self.cubo = cubo
+        self.indice = indice
+        self.indicadores = indice['indicadores']
+        self.paises = indice['paises']
+        self.anio_inicial = indice['anio_inicial']
+        self.anios = np.arange(indice['anio_inicial'], indice['anio_final'] + 1)
+        self._pos_indicador = {codigo: i for i, codigo in enumerate(self.indicadores)}
+        self._pos_pais = {pais: i for i, pais in enumerate(self.paises)}
+
+    def _columnas(self, anio_inicio=None, anio_fin=None):
+        inicio = 0 if anio_inicio is None else max(0, int(anio_inicio) - self.anio_inicial)
+        fin = len(self.anios) if anio_fin is None else max(0, int(anio_fin) - self.anio_inicial + 1)
+        return slice(inicio, fin)
+
+    def _filas(self, paises):
+        if paises is None:
+            return slice(None)
+        return [self._pos_pais[p] for p in paises if p in self._pos_pais]
+
+    def valores(self, indicador, paises=None, anio_inicio=None, anio_fin=None):
+        """
+        Matriz país x año de un indicador.
+
+        Sin filtro de países el resultado es una vista del memmap (sin copia).
+        """
+        return self.cubo[self._pos_indicador[indicador], self._filas(paises), self._columnas(anio_inicio, anio_fin)]
+
+    def a_dataframe(self, indicador, paises=None, anio_inicio=None, anio_fin=None,
+                    columnas=('Pais', 'Año', 'Valor')):
+        """DataFrame largo (Pais, Año, Valor) sin celdas vacías, como los que usan los paneles."""
+        col_pais, col_anio, col_valor = columnas
+        rango = self._columnas(anio_inicio, anio_fin)
+        filas = self._filas(paises)
+        matriz = self.cubo[self._pos_indicador[indicador], filas, rango]
+        nombres = np.asarray(self.paises, dtype=object)[filas]
+        fila, columna = np.nonzero(~np.isnan(matriz))
+        return pd.DataFrame({
+            col_pais: nombres[fila],
+            col_anio: self.anios[rango][columna],
+            col_valor: np.asarray(matriz[fila, columna])
+        })
+
+    def a_diccionario(self, paises=None, anio_inicio=None, anio_fin=None):
+        """Todos los indicadores como {indicador: DataFrame largo}."""
+        return {ind: self.a_dataframe(ind, paises, anio_inicio, anio_fin) for ind in self.indicadores}
+
+
+def abrir_instantanea(ruta):
+    """
+    Abre (o reutiliza) la instantánea de ``ruta``.
+
+    Las aperturas se comparten dentro del proceso mientras el archivo de
+    valores no cambie.
+    """
+    ruta = os.path.abspath(ruta)
+    firma = os.stat(os.path.join(ruta, ARCHIVO_VALORES)).st_mtime_ns
+    with _lock:
+        abierta = _abiertas.get(ruta)
+        if abierta is None or abierta[0] != firma:
+            abierta = (firma, Instantanea(ruta))
+            _abiertas[ruta] = abierta
+        return abierta[1]
+
+
+def existe_instantanea(ruta):
+    return os.path.exists(os.path.join(ruta, ARCHIVO_INDICE)) and os.path.exists(os.path.join(ruta, ARCHIVO_VALORES))
+
+
+def convertir_csv(ruta_csv, ruta_destino=None, indicador=None):
+    """Convierte un CSV largo (Pais, Año, Valor[, Indicador]) en una instantánea."""
+    df = pd.read_csv(ruta_csv)
+    ruta_destino = ruta_destino or os.path.splitext(ruta_csv)[0]
+    if 'Indicador' in df.columns:
+        datos = {codigo: grupo for codigo, grupo in df.groupby('Indicador', sort=False)}
+    else:
+        datos = {indicador or os.path.splitext(os.path.basename(ruta_csv))[0]: df}
+    return escribir_instantanea(ruta_destino, datos, metadatos={'origen': os.path.basename(ruta_csv)})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convierte un CSV largo en una instantánea memmap")
+    parser.add_argument('csv')
+    parser.add_argument('--destino', help="Carpeta de la instantánea (por defecto, junto al CSV)")
+    parser.add_argument('--indicador', help="Código del indicador si el CSV no tiene columna Indicador")
+    args = parser.parse_args()
+
+    ruta = convertir_csv(args.csv, args.destino, args.indicador)
+    inst = abrir_instantanea(ruta)
+    print(f"Instantánea escrita en {ruta}: {len(inst.indicadores)} indicadores x "
+          f"{len(inst.paises)} países x {len(inst.anios)} años")
@@ -0,0 +1,162 @@
+"""Limitador de peticiones por host (token bucket) compartido entre hilos y procesos.
+
+Cada host tiene un cubo con capacidad ``rafaga`` que se rellena a ``tasa``
+fichas por segundo; cada petición consume una ficha y, si no quedan, espera
+a la siguiente. El estado del cubo vive en cache/limitador/<host>.json y se
+actualiza con un bloqueo de archivo, así que todos los procesos de la
+máquina (apps y scripts de src/) comparten el mismo límite.
+
+Frenado adaptativo: ante una respuesta 429 o 5xx, ``penalizar`` pausa el
+host (lo que indique Retry-After o una espera exponencial) y divide la tasa
+por un factor que se duplica con cada error; cada respuesta correcta lo va
+reduciendo hasta volver a la tasa configurada.
+
+Variables de entorno:
+    ECONODASH_API_TASA     Peticiones por segundo por host (por defecto 10)
+    ECONODASH_API_RAFAGA   Tamaño del cubo (por defecto 20)
+"""
+import json
+import os
+import threading
+import time
+
+import metricas
+from bloqueo_archivo import bloqueado
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LIMITADOR_DIR = os.path.join(BASE_DIR, 'cache', 'limitador')
+
+TASA_POR_DEFECTO = float(os.environ.get('ECONODASH_API_TASA', '10'))
+RAFAGA_POR_DEFECTO = float(os.environ.get('ECONODASH_API_RAFAGA', '20'))
+
+# Límites propios de algunos hosts: (peticiones por segundo, ráfaga)
+LIMITES_POR_HOST = {}
+
+# Frenado adaptativo: factor máximo de reducción de la tasa, cuánto se recupera
+# con cada respuesta correcta y pausa inicial tras un error
+FACTOR_MAXIMO = 32.0
+RECUPERACION = 0.9
+PAUSA_BASE = 1.0
+PAUSA_MAXIMA = 60.0
+
+ESPERA = metricas.REGISTRO.agregar(metricas.Histograma(
+    'econodash_limitador_espera_segundos', 'Tiempo de espera por una ficha del limitador.', ('host',),
+    cubetas=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)))
+FICHAS = metricas.REGISTRO.agregar(metricas.Indicador(
+    'econodash_limitador_fichas', 'Fichas disponibles en el cubo del host.', ('host',)))
+FACTOR = metricas.REGISTRO.agregar(metricas.Indicador(
+    'econodash_limitador_factor_frenado', 'Factor por el que se divide la tasa tras errores 429/5xx.', ('host',)))
+RESPUESTAS_LIMITADAS = metricas.REGISTRO.agregar(metricas.Contador(
+    'econodash_limitador_respuestas_limitadas_total', 'Respuestas 429/5xx que activaron el frenado.',
+    ('host', 'codigo')))
+
+_locks = {}
+_factor_visto = {}  # host -> último factor leído (evita escribir el estado en cada éxito)
+_lock = threading.Lock()
+
+
+def limites(host):
+    """(tasa, ráfaga) configuradas para ``host``."""
+    return LIMITES_POR_HOST.get(host, (TASA_POR_DEFECTO, RAFAGA_POR_DEFECTO))
+
+
+def _lock_host(host):
+    with _lock:
+        return _locks.setdefault(host, threading.Lock())
+
+
+def _actualizar(host, cambio):
+    """
+    Lee el estado del cubo de ``host``, le aplica ``cambio(estado, ahora)`` y lo guarda.
+
+    Se ejecuta con el lock del host en este proceso y el bloqueo del archivo
+    entre procesos. Devuelve lo que devuelva ``cambio``.
+    """
+    os.makedirs(LIMITADOR_DIR, exist_ok=True)
+    tasa, rafaga = limites(host)
+    with _lock_host(host), open(os.path.join(LIMITADOR_DIR, f"{host}.json"), 'a+') as archivo, \
+            bloqueado(archivo):
+        archivo.seek(0)
+        try:
+            estado = json.loads(archivo.read() or '{}')
+        except ValueError:
+            estado = {}
+        ahora = time.time()
+        estado.setdefault('fichas', rafaga)
+        estado.setdefault('actualizado', ahora)
+        estado.setdefault('factor', 1.0)
+        estado.setdefault('pausa_hasta', 0.0)
+
+        # Rellenar el cubo con la tasa efectiva (reducida por el frenado)
+        transcurrido = max(0.0, ahora - estado['actualizado'])
+        estado['fichas'] = min(rafaga, estado['fichas'] + transcurrido * tasa / estado['factor'])
+        estado['actualizado'] = ahora
+
+        resultado = cambio(estado, ahora, tasa / estado['factor'])
+
+        archivo.seek(0)
+        archivo.truncate()
+        archivo.write(json.dumps(estado))
+        archivo.flush()
+
+    _factor_visto[host] = estado['factor']
+    FICHAS.fijar(round(estado['fichas'], 3), host=host)
+    FACTOR.fijar(estado['factor'], host=host)
+    return resultado
+
+
+def _tomar_ficha(estado, ahora, tasa_efectiva):
+    """Consume una ficha si la hay; si no, devuelve cuántos segundos esperar."""
+    if ahora < estado['pausa_hasta']:
+        return estado['pausa_hasta'] - ahora
+    if estado['fichas'] >= 1:
+        estado['fichas'] -= 1
+        return 0.0
+    return (1 - estado['fichas']) / tasa_efectiva
+
+
+def adquirir(host):
+    """Espera hasta poder hacer una petición a ``host`` respetando su límite."""
+    inicio = time.perf_counter()
+    while True:
+        espera = _actualizar(host, _tomar_ficha)
+        if espera <= 0:
+            break
+        time.sleep(espera)
+    ESPERA.observar(time.perf_counter() - inicio, host=host)
+
+
+def penalizar(host, codigo, reintentar_tras=None):
+    """
+    Activa el frenado tras una respuesta 429/5xx.
+
+    Returns:
+        float: Segundos que el host queda en pausa
+    """
+    RESPUESTAS_LIMITADAS.inc(host=host, codigo=codigo)
+
+    def cambio(estado, ahora, _):
+        estado['factor'] = min(FACTOR_MAXIMO, estado['factor'] * 2)
+        pausa = reintentar_tras if reintentar_tras is not None else min(PAUSA_MAXIMA, PAUSA_BASE * estado['factor'])
+        estado['pausa_hasta'] = max(estado['pausa_hasta'], ahora + pausa)
+        estado['fichas'] = 0.0
+        return estado['pausa_hasta'] - ahora
+
+    return _actualizar(host, cambio)
+
+
+def registrar_exito(host):
+    """Una respuesta correcta reduce el frenado hacia la tasa configurada."""
+    if _factor_visto.get(host, 1.0) <= 1.0:
+        return
+
+    def cambio(estado, ahora, _):
+        if estado['factor'] > 1.0:
+            estado['factor'] = max(1.0, estado['factor'] * RECUPERACION)
+
+    _actualizar(host, cambio)
+
+
+def estado(host):
+    """Estado actual del cubo de ``host`` (fichas, factor, pausa)."""
+    return _actualizar(host, lambda estado, ahora, tasa: dict(estado, tasa_efectiva=tasa))
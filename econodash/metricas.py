@@ -0,0 +1,459 @@
+"""Métricas de servicio de las apps en formato de exposición de Prometheus.
+
+Al final de cada rerun medido (ver rendimiento.py) se vuelcan en contadores,
+indicadores e histogramas de proceso:
+
+    econodash_api_llamadas_total{app,indicador,resultado}   llamadas a wb.get_series
+    econodash_api_latencia_segundos{app,indicador}          latencia de cada llamada
+    econodash_cache_consultas_total{app,funcion,resultado}  aciertos/fallos de las funciones cacheadas
+    econodash_rerun_duracion_segundos{app}                  duración de los reruns
+    econodash_sesiones_activas{app}                         sesiones con actividad reciente
+    econodash_memoria_sesiones_bytes{app}                   suma del session_state de las sesiones activas
+    econodash_memoria_sesion_maxima_bytes{app}              session_state más grande entre las activas
+    econodash_proceso_memoria_bytes{app}                    memoria residente del proceso
+
+Exposición:
+    * Archivo: cache/metricas/<app>.prom (<app>-<réplica>.prom si se define
+      ECONODASH_METRICAS_REPLICA), reescrito como mucho cada
+      INTERVALO_ARCHIVO_S y borrado al salir el proceso, para que el textfile
+      collector de node_exporter no siga exportando series de procesos
+      muertos. Los <app>_<pid>.prom de versiones anteriores cuyo proceso ya no
+      existe se barren en la primera escritura.
+    * HTTP: si ECONODASH_METRICAS_PUERTO está definido, cada proceso sirve
+      GET /metrics en ese puerto, sólo en 127.0.0.1 salvo que
+      ECONODASH_METRICAS_HOST indique otra interfaz (p. ej. 0.0.0.0).
+
+La memoria de las sesiones se agrega por app (los identificadores de sesión
+de Streamlit nunca se exponen) y se mide como mucho cada INTERVALO_MEMORIA_S
+por sesión, porque recorrer el session_state completo no es gratis.
+
+Comprobación local (levanta el servidor en un puerto libre y lo consulta):
+
+    python metricas.py --comprobar
+"""
+import atexit
+import math
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICAS_DIR = os.path.join(BASE_DIR, 'cache', 'metricas')
+
+# Cubetas de los histogramas de latencia, en segundos
+CUBETAS_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Minutos sin reruns tras los que una sesión deja de contarse como activa
+SESION_INACTIVA_MIN = 30
+
+# Segundos mínimos entre dos escrituras del archivo de métricas
+INTERVALO_ARCHIVO_S = 15
+
+# Segundos mínimos entre dos mediciones del session_state de una misma sesión
+INTERVALO_MEMORIA_S = 60
+
+PUERTO = os.environ.get('ECONODASH_METRICAS_PUERTO')
+HOST = os.environ.get('ECONODASH_METRICAS_HOST', '127.0.0.1')
+REPLICA = os.environ.get('ECONODASH_METRICAS_REPLICA')
+
+# Archivos por PID que escribían las versiones anteriores (<app>_<pid>.prom)
+_ARCHIVO_POR_PID = re.compile(r'^.+_(\d+)\.prom$')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear(valor):
+    if math.isinf(valor):
+        return '+Inf' if valor > 0 else '-Inf'
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+def _etiquetas(nombres, valores, extra=()):
+    pares = list(zip(nombres, valores)) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{n}="{_escapar(v)}"' for n, v in pares) + '}'
+
+
+class Metrica:
+    """Base de las métricas: un valor por combinación de etiquetas."""
+
+    tipo = 'untyped'
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _clave(self, etiquetas):
+        return tuple(str(etiquetas.get(n, '')) for n in self.etiquetas)
+
+    def eliminar(self, **etiquetas):
+        with self._lock:
+            self._valores.pop(self._clave(etiquetas), None)
+
+    def muestras(self):
+        """Lista de (sufijo, etiquetas, valor) para la exposición."""
+        with self._lock:
+            return [('', clave, valor) for clave, valor in sorted(self._valores.items())]
+
+    def exponer(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        for sufijo, clave, valor, *extra in self.muestras():
+            etiquetas = _etiquetas(self.etiquetas, clave, extra[0] if extra else ())
+            lineas.append(f"{self.nombre}{sufijo}{etiquetas} {_formatear(valor)}")
+        return lineas
+
+
+class Contador(Metrica):
+    tipo = 'counter'
+
+    def inc(self, cantidad=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + cantidad
+
+
+class Indicador(Metrica):
+    tipo = 'gauge'
+
+    def fijar(self, valor, **etiquetas):
+        with self._lock:
+            self._valores[self._clave(etiquetas)] = valor
+
+
+class Histograma(Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), cubetas=CUBETAS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.cubetas = tuple(sorted(cubetas)) + (math.inf,)
+
+    def observar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            conteos, _, _ = estado = self._valores.setdefault(clave, [[0] * len(self.cubetas), 0.0, 0])
+            for i, limite in enumerate(self.cubetas):
+                if valor <= limite:
+                    conteos[i] += 1
+            estado[1] += valor
+            estado[2] += 1
+
+    def muestras(self):
+        with self._lock:
+            muestras = []
+            for clave, (conteos, suma, total) in sorted(self._valores.items()):
+                for limite, conteo in zip(self.cubetas, conteos):
+                    muestras.append(('_bucket', clave, conteo, [('le', _formatear(limite))]))
+                muestras.append(('_sum', clave, suma))
+                muestras.append(('_count', clave, total))
+            return muestras
+
+
+class RegistroMetricas:
+    """Conjunto de métricas de un proceso."""
+
+    def __init__(self):
+        self.metricas = []
+
+    def agregar(self, metrica):
+        self.metricas.append(metrica)
+        return metrica
+
+    def exponer(self):
+        """Texto en formato de exposición de Prometheus (versión 0.0.4)."""
+        _actualizar_indicadores_de_proceso()
+        lineas = []
+        for metrica in self.metricas:
+            lineas.extend(metrica.exponer())
+        return '\n'.join(lineas) + '\n'
+
+
+REGISTRO = RegistroMetricas()
+
+API_LLAMADAS = REGISTRO.agregar(Contador(
+    'econodash_api_llamadas_total', 'Llamadas a la API del Banco Mundial.',
+    ('app', 'indicador', 'resultado')))
+API_LATENCIA = REGISTRO.agregar(Histograma(
+    'econodash_api_latencia_segundos', 'Latencia de las llamadas a la API del Banco Mundial.',
+    ('app', 'indicador')))
+CACHE_CONSULTAS = REGISTRO.agregar(Contador(
+    'econodash_cache_consultas_total', 'Consultas a las funciones cacheadas (conjuntos.compartido).',
+    ('app', 'funcion', 'resultado')))
+RERUN_DURACION = REGISTRO.agregar(Histograma(
+    'econodash_rerun_duracion_segundos', 'Duración de cada rerun de la app.', ('app',)))
+SESIONES_ACTIVAS = REGISTRO.agregar(Indicador(
+    'econodash_sesiones_activas', f'Sesiones con algún rerun en los últimos {SESION_INACTIVA_MIN} minutos.',
+    ('app',)))
+MEMORIA_SESIONES = REGISTRO.agregar(Indicador(
+    'econodash_memoria_sesiones_bytes', 'Suma del tamaño aproximado del session_state de las sesiones activas.',
+    ('app',)))
+MEMORIA_SESION_MAXIMA = REGISTRO.agregar(Indicador(
+    'econodash_memoria_sesion_maxima_bytes', 'Tamaño aproximado del session_state más grande entre las sesiones activas.',
+    ('app',)))
+MEMORIA_PROCESO = REGISTRO.agregar(Indicador(
+    'econodash_proceso_memoria_bytes', 'Memoria residente del proceso.', ('app',)))
+
+_sesiones = {}  # (app, id de sesión) -> [instante del último rerun, instante de la última medición, bytes]
+_lock_sesiones = threading.Lock()
+_estado = {'ultimo_archivo': 0.0, 'servidor': None, 'app': None, 'archivo': None}
+
+
+def _memoria_residente():
+    """Memoria residente del proceso en bytes (0 si no se puede medir)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maximo if sys.platform == 'darwin' else maximo * 1024
+        except ImportError:
+            return 0
+
+
+def _actualizar_indicadores_de_proceso():
+    """Recalcula sesiones activas (y olvida las inactivas), su memoria agregada y la del proceso."""
+    limite = time.time() - SESION_INACTIVA_MIN * 60
+    activas, suma, maxima = {}, {}, {}
+    with _lock_sesiones:
+        for (app, sesion), (visto, _, memoria) in list(_sesiones.items()):
+            if visto < limite:
+                del _sesiones[(app, sesion)]
+                continue
+            activas[app] = activas.get(app, 0) + 1
+            suma[app] = suma.get(app, 0) + memoria
+            maxima[app] = max(maxima.get(app, 0), memoria)
+    for app in {clave[0] for clave in SESIONES_ACTIVAS._valores} | set(activas):
+        SESIONES_ACTIVAS.fijar(activas.get(app, 0), app=app)
+        MEMORIA_SESIONES.fijar(suma.get(app, 0), app=app)
+        MEMORIA_SESION_MAXIMA.fijar(maxima.get(app, 0), app=app)
+    MEMORIA_PROCESO.fijar(_memoria_residente(), app=_nombre_app())
+
+
+def toca_medir_memoria(app, sesion):
+    """True si la sesión no tiene una medición de memoria de los últimos INTERVALO_MEMORIA_S."""
+    with _lock_sesiones:
+        estado = _sesiones.get((app, sesion))
+    return estado is None or time.time() - estado[1] >= INTERVALO_MEMORIA_S
+
+
+def registrar_sesion(app, sesion, memoria_bytes=None):
+    """
+    Marca una sesión como activa y, si se pasa ``memoria_bytes``, anota el
+    tamaño de su estado (si no, se conserva la última medición).
+    """
+    ahora = time.time()
+    with _lock_sesiones:
+        estado = _sesiones.setdefault((app, sesion), [ahora, 0.0, 0])
+        estado[0] = ahora
+        if memoria_bytes is not None:
+            estado[1], estado[2] = ahora, memoria_bytes
+
+
+def registrar_rerun(registro):
+    """Vuelca en las métricas los tramos y contadores de un rerun (rendimiento.RegistroRerun)."""
+    app = registro.app
+    RERUN_DURACION.observar(registro.duracion_ms() / 1000, app=app)
+
+    for t in registro.recorrer():
+        if t.nombre == 'wb.get_series':
+            indicador = t.atributos.get('indicador', '')
+            resultado = 'error' if 'error' in t.atributos else 'ok'
+            API_LLAMADAS.inc(app=app, indicador=indicador, resultado=resultado)
+            API_LATENCIA.observar(t.duracion or 0, app=app, indicador=indicador)
+        elif 'cache' in t.atributos:
+            CACHE_CONSULTAS.inc(app=app, funcion=t.nombre, resultado=t.atributos['cache'])
+
+    exportar(app)
+
+
+def escribir_archivo(ruta):
+    """Escribe la exposición completa en ``ruta`` de forma atómica."""
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    ruta_tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        f.write(REGISTRO.exponer())
+    os.replace(ruta_tmp, ruta)
+    return ruta
+
+
+def _nombre_app(app=None):
+    """Nombre de la app del proceso: el indicado, el último exportado o el del script."""
+    if app:
+        _estado['app'] = app
+    return _estado['app'] or os.path.splitext(os.path.basename(sys.argv[0] or 'econodash'))[0]
+
+
+def _proceso_vivo(pid):
+    if os.name == 'nt':
+        # En Windows os.kill terminaría el proceso: se asume vivo y no se barre
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def barrer_archivos_huerfanos(directorio=METRICAS_DIR):
+    """Borra los <app>_<pid>.prom cuyo proceso ya no existe. Devuelve las rutas borradas."""
+    borrados = []
+    try:
+        nombres = os.listdir(directorio)
+    except OSError:
+        return borrados
+    for nombre in nombres:
+        coincidencia = _ARCHIVO_POR_PID.match(nombre)
+        if coincidencia and not _proceso_vivo(int(coincidencia.group(1))):
+            ruta = os.path.join(directorio, nombre)
+            try:
+                os.remove(ruta)
+                borrados.append(ruta)
+            except OSError:
+                pass
+    return borrados
+
+
+def ruta_archivo(app=None):
+    """Ruta estable del archivo de métricas de la app (y réplica, si la hay)."""
+    nombre = _nombre_app(app)
+    return os.path.join(METRICAS_DIR, f"{nombre}-{REPLICA}.prom" if REPLICA else f"{nombre}.prom")
+
+
+def _borrar_archivo():
+    ruta = _estado['archivo']
+    if ruta:
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+
+def exportar(app=None, forzar=False):
+    """Actualiza el archivo de métricas del proceso y arranca el servidor HTTP si procede."""
+    if PUERTO and _estado['servidor'] is None:
+        try:
+            iniciar_servidor(int(PUERTO), HOST)
+        except OSError:
+            # Otro proceso ya usa el puerto: seguimos sólo con el archivo
+            _estado['servidor'] = False
+
+    ahora = time.time()
+    if not forzar and ahora - _estado['ultimo_archivo'] < INTERVALO_ARCHIVO_S:
+        return None
+    _estado['ultimo_archivo'] = ahora
+    ruta = ruta_archivo(app)
+    if _estado['archivo'] is None:
+        barrer_archivos_huerfanos(os.path.dirname(ruta))
+        atexit.register(_borrar_archivo)
+    _estado['archivo'] = ruta
+    try:
+        return escribir_archivo(ruta)
+    except OSError:
+        return None
+
+
+class _ManejadorMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        cuerpo = REGISTRO.exponer().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def iniciar_servidor(puerto=0, host='127.0.0.1'):
+    """
+    Sirve GET /metrics en un hilo de fondo. Devuelve el servidor (puerto real en server_port).
+
+    Por defecto sólo escucha en la interfaz local; exponerlo en otras es opt-in.
+    """
+    servidor = ThreadingHTTPServer((host, puerto), _ManejadorMetricas)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name='servidor_metricas', daemon=True).start()
+    _estado['servidor'] = servidor
+    return servidor
+
+
+def analizar_exposicion(texto):
+    """
+    Analiza un texto de exposición y devuelve {(nombre, etiquetas): valor}.
+
+    Lanza ValueError si alguna línea no sigue el formato.
+    """
+    muestras = {}
+    tipos = {}
+    for linea in texto.splitlines():
+        if not linea or linea.startswith('# HELP'):
+            continue
+        if linea.startswith('# TYPE'):
+            _, _, nombre, tipo = linea.split(' ', 3)
+            tipos[nombre] = tipo
+            continue
+        serie, _, valor = linea.rpartition(' ')
+        nombre, _, etiquetas = serie.partition('{')
+        base = nombre
+        for sufijo in ('_bucket', '_sum', '_count'):
+            if nombre.endswith(sufijo) and nombre[:-len(sufijo)] in tipos:
+                base = nombre[:-len(sufijo)]
+        if base not in tipos:
+            raise ValueError(f"Muestra sin # TYPE: {linea}")
+        muestras[(nombre, etiquetas.rstrip('}'))] = float(valor)
+    return muestras
+
+
+def comprobar():
+    """Prueba de extremo a extremo: registra datos, levanta el servidor y lo consulta."""
+    from urllib.request import urlopen
+
+    API_LLAMADAS.inc(app='comprobacion', indicador='NY.GDP.PCAP.CD', resultado='ok')
+    API_LATENCIA.observar(0.3, app='comprobacion', indicador='NY.GDP.PCAP.CD')
+    CACHE_CONSULTAS.inc(app='comprobacion', funcion='obtener_datos_indicador', resultado='acierto')
+    registrar_sesion('comprobacion', 'sesion-de-prueba', 1024)
+
+    servidor = iniciar_servidor(0, '127.0.0.1')
+    try:
+        with urlopen(f"http://127.0.0.1:{servidor.server_port}/metrics", timeout=5) as respuesta:
+            tipo = respuesta.headers.get('Content-Type', '')
+            texto = respuesta.read().decode('utf-8')
+    finally:
+        servidor.shutdown()
+
+    muestras = analizar_exposicion(texto)
+    esperadas = [
+        ('econodash_api_llamadas_total', 'app="comprobacion",indicador="NY.GDP.PCAP.CD",resultado="ok"'),
+        ('econodash_api_latencia_segundos_bucket', 'app="comprobacion",indicador="NY.GDP.PCAP.CD",le="0.5"'),
+        ('econodash_sesiones_activas', 'app="comprobacion"'),
+    ]
+    faltan = [clave for clave in esperadas if muestras.get(clave) != 1.0]
+    if not tipo.startswith('text/plain') or faltan:
+        print(f"  [X] Exposición incorrecta (Content-Type: {tipo}); faltan: {faltan}")
+        return False
+    print(f"  [OK] {len(muestras)} muestras servidas en /metrics")
+    return True
+
+
+if __name__ == "__main__":
+    if '--comprobar' in sys.argv:
+        sys.exit(0 if comprobar() else 1)
+    print(REGISTRO.exponer(), end='')
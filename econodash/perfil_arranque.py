@@ -0,0 +1,127 @@
+"""Perfil y presupuesto de tiempo de arranque de las apps.
+
+Importa cada app en un proceso limpio con ``python -X importtime`` y
+muestra los paquetes que más tardan en cargarse. También comprueba dos
+cosas que se pueden usar en CI:
+
+* que el tiempo de importación (mediana de varias ejecuciones) no supere
+  el presupuesto de la app, y
+* que ninguno de los módulos de importaciones.MODULOS_DIFERIDOS se
+  importe al arrancar.
+
+Uso:
+    python perfil_arranque.py                    # app y simple_app
+    python perfil_arranque.py simple_app --repeticiones 5
+    python perfil_arranque.py --json perfil.json  # informe legible por máquinas
+
+Devuelve código de salida 1 si alguna comprobación falla.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from importaciones import MODULOS_DIFERIDOS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Presupuesto de importación por app, en milisegundos
+PRESUPUESTOS_MS = {
+    'app': 1200,
+    'simple_app': 1200,
+}
+
+
+def medir_importacion(modulo):
+    """
+    Importa un módulo en un proceso nuevo con -X importtime.
+
+    Returns:
+        dict: total_ms y tiempos acumulados (ms) de cada módulo importado
+    """
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {modulo}"],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {modulo}:\n{resultado.stderr[-2000:]}")
+
+    acumulados = {}
+    for linea in resultado.stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, propio, acumulado, nombre = [p.strip() for p in linea.replace('import time:', '|').split('|')]
+        acumulados[nombre] = int(acumulado) / 1000
+    return {'total_ms': acumulados.get(modulo, 0.0), 'modulos': acumulados}
+
+
+def perfilar(modulo, repeticiones=3, top=10):
+    """Mide varias veces la importación de una app y resume el resultado."""
+    mediciones = [medir_importacion(modulo) for _ in range(repeticiones)]
+    ultima = mediciones[-1]['modulos']
+
+    # Paquetes de primer nivel (sin submódulos) ordenados por tiempo acumulado
+    paquetes = {}
+    for nombre, ms in ultima.items():
+        raiz = nombre.split('.')[0]
+        if nombre == raiz and raiz != modulo:
+            paquetes[raiz] = ms
+
+    diferidos_cargados = [m for m in MODULOS_DIFERIDOS if m in ultima]
+    total = statistics.median(m['total_ms'] for m in mediciones)
+    presupuesto = PRESUPUESTOS_MS.get(modulo)
+
+    return {
+        'modulo': modulo,
+        'total_ms': round(total, 1),
+        'presupuesto_ms': presupuesto,
+        'dentro_de_presupuesto': presupuesto is None or total <= presupuesto,
+        'diferidos_cargados': diferidos_cargados,
+        'mas_lentos': sorted(paquetes.items(), key=lambda x: x[1], reverse=True)[:top]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de tiempo de arranque de EconoDash")
+    parser.add_argument('modulos', nargs='*', default=list(PRESUPUESTOS_MS),
+                        help="Módulos a perfilar (por defecto: app y simple_app)")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--json', help="Guardar el informe en este archivo JSON")
+    args = parser.parse_args()
+
+    informes = []
+    correcto = True
+    for modulo in args.modulos:
+        informe = perfilar(modulo, args.repeticiones, args.top)
+        informes.append(informe)
+
+        print(f"\n=== {modulo} ===")
+        print(f"Tiempo de importación (mediana de {args.repeticiones}): {informe['total_ms']:.1f} ms"
+              + (f" / presupuesto {informe['presupuesto_ms']} ms" if informe['presupuesto_ms'] else ""))
+        for nombre, ms in informe['mas_lentos']:
+            print(f"  {ms:9.1f} ms  {nombre}")
+
+        if not informe['dentro_de_presupuesto']:
+            print(f"  [X] Supera el presupuesto de arranque")
+            correcto = False
+        if informe['diferidos_cargados']:
+            print(f"  [X] Módulos que deberían cargarse en diferido: {', '.join(informe['diferidos_cargados'])}")
+            correcto = False
+        if informe['dentro_de_presupuesto'] and not informe['diferidos_cargados']:
+            print("  [OK] Dentro del presupuesto")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(informes, f, ensure_ascii=False, indent=2)
+
+    sys.exit(0 if correcto else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Rankings de países (top/bottom-N) sobre el almacén local.
+
+Responde a preguntas como «los 20 países con mayor PIB per cápita en 2022»
+o «dónde más subió la inflación» con todos los países del catálogo, sin
+pedir nada a la API: lee la partición del indicador en el almacén (ver
+almacen.py, que llena ``src/ingesta_masiva.py``) como matriz país x año y
+elige los N primeros con una ordenación parcial (``np.argpartition``), de
+modo que sólo se ordenan los N seleccionados y no los ~200 países.
+
+El ranking del último dato disponible (``anio=None``) sale del índice de
+últimos datos que la ingesta mantiene junto al almacén (``almacen.leer_ultimos``);
+sólo si el indicador no está en él se busca el último dato en la matriz.
+
+Los resultados se guardan por versión de la partición (fecha de escritura
+de sus valores): mientras no se vuelva a ingerir el indicador, repetir una
+consulta no recalcula nada.
+
+    rankings.ranking('NY.GDP.PCAP.CD', anio=2022, n=20)
+    rankings.variacion('FP.CPI.TOTL.ZG', anio=2023, n=10, orden='absolutos')
+
+Con ``metodo_relleno`` (ver relleno.py) los huecos de la matriz se rellenan
+antes de ordenar, de modo que entran países sin dato justo ese año; esas
+filas llevan ``imputado=True``.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from importaciones import modulo_perezoso
+
+almacen = modulo_perezoso('almacen')
+instantaneas = modulo_perezoso('instantaneas')
+np = modulo_perezoso('numpy')
+pd = modulo_perezoso('pandas')
+relleno = modulo_perezoso('relleno')
+
+# Criterios de orden: mayores valores primero, menores primero o (sólo
+# variaciones) mayores movimientos en valor absoluto
+ORDENES = ('mayores', 'menores', 'absolutos')
+
+# Rankings calculados que se conservan en el proceso
+MAX_RANKINGS = 256
+
+_rankings = OrderedDict()
+_lock = threading.Lock()
+
+
+def disponible(codigo, raiz=None):
+    """El indicador tiene partición en el almacén local."""
+    return almacen.existe_particion(codigo, raiz or almacen.ALMACEN_DIR)
+
+
+def version_particion(codigo, raiz=None):
+    """Versión de los datos de un indicador en el almacén (cambia con cada ingesta)."""
+    ruta = almacen.ruta_particion(codigo, raiz or almacen.ALMACEN_DIR)
+    return os.stat(os.path.join(ruta, instantaneas.ARCHIVO_VALORES)).st_mtime_ns
+
+
+def anios_disponibles(codigo, raiz=None):
+    """Años con al menos un dato en la partición del indicador."""
+    particion = almacen.abrir_particion(codigo, raiz or almacen.ALMACEN_DIR)
+    con_datos = ~np.isnan(particion.valores(codigo)).all(axis=0)
+    return particion.anios[con_datos].tolist()
+
+
+def seleccionar(valores, n, orden='mayores'):
+    """
+    Posiciones de los ``n`` primeros valores según ``orden``, ya ordenadas.
+
+    Los NaN se ignoran. Sólo se ordenan los ``n`` elegidos (ordenación parcial).
+    """
+    if orden not in ORDENES:
+        raise ValueError(f"Orden desconocido: {orden} (usa {', '.join(ORDENES)})")
+    validos = np.flatnonzero(~np.isnan(valores))
+    clave = np.asarray(valores, dtype=float)[validos]
+    if orden == 'mayores':
+        clave = -clave
+    elif orden == 'absolutos':
+        clave = -np.abs(clave)
+    n = min(int(n), len(clave))
+    if n <= 0:
+        return validos[:0]
+    if n < len(clave):
+        elegidos = np.argpartition(clave, n - 1)[:n]
+    else:
+        elegidos = np.arange(len(clave))
+    return validos[elegidos[np.argsort(clave[elegidos], kind='stable')]]
+
+
+def _en_cache(clave, calcular):
+    with _lock:
+        resultado = _rankings.get(clave)
+        if resultado is not None:
+            _rankings.move_to_end(clave)
+            return resultado
+    resultado = calcular()
+    with _lock:
+        _rankings[clave] = resultado
+        while len(_rankings) > MAX_RANKINGS:
+            _rankings.popitem(last=False)
+    return resultado
+
+
+def _ultimos(matriz, anios):
+    """Último valor no nulo de cada fila de ``matriz`` y su año (NaN si la fila está vacía)."""
+    con_dato = ~np.isnan(matriz)
+    columna = matriz.shape[1] - 1 - np.argmax(con_dato[:, ::-1], axis=1)
+    filas = np.arange(matriz.shape[0])
+    valores = np.where(con_dato.any(axis=1), matriz[filas, columna], np.nan)
+    return valores, anios[columna]
+
+
+def _matriz(particion, codigo, metodo_relleno, limite_relleno):
+    """Matriz país x año de la partición y máscara de celdas imputadas (todo False sin relleno)."""
+    matriz = particion.valores(codigo)
+    if metodo_relleno is None:
+        return matriz, np.zeros(matriz.shape, dtype=bool)
+    return relleno.rellenar_matriz(matriz, metodo_relleno, limite_relleno)
+
+
+def _tabla(paises, posiciones, columnas):
+    tabla = pd.DataFrame({'posicion': np.arange(1, len(posiciones) + 1),
+                          'codigo_pais': np.asarray(paises, dtype=object)[posiciones]})
+    for nombre, valores in columnas.items():
+        tabla[nombre] = np.asarray(valores)[posiciones]
+    return tabla
+
+
+def ranking(codigo, anio=None, n=20, orden='mayores', metodo_relleno=None, limite_relleno=None, raiz=None):
+    """
+    Los ``n`` países con mayor (o menor) valor del indicador.
+
+    Args:
+        codigo: Código del indicador en el almacén
+        anio: Año del ranking; None usa el último dato disponible de cada país
+        metodo_relleno, limite_relleno: Rellenar huecos antes de ordenar (ver relleno.py)
+
+    Returns:
+        DataFrame: posicion, codigo_pais, anio, valor, imputado
+    """
+    raiz = raiz or almacen.ALMACEN_DIR
+    clave = ('valor', codigo, raiz, version_particion(codigo, raiz), anio, int(n), orden,
+             metodo_relleno, limite_relleno)
+
+    def calcular():
+        if anio is None and metodo_relleno is None:
+            indice = almacen.leer_ultimos(raiz)
+            if indice.contiene(codigo):
+                ultimos = indice.consultar(codigo)
+                valores = ultimos['valor'].to_numpy(dtype=float)
+                posiciones = seleccionar(valores, n, orden)
+                return _tabla(ultimos['codigo_pais'].to_numpy(), posiciones, {
+                    'anio': ultimos['anio'].to_numpy(), 'valor': valores,
+                    'imputado': np.zeros(len(valores), dtype=bool),
+                })
+
+        particion = almacen.abrir_particion(codigo, raiz)
+        matriz, imputada = _matriz(particion, codigo, metodo_relleno, limite_relleno)
+        filas = np.arange(matriz.shape[0])
+        if anio is None:
+            valores, anios = _ultimos(matriz, particion.anios)
+            imputados = imputada[filas, np.searchsorted(particion.anios, anios)]
+        elif particion.anios[0] <= int(anio) <= particion.anios[-1]:
+            columna = int(anio) - particion.anio_inicial
+            valores, imputados = np.asarray(matriz[:, columna]), imputada[:, columna]
+            anios = np.full(len(valores), int(anio))
+        else:
+            valores, anios = np.full(matriz.shape[0], np.nan), np.full(matriz.shape[0], int(anio))
+            imputados = np.zeros(matriz.shape[0], dtype=bool)
+        posiciones = seleccionar(valores, n, orden)
+        return _tabla(particion.paises, posiciones, {'anio': anios, 'valor': valores, 'imputado': imputados})
+
+    return _en_cache(clave, calcular)
+
+
+def variacion(codigo, anio, n=20, orden='absolutos', relativa=False, metodo_relleno=None, limite_relleno=None,
+              raiz=None):
+    """
+    Los ``n`` países con mayor variación interanual del indicador (``anio`` frente a ``anio - 1``).
+
+    Args:
+        orden: 'mayores' (subidas), 'menores' (bajadas) o 'absolutos' (mayores movimientos)
+        relativa: Variación en % del valor anterior en lugar de en unidades del indicador
+        metodo_relleno, limite_relleno: Rellenar huecos antes de calcular (ver relleno.py)
+
+    Returns:
+        DataFrame: posicion, codigo_pais, anterior, valor, variacion, imputado
+    """
+    raiz = raiz or almacen.ALMACEN_DIR
+    clave = ('variacion', codigo, raiz, version_particion(codigo, raiz), int(anio), int(n), orden, relativa,
+             metodo_relleno, limite_relleno)
+
+    def calcular():
+        particion = almacen.abrir_particion(codigo, raiz)
+        matriz, imputada = _matriz(particion, codigo, metodo_relleno, limite_relleno)
+        columna = int(anio) - particion.anio_inicial
+        if columna < 1 or columna >= matriz.shape[1]:
+            anterior = actual = np.full(matriz.shape[0], np.nan)
+            imputados = np.zeros(matriz.shape[0], dtype=bool)
+        else:
+            anterior, actual = np.asarray(matriz[:, columna - 1]), np.asarray(matriz[:, columna])
+            imputados = imputada[:, columna - 1] | imputada[:, columna]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cambio = (actual - anterior) / np.abs(anterior) * 100 if relativa else actual - anterior
+        cambio = np.where(np.isfinite(cambio), cambio, np.nan)
+        posiciones = seleccionar(cambio, n, orden)
+        return _tabla(particion.paises, posiciones,
+                      {'anterior': anterior, 'valor': actual, 'variacion': cambio, 'imputado': imputados})
+
+    return _en_cache(clave, calcular)
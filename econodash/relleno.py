@@ -0,0 +1,114 @@
+"""Relleno de huecos en series país x año (interpolación lineal o último valor).
+
+Indicadores como el Gini o el gasto en educación sólo tienen dato algunos
+años. En vez de recorrer países, el relleno trabaja sobre la matriz país x
+año completa de un indicador: para cada celda se calculan a la vez, con
+acumulados de NumPy, la posición del dato anterior y la del siguiente, y de
+ahí sale el valor imputado.
+
+Métodos (METODOS):
+
+- ``'lineal'``: interpolación lineal entre el dato anterior y el siguiente
+  (sólo huecos interiores, no se extrapola);
+- ``'anterior'``: se repite el último dato disponible hacia delante.
+
+Con ``limite`` sólo se rellena hasta ese número de años: en ``'lineal'``,
+los huecos de como mucho ``limite`` años; en ``'anterior'``, hasta
+``limite`` años después del último dato. Las celdas imputadas se marcan
+(columna ``imputado``) para poder distinguirlas de los datos originales.
+
+    df = relleno.rellenar(df, 'Pais', 'Año', 'Valor', metodo='lineal', limite=3)
+"""
+from importaciones import modulo_perezoso
+
+np = modulo_perezoso('numpy')
+pd = modulo_perezoso('pandas')
+
+METODOS = {
+    'lineal': 'Interpolación lineal',
+    'anterior': 'Último valor disponible',
+}
+
+COLUMNA_IMPUTADO = 'imputado'
+
+
+def rellenar_matriz(matriz, metodo='lineal', limite=None):
+    """
+    Rellena los huecos (NaN) de cada fila de una matriz país x año.
+
+    Returns:
+        tuple: (matriz rellenada, máscara booleana de celdas imputadas)
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método de relleno desconocido: {metodo} (usa {', '.join(METODOS)})")
+    matriz = np.asarray(matriz, dtype=float)
+    filas, columnas = matriz.shape
+    con_dato = ~np.isnan(matriz)
+    posiciones = np.arange(columnas)
+
+    # Columna del último dato hasta cada celda (-1 si no hay ninguno antes)
+    anterior = np.maximum.accumulate(np.where(con_dato, posiciones, -1), axis=1)
+    tiene_anterior = anterior >= 0
+    fila_idx = np.arange(filas)[:, None]
+    valor_anterior = matriz[fila_idx, np.maximum(anterior, 0)]
+
+    if metodo == 'anterior':
+        rellenable = ~con_dato & tiene_anterior
+        if limite is not None:
+            rellenable &= posiciones - anterior <= limite
+        rellenada = np.where(rellenable, valor_anterior, matriz)
+        return rellenada, rellenable
+
+    # Columna del siguiente dato desde cada celda (= columnas si no hay ninguno después)
+    siguiente = np.minimum.accumulate(np.where(con_dato, posiciones, columnas)[:, ::-1], axis=1)[:, ::-1]
+    tiene_siguiente = siguiente < columnas
+    valor_siguiente = matriz[fila_idx, np.minimum(siguiente, columnas - 1)]
+
+    rellenable = ~con_dato & tiene_anterior & tiene_siguiente
+    if limite is not None:
+        rellenable &= siguiente - anterior - 1 <= limite
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraccion = (posiciones - anterior) / (siguiente - anterior)
+        interpolada = valor_anterior + (valor_siguiente - valor_anterior) * fraccion
+    rellenada = np.where(rellenable, interpolada, matriz)
+    return rellenada, rellenable
+
+
+def rellenar(df, col_grupo, col_anio, col_valor, metodo='lineal', limite=None, col_imputado=COLUMNA_IMPUTADO):
+    """
+    Rellena los huecos de un DataFrame largo (grupo, año, valor) de un indicador.
+
+    Los años se completan como rango continuo entre el primero y el último
+    con dato. Las demás columnas (nombre del indicador, código...) se copian
+    del primer registro de cada grupo.
+
+    Returns:
+        DataFrame: Filas originales más las imputadas, con la columna booleana ``col_imputado``
+    """
+    if df.empty:
+        return df.assign(**{col_imputado: pd.Series(dtype=bool)})
+
+    validos = df.dropna(subset=[col_grupo, col_anio])
+    grupos, codigos_grupo = np.unique(validos[col_grupo].to_numpy(), return_inverse=True)
+    anios = pd.to_numeric(validos[col_anio], errors='coerce').to_numpy().astype(int)
+    anio_min, anio_max = anios.min(), anios.max()
+
+    matriz = np.full((len(grupos), anio_max - anio_min + 1), np.nan)
+    matriz[codigos_grupo, anios - anio_min] = pd.to_numeric(validos[col_valor], errors='coerce').to_numpy()
+    rellenada, imputada = rellenar_matriz(matriz, metodo, limite)
+
+    fila, columna = np.nonzero(~np.isnan(rellenada))
+    resultado = pd.DataFrame({
+        col_grupo: grupos[fila],
+        col_anio: columna + anio_min,
+        col_valor: rellenada[fila, columna],
+        col_imputado: imputada[fila, columna],
+    })
+    if pd.api.types.is_numeric_dtype(validos[col_anio]):
+        resultado[col_anio] = resultado[col_anio].astype(validos[col_anio].dtype)
+
+    otras = [c for c in df.columns if c not in (col_grupo, col_anio, col_valor, col_imputado)]
+    if otras:
+        atributos = validos.drop_duplicates(col_grupo).set_index(col_grupo)[otras]
+        resultado = resultado.join(atributos, on=col_grupo)
+    return resultado[[*df.columns.drop(col_imputado, errors='ignore'), col_imputado]]
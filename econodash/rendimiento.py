@@ -0,0 +1,326 @@
+"""Medición de tiempos por etapa en cada rerun de las apps.
+
+API mínima de tramos (spans) anidados:
+
+    @rendimiento.rerun_medido('simple_app')      # un registro por rerun
+    def main(): ...
+
+    @rendimiento.medido()                         # tramo con el nombre de la función
+    def limpiar_datos(df): ...
+
+    with rendimiento.tramo('wb.get_series', indicador=codigo) as t:
+        datos = wb.get_series(...)
+        t.medir_carga(datos)                      # filas y bytes del resultado
+
+Para las funciones cacheadas (conjuntos.compartido) se cuentan aciertos y fallos de caché
+poniendo ``medido(cache=True)`` por encima del decorador de caché y
+``medido(FALLO_CACHE)`` por debajo: si el cuerpo no llega a ejecutarse, fue
+un acierto.
+
+Fuera de un rerun medido los tramos no registran nada, así que las
+funciones se pueden seguir llamando desde scripts y benchmarks. Cada rerun
+se muestra en el panel opcional "Rendimiento" de la barra lateral y se
+puede descargar como JSON lines; si la variable de entorno
+ECONODASH_RENDIMIENTO_JSONL apunta a un archivo, se añade ahí también.
+Además, cada rerun alimenta las métricas de servicio de metricas.py y deja
+un evento en el registro estructurado (bitacora.py) con su id como
+correlación; los tramos se registran como DEBUG muestreado.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import bitacora
+import metricas
+
+# Nombre del tramo que marca que una función cacheada se ejecutó de verdad
+FALLO_CACHE = 'fallo_cache'
+
+# Reruns que se conservan por sesión para exportarlos
+HISTORIAL_RERUNS = 20
+
+# Archivo opcional donde se añaden todos los reruns en formato JSON lines
+RUTA_JSONL = os.environ.get('ECONODASH_RENDIMIENTO_JSONL')
+
+_registro_actual = contextvars.ContextVar('registro_rendimiento', default=None)
+_lock_archivo = threading.Lock()
+_log = bitacora.obtener_logger('rendimiento')
+
+
+def tamano_bytes(objeto):
+    """Tamaño aproximado en memoria de un resultado (DataFrame, Series, dict, bytes...)."""
+    if objeto is None:
+        return 0
+    if hasattr(objeto, 'memory_usage'):
+        uso = objeto.memory_usage(deep=True)
+        return int(uso.sum() if hasattr(uso, 'sum') else uso)
+    if isinstance(objeto, (bytes, bytearray, str)):
+        return len(objeto)
+    if isinstance(objeto, dict):
+        return sum(tamano_bytes(valor) for valor in objeto.values())
+    if isinstance(objeto, (list, tuple)):
+        return sum(tamano_bytes(valor) for valor in objeto)
+    return 0
+
+
+class Tramo:
+    """Intervalo de tiempo con nombre, atributos y tramos hijos."""
+
+    __slots__ = ('nombre', 'atributos', 'inicio', 'duracion', 'hijos', 'profundidad')
+
+    def __init__(self, nombre, atributos, profundidad=0):
+        self.nombre = nombre
+        self.atributos = atributos
+        self.inicio = time.perf_counter()
+        self.duracion = None
+        self.hijos = []
+        self.profundidad = profundidad
+
+    def anotar(self, **atributos):
+        """Añade atributos al tramo (por ejemplo, el tamaño del resultado)."""
+        self.atributos.update(atributos)
+
+    def medir_carga(self, resultado):
+        """Anota filas y bytes de un resultado."""
+        if hasattr(resultado, '__len__'):
+            self.atributos['filas'] = sum(len(v) for v in resultado.values() if hasattr(v, '__len__')) \
+                if isinstance(resultado, dict) else len(resultado)
+        self.atributos['bytes'] = tamano_bytes(resultado)
+
+
+class _TramoInactivo:
+    """Tramo que no registra nada (se usa fuera de un rerun medido)."""
+
+    def anotar(self, **atributos):
+        pass
+
+    def medir_carga(self, resultado):
+        pass
+
+
+_TRAMO_INACTIVO = _TramoInactivo()
+
+
+class RegistroRerun:
+    """Tramos y contadores de un rerun de una app."""
+
+    def __init__(self, app):
+        self.app = app
+        self.id = uuid.uuid4().hex[:12]
+        self.fecha = datetime.now().isoformat(timespec='seconds')
+        self.inicio = time.perf_counter()
+        self.raices = []
+        self.pila = []
+        self.contadores = Counter()
+
+    def recorrer(self):
+        """Devuelve los tramos en orden de inicio (padres antes que hijos)."""
+        pendientes = list(reversed(self.raices))
+        while pendientes:
+            tramo_actual = pendientes.pop()
+            yield tramo_actual
+            pendientes.extend(reversed(tramo_actual.hijos))
+
+    def duracion_ms(self):
+        return sum((t.duracion or 0) for t in self.raices) * 1000
+
+    def a_jsonl(self):
+        """Serializa el rerun como JSON lines: una línea de resumen y una por tramo."""
+        lineas = [json.dumps({
+            'tipo': 'rerun',
+            'rerun': self.id,
+            'app': self.app,
+            'fecha': self.fecha,
+            'duracion_ms': round(self.duracion_ms(), 3),
+            'contadores': dict(self.contadores)
+        }, ensure_ascii=False)]
+        for t in self.recorrer():
+            lineas.append(json.dumps({
+                'tipo': 'tramo',
+                'rerun': self.id,
+                'nombre': t.nombre,
+                'profundidad': t.profundidad,
+                'inicio_ms': round((t.inicio - self.inicio) * 1000, 3),
+                'duracion_ms': round((t.duracion or 0) * 1000, 3),
+                **t.atributos
+            }, ensure_ascii=False, default=str))
+        return '\n'.join(lineas) + '\n'
+
+
+def registro_actual():
+    """Registro del rerun en curso (None fuera de un rerun medido)."""
+    return _registro_actual.get()
+
+
+def contar(nombre, cantidad=1):
+    """Incrementa un contador del rerun en curso."""
+    registro = _registro_actual.get()
+    if registro is not None:
+        registro.contadores[nombre] += cantidad
+
+
+@contextmanager
+def tramo(nombre, **atributos):
+    """Mide el bloque como un tramo hijo del tramo abierto actualmente."""
+    registro = _registro_actual.get()
+    if registro is None:
+        yield _TRAMO_INACTIVO
+        return
+
+    padre = registro.pila[-1] if registro.pila else None
+    actual = Tramo(nombre, atributos, len(registro.pila))
+    (padre.hijos if padre is not None else registro.raices).append(actual)
+    registro.pila.append(actual)
+    try:
+        yield actual
+    except Exception as e:
+        actual.atributos['error'] = type(e).__name__
+        raise
+    finally:
+        actual.duracion = time.perf_counter() - actual.inicio
+        registro.pila.pop()
+        if _log.isEnabledFor(logging.DEBUG) and bitacora.en_muestra(registro.id):
+            _log.debug(nombre, extra={
+                'tramo': nombre,
+                'profundidad': actual.profundidad,
+                'duracion_ms': round(actual.duracion * 1000, 3),
+                'atributos': actual.atributos
+            })
+
+
+def medido(nombre=None, cache=False, carga=False):
+    """
+    Decorador que mide cada llamada a la función como un tramo.
+
+    Args:
+        nombre: Nombre del tramo (por defecto, el de la función)
+        cache: Contar aciertos/fallos de la caché de Streamlit que decora la función
+        carga: Anotar filas y bytes del resultado
+    """
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if _registro_actual.get() is None:
+                return funcion(*args, **kwargs)
+            with tramo(etiqueta) as actual:
+                resultado = funcion(*args, **kwargs)
+                if cache:
+                    acierto = not any(h.nombre == FALLO_CACHE for h in actual.hijos)
+                    actual.anotar(cache='acierto' if acierto else 'fallo')
+                    contar('cache_aciertos' if acierto else 'cache_fallos')
+                    contar(f"{etiqueta}.{'aciertos' if acierto else 'fallos'}")
+                if carga:
+                    actual.medir_carga(resultado)
+                return resultado
+        return envoltura
+    return decorador
+
+
+def _guardar_jsonl(registro, ruta):
+    with _lock_archivo:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with open(ruta, 'a', encoding='utf-8') as f:
+            f.write(registro.a_jsonl())
+
+
+def _registrar_metricas(registro):
+    """Vuelca el rerun en las métricas del proceso, junto con la sesión que lo lanzó."""
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is not None:
+        memoria = None
+        if metricas.toca_medir_memoria(registro.app, ctx.session_id):
+            memoria = sum(tamano_bytes(valor) for valor in st.session_state.to_dict().values())
+        metricas.registrar_sesion(registro.app, ctx.session_id, memoria)
+    metricas.registrar_rerun(registro)
+
+
+def rerun_medido(app):
+    """
+    Decorador para el ``main`` de una app: abre un registro por rerun y, al
+    terminar, muestra el panel de rendimiento en la barra lateral.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            registro = RegistroRerun(app)
+            token = _registro_actual.set(registro)
+            completado = False
+            try:
+                with bitacora.correlacion(registro.id), tramo(funcion.__name__):
+                    resultado = funcion(*args, **kwargs)
+                completado = True
+                return resultado
+            except Exception:
+                completado = True
+                raise
+            finally:
+                _registro_actual.reset(token)
+                _registrar_metricas(registro)
+                with bitacora.correlacion(registro.id):
+                    _log.info('rerun', extra={
+                        'app': app,
+                        'duracion_ms': round(registro.duracion_ms(), 3),
+                        'completado': completado,
+                        'contadores': dict(registro.contadores)
+                    })
+                # st.rerun()/st.stop() interrumpen el script: no hay nada que mostrar
+                if completado:
+                    if RUTA_JSONL:
+                        _guardar_jsonl(registro, RUTA_JSONL)
+                    mostrar_panel_rendimiento(registro)
+        return envoltura
+    return decorador
+
+
+def mostrar_panel_rendimiento(registro):
+    """Panel opcional "Rendimiento" en la barra lateral con los tramos del rerun."""
+    import streamlit as st
+
+    historial = st.session_state.setdefault('_rendimiento_historial', deque(maxlen=HISTORIAL_RERUNS))
+    historial.append(registro)
+
+    if not st.sidebar.checkbox("⏱️ Mostrar rendimiento", value=False, key='_rendimiento_visible'):
+        return
+
+    with st.sidebar.expander("⏱️ Rendimiento", expanded=True):
+        total = registro.duracion_ms()
+        st.metric("Duración del rerun", f"{total:,.0f} ms")
+
+        aciertos = registro.contadores.get('cache_aciertos', 0)
+        fallos = registro.contadores.get('cache_fallos', 0)
+        if aciertos or fallos:
+            st.caption(f"Caché: {aciertos} aciertos, {fallos} fallos")
+
+        filas = []
+        for t in registro.recorrer():
+            duracion = (t.duracion or 0) * 1000
+            filas.append({
+                'Tramo': '· ' * t.profundidad + t.nombre,
+                'ms': round(duracion, 1),
+                '%': round(100 * duracion / total, 1) if total else 0.0,
+                'Filas': t.atributos.get('filas'),
+                'KB': round(t.atributos['bytes'] / 1024, 1) if 'bytes' in t.atributos else None,
+                'Caché': t.atributos.get('cache', '')
+            })
+        st.dataframe(filas, use_container_width=True, hide_index=True)
+
+        st.download_button(
+            label="📥 Exportar (JSON lines)",
+            data=''.join(r.a_jsonl() for r in historial).encode('utf-8'),
+            file_name=f"rendimiento_{registro.app}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+            mime='application/x-ndjson',
+            use_container_width=True
+        )
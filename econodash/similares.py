@@ -0,0 +1,185 @@
+"""Países similares: vecinos más cercanos sobre varios indicadores.
+
+Responde a «¿qué países se parecen a México en PIB per cápita, inflación y
+desempleo entre 2015 y 2020?» con todos los países del almacén local (ver
+almacen.py, que llena ``src/ingesta_masiva.py``), sin pedir nada a la API.
+
+Cada país se describe con un vector de rasgos: la media de cada indicador
+en el año o la ventana elegidos, estandarizada (z-score) sobre todo el
+catálogo para que ningún indicador domine por su escala. La distancia
+entre dos países es euclídea sobre los indicadores que ambos tienen,
+reescalada al número total de indicadores (como ``nan_euclidean`` de
+scikit-learn), y sólo se comparan países con al menos la mitad de los
+indicadores en común.
+
+Con ~200 países y unos pocos indicadores una consulta es una operación de
+arrays pequeña: se calculan a la vez las distancias a todos los países
+y se eligen los k primeros con una ordenación parcial
+(``rankings.seleccionar``). El índice se construye una vez por selección
+de indicadores, ventana y versión de las particiones, y se reutiliza hasta
+que se vuelve a ingerir alguno de ellos.
+
+    indice = similares.indice(['NY.GDP.PCAP.CD', 'FP.CPI.TOTL.ZG'], 2015, 2020)
+    indice.vecinos('MEX', k=10)                       # posicion, codigo_pais, distancia, comunes
+    indice.vecinos('MEX', k=5, candidatos=REGIONES['América del Sur'])
+"""
+import threading
+from collections import OrderedDict
+
+from importaciones import modulo_perezoso
+from rankings import disponible, seleccionar, version_particion
+
+almacen = modulo_perezoso('almacen')
+np = modulo_perezoso('numpy')
+pd = modulo_perezoso('pandas')
+
+# Índices (selección de indicadores x ventana) que se conservan en el proceso
+MAX_INDICES = 32
+
+
+class IndiceSimilitud:
+    """Rasgos estandarizados de todos los países para una selección de indicadores."""
+
+    def __init__(self, paises, valores, codigos):
+        """
+        Args:
+            paises: Códigos ISO3 de las filas
+            valores: Matriz país x indicador (media de la ventana, NaN si no hay dato)
+            codigos: Códigos de los indicadores de las columnas
+        """
+        self.paises = np.asarray(paises, dtype=object)
+        self.codigos = list(codigos)
+        self.valores = np.asarray(valores, dtype=float)
+        self.presentes = ~np.isnan(self.valores)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cuenta = self.presentes.sum(axis=0)
+            self.medias = np.where(cuenta > 0, np.nansum(self.valores, axis=0) / np.maximum(cuenta, 1), np.nan)
+            varianza = np.nansum((self.valores - self.medias) ** 2, axis=0) / np.maximum(cuenta, 1)
+        self.desviaciones = np.where(varianza > 0, np.sqrt(varianza), 1.0)
+        # Rasgos estandarizados; los huecos quedan a 0 y se excluyen con ``presentes``
+        self.rasgos = np.where(self.presentes, (self.valores - self.medias) / self.desviaciones, 0.0)
+        self._pos = {pais: i for i, pais in enumerate(self.paises)}
+
+    def __contains__(self, pais):
+        return pais in self._pos
+
+    def distancias(self, pais, minimo_comunes=None):
+        """
+        Distancia de ``pais`` a todos los países (NaN para él mismo y para los no comparables).
+
+        Returns:
+            tuple: (distancias, número de indicadores en común)
+        """
+        fila = self._pos[pais]
+        comunes_mask = self.presentes & self.presentes[fila]
+        comunes = comunes_mask.sum(axis=1)
+        diferencia = np.where(comunes_mask, self.rasgos - self.rasgos[fila], 0.0)
+        suma = np.einsum('ij,ij->i', diferencia, diferencia)
+
+        if minimo_comunes is None:
+            minimo_comunes = (len(self.codigos) + 1) // 2
+        comparables = comunes >= max(int(minimo_comunes), 1)
+        comparables[fila] = False
+        with np.errstate(invalid='ignore', divide='ignore'):
+            distancias = np.sqrt(suma * len(self.codigos) / comunes)
+        return np.where(comparables, distancias, np.nan), comunes
+
+    def vecinos(self, pais, k=10, candidatos=None, minimo_comunes=None):
+        """
+        Los ``k`` países más parecidos a ``pais``.
+
+        Args:
+            candidatos: Limitar la búsqueda a estos códigos (p. ej. una región de REGIONES)
+            minimo_comunes: Indicadores que deben compartir (por defecto, la mitad)
+
+        Returns:
+            DataFrame: posicion, codigo_pais, distancia, comunes (vacío si ``pais`` no está en el índice)
+        """
+        if pais not in self._pos:
+            return pd.DataFrame(columns=['posicion', 'codigo_pais', 'distancia', 'comunes'])
+        distancias, comunes = self.distancias(pais, minimo_comunes)
+        if candidatos is not None:
+            permitidos = np.isin(self.paises, list(candidatos))
+            distancias = np.where(permitidos, distancias, np.nan)
+        posiciones = seleccionar(distancias, k, 'menores')
+        return pd.DataFrame({
+            'posicion': np.arange(1, len(posiciones) + 1),
+            'codigo_pais': self.paises[posiciones],
+            'distancia': distancias[posiciones],
+            'comunes': comunes[posiciones],
+        })
+
+    def grupos_con_paises(self, grupos, excluir=None):
+        """
+        Nombres de los grupos (nombre -> códigos, p. ej. REGIONES) con algún país del índice.
+
+        Los grupos que sólo listan agregados (ECS, LCN...) quedan fuera: el
+        almacén no los tiene. ``excluir`` no cuenta (el país de referencia).
+        """
+        return [nombre for nombre, codigos in grupos.items()
+                if any(codigo in self._pos and codigo != excluir for codigo in codigos)]
+
+    def valores_de(self, paises):
+        """Valores (media de la ventana) de ``paises`` por indicador, en el orden dado."""
+        filas = [self._pos[p] for p in paises if p in self._pos]
+        return pd.DataFrame(self.valores[filas], index=pd.Index(self.paises[filas], name='codigo_pais'),
+                            columns=self.codigos)
+
+
+def construir(codigos, anio_inicio, anio_fin=None, raiz=None):
+    """
+    Índice de similitud de ``codigos`` con la media de cada indicador entre ``anio_inicio`` y ``anio_fin``.
+
+    Sin ``anio_fin`` se usa sólo ``anio_inicio``. Los países son la unión de
+    los de todas las particiones.
+    """
+    raiz = raiz or almacen.ALMACEN_DIR
+    anio_fin = anio_inicio if anio_fin is None else anio_fin
+    particiones = [almacen.abrir_particion(codigo, raiz) for codigo in codigos]
+    paises = pd.Index(sorted(set().union(*(p.paises for p in particiones))))
+
+    valores = np.full((len(paises), len(codigos)), np.nan)
+    for columna, (codigo, particion) in enumerate(zip(codigos, particiones)):
+        ventana = np.asarray(particion.valores(codigo, anio_inicio=anio_inicio, anio_fin=anio_fin))
+        if ventana.shape[1] == 0:
+            continue
+        cuenta = (~np.isnan(ventana)).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias = np.nansum(ventana, axis=1) / cuenta
+        valores[paises.get_indexer(particion.paises), columna] = np.where(cuenta > 0, medias, np.nan)
+    return IndiceSimilitud(paises, valores, codigos)
+
+
+_indices = OrderedDict()
+_lock = threading.Lock()
+
+
+def indice(codigos, anio_inicio, anio_fin=None, raiz=None):
+    """
+    Índice de similitud cacheado por selección, ventana y versión de las particiones.
+
+    Sólo se reconstruye cuando cambia alguno de los indicadores en el almacén.
+    """
+    raiz = raiz or almacen.ALMACEN_DIR
+    codigos = tuple(codigos)
+    anio_fin = anio_inicio if anio_fin is None else anio_fin
+    clave = (codigos, int(anio_inicio), int(anio_fin), raiz,
+             tuple(version_particion(codigo, raiz) for codigo in codigos))
+
+    with _lock:
+        existente = _indices.get(clave)
+        if existente is not None:
+            _indices.move_to_end(clave)
+            return existente
+    nuevo = construir(codigos, int(anio_inicio), int(anio_fin), raiz)
+    with _lock:
+        _indices[clave] = nuevo
+        while len(_indices) > MAX_INDICES:
+            _indices.popitem(last=False)
+    return nuevo
+
+
+def disponibles(codigos, raiz=None):
+    """Indicadores de ``codigos`` que tienen partición en el almacén local."""
+    return [codigo for codigo in codigos if disponible(codigo, raiz)]
@@ -1,17 +1,39 @@
+from __future__ import annotations
+
 import streamlit as st
-import plotly.express as px
-import pandas as pd
-import numpy as np
-import world_bank_data as wb
 import io
 import os
 import base64
-import plotly.io as pio
 from typing import Optional, Union, Dict, List, Tuple
 from typing import Dict, List, Optional, Tuple, Union, Any
 from datetime import datetime
 from functools import lru_cache
 
+import bitacora
+import catalogo_paises
+import conjuntos
+import derivados
+import estadisticas
+import formato
+import rankings
+import relleno
+import rendimiento
+import similares
+import transporte
+import vuelo_unico
+from exportacion import solicitar_libro_excel, version_datos
+from importaciones import modulo_perezoso
+from indicadores import DERIVADOS
+
+# Dependencias pesadas: se importan en su primer uso (arranque rápido)
+px = modulo_perezoso('plotly.express')
+pd = modulo_perezoso('pandas', al_cargar=conjuntos.activar_copy_on_write)
+np = modulo_perezoso('numpy')
+wb = modulo_perezoso('world_bank_data', al_cargar=transporte.instalar)
+
+# Registro estructurado (logs/econodash.jsonl)
+log = bitacora.obtener_logger('simple_app')
+
 # Configuración de la aplicación
 def configurar_pagina():
     st.set_page_config(
@@ -99,9 +121,11 @@ def obtener_promedio_region(region: str, df: pd.DataFrame) -> pd.DataFrame:
         
         return promedio_region
     except Exception as e:
+        log.exception("Error al calcular promedio", extra={'region': region})
         st.warning(f"Error al calcular promedio para {region}: {str(e)}")
         return pd.DataFrame()
 
+@rendimiento.medido(carga=True)
 def agregar_promedios(df: pd.DataFrame, incluir_mundo: bool = True, incluir_regiones: bool = True) -> pd.DataFrame:
     """
     Agrega promedios regionales y mundiales al DataFrame de países.
@@ -154,6 +178,7 @@ def agregar_promedios(df: pd.DataFrame, incluir_mundo: bool = True, incluir_regi
             
         return df
     except Exception as e:
+        log.exception("Error al agregar promedios")
         st.warning(f"Error al agregar promedios: {str(e)}")
         return df
 
@@ -191,114 +216,28 @@ INDICADORES = {
     }
 }
 
-# Función para obtener todos los países del Banco Mundial
-@st.cache_data(ttl=86400)  # Cachear por 24 horas
-def obtener_paises_mundo():
-    paises_base = {
-        'MEX': {'nombre': 'México', 'nombre_ingles': 'Mexico', 'iso2': 'MX'},
-        'USA': {'nombre': 'Estados Unidos', 'nombre_ingles': 'United States', 'iso2': 'US'},
-        'CAN': {'nombre': 'Canadá', 'nombre_ingles': 'Canada', 'iso2': 'CA'},
-        'BRA': {'nombre': 'Brasil', 'nombre_ingles': 'Brazil', 'iso2': 'BR'},
-        'ARG': {'nombre': 'Argentina', 'nombre_ingles': 'Argentina', 'iso2': 'AR'},
-        'COL': {'nombre': 'Colombia', 'nombre_ingles': 'Colombia', 'iso2': 'CO'},
-        'PER': {'nombre': 'Perú', 'nombre_ingles': 'Peru', 'iso2': 'PE'},
-        'CHL': {'nombre': 'Chile', 'nombre_ingles': 'Chile', 'iso2': 'CL'},
-        'ESP': {'nombre': 'España', 'nombre_ingles': 'Spain', 'iso2': 'ES'},
-        'FRA': {'nombre': 'Francia', 'nombre_ingles': 'France', 'iso2': 'FR'},
-        'GBR': {'nombre': 'Reino Unido', 'nombre_ingles': 'United Kingdom', 'iso2': 'GB'},
-        'DEU': {'nombre': 'Alemania', 'nombre_ingles': 'Germany', 'iso2': 'DE'},
-        'ITA': {'nombre': 'Italia', 'nombre_ingles': 'Italy', 'iso2': 'IT'},
-        'JPN': {'nombre': 'Japón', 'nombre_ingles': 'Japan', 'iso2': 'JP'},
-        'CHN': {'nombre': 'China', 'nombre_ingles': 'China', 'iso2': 'CN'},
-        'IND': {'nombre': 'India', 'nombre_ingles': 'India', 'iso2': 'IN'},
-        # Agrega más países según sea necesario
-        'RUS': {'nombre': 'Rusia', 'nombre_ingles': 'Russia', 'iso2': 'RU'},
-        'ZAF': {'nombre': 'Sudáfrica', 'nombre_ingles': 'South Africa', 'iso2': 'ZA'},
-        'AUS': {'nombre': 'Australia', 'nombre_ingles': 'Australia', 'iso2': 'AU'},
-        'IDN': {'nombre': 'Indonesia', 'nombre_ingles': 'Indonesia', 'iso2': 'ID'},
-        'NGA': {'nombre': 'Nigeria', 'nombre_ingles': 'Nigeria', 'iso2': 'NG'},
-        'EGY': {'nombre': 'Egipto', 'nombre_ingles': 'Egypt', 'iso2': 'EG'},
-        'PAK': {'nombre': 'Pakistán', 'nombre_ingles': 'Pakistan', 'iso2': 'PK'},
-        'BGD': {'nombre': 'Bangladés', 'nombre_ingles': 'Bangladesh', 'iso2': 'BD'},
-        'RUS': {'nombre': 'Rusia', 'nombre_ingles': 'Russia', 'iso2': 'RU'},
-        'MYS': {'nombre': 'Malasia', 'nombre_ingles': 'Malaysia', 'iso2': 'MY'},
-        'PHL': {'nombre': 'Filipinas', 'nombre_ingles': 'Philippines', 'iso2': 'PH'},
-        'VNM': {'nombre': 'Vietnam', 'nombre_ingles': 'Vietnam', 'iso2': 'VN'},
-        'THA': {'nombre': 'Tailandia', 'nombre_ingles': 'Thailand', 'iso2': 'TH'},
-        'SAU': {'nombre': 'Arabia Saudita', 'nombre_ingles': 'Saudi Arabia', 'iso2': 'SA'},
-        'ARE': {'nombre': 'Emiratos Árabes Unidos', 'nombre_ingles': 'United Arab Emirates', 'iso2': 'AE'},
-        'TUR': {'nombre': 'Turquía', 'nombre_ingles': 'Turkey', 'iso2': 'TR'},
-        'IRN': {'nombre': 'Irán', 'nombre_ingles': 'Iran', 'iso2': 'IR'},
-        'DZA': {'nombre': 'Argelia', 'nombre_ingles': 'Algeria', 'iso2': 'DZ'},
-        'EGY': {'nombre': 'Egipto', 'nombre_ingles': 'Egypt', 'iso2': 'EG'},
-        'ZAF': {'nombre': 'Sudáfrica', 'nombre_ingles': 'South Africa', 'iso2': 'ZA'},
-        'NGA': {'nombre': 'Nigeria', 'nombre_ingles': 'Nigeria', 'iso2': 'NG'},
-        'KEN': {'nombre': 'Kenia', 'nombre_ingles': 'Kenya', 'iso2': 'KE'},
-        'ETH': {'nombre': 'Etiopía', 'nombre_ingles': 'Ethiopia', 'iso2': 'ET'},
-        'DZA': {'nombre': 'Argelia', 'nombre_ingles': 'Algeria', 'iso2': 'DZ'},
-        'UKR': {'nombre': 'Ucrania', 'nombre_ingles': 'Ukraine', 'iso2': 'UA'},
-        'POL': {'nombre': 'Polonia', 'nombre_ingles': 'Poland', 'iso2': 'PL'},
-        'NLD': {'nombre': 'Países Bajos', 'nombre_ingles': 'Netherlands', 'iso2': 'NL'},
-        'BEL': {'nombre': 'Bélgica', 'nombre_ingles': 'Belgium', 'iso2': 'BE'},
-        'SWE': {'nombre': 'Suecia', 'nombre_ingles': 'Sweden', 'iso2': 'SE'},
-        'CHE': {'nombre': 'Suiza', 'nombre_ingles': 'Switzerland', 'iso2': 'CH'},
-        'AUT': {'nombre': 'Austria', 'nombre_ingles': 'Austria', 'iso2': 'AT'},
-        'PRT': {'nombre': 'Portugal', 'nombre_ingles': 'Portugal', 'iso2': 'PT'},
-        'GRC': {'nombre': 'Grecia', 'nombre_ingles': 'Greece', 'iso2': 'GR'},
-        'CZE': {'nombre': 'República Checa', 'nombre_ingles': 'Czech Republic', 'iso2': 'CZ'},
-        'ROU': {'nombre': 'Rumanía', 'nombre_ingles': 'Romania', 'iso2': 'RO'},
-        'HUN': {'nombre': 'Hungría', 'nombre_ingles': 'Hungary', 'iso2': 'HU'},
-        'PRY': {'nombre': 'Paraguay', 'nombre_ingles': 'Paraguay', 'iso2': 'PY'},
-        'URY': {'nombre': 'Uruguay', 'nombre_ingles': 'Uruguay', 'iso2': 'UY'},
-        'BOL': {'nombre': 'Bolivia', 'nombre_ingles': 'Bolivia', 'iso2': 'BO'},
-        'ECU': {'nombre': 'Ecuador', 'nombre_ingles': 'Ecuador', 'iso2': 'EC'},
-        'VEN': {'nombre': 'Venezuela', 'nombre_ingles': 'Venezuela', 'iso2': 'VE'},
-        'CRI': {'nombre': 'Costa Rica', 'nombre_ingles': 'Costa Rica', 'iso2': 'CR'},
-        'PAN': {'nombre': 'Panamá', 'nombre_ingles': 'Panama', 'iso2': 'PA'},
-        'DOM': {'nombre': 'República Dominicana', 'nombre_ingles': 'Dominican Republic', 'iso2': 'DO'},
-        'GTM': {'nombre': 'Guatemala', 'nombre_ingles': 'Guatemala', 'iso2': 'GT'},
-        'HND': {'nombre': 'Honduras', 'nombre_ingles': 'Honduras', 'iso2': 'HN'},
-        'SLV': {'nombre': 'El Salvador', 'nombre_ingles': 'El Salvador', 'iso2': 'SV'},
-        'NIC': {'nombre': 'Nicaragua', 'nombre_ingles': 'Nicaragua', 'iso2': 'NI'}
-    }
-    
-    try:
-        # Obtener todos los países del Banco Mundial
-        paises_wb = wb.get_countries()
-        
-        # Si hay datos, actualizar el diccionario con los países del Banco Mundial
-        if paises_wb is not None and not paises_wb.empty:
-            # Filtrar solo países (excluir regiones agregadas que no tienen código de región)
-            paises_wb = paises_wb[~paises_wb.region.isna()]
-            
-            for iso3, row in paises_wb.iterrows():
-                # El índice ya es el código ISO3
-                nombre_ingles = row['name']
-                iso2 = row['iso2Code']
-                
-                # Si el país no está en la lista base, agregarlo
-                if iso3 not in paises_base and pd.notna(iso2) and len(iso3) == 3:
-                    paises_base[iso3] = {
-                        'nombre': nombre_ingles,  # Usar el nombre en inglés si no hay traducción
-                        'nombre_ingles': nombre_ingles,
-                        'iso2': iso2
-                    }
-        
-        return paises_base
-    except Exception as e:
-        st.error(f"Error al obtener la lista de países: {str(e)}")
-        # Si hay un error, devolver la lista base de países
-        return paises_base
+# Indicadores derivados (se calculan a partir de los descargados, ver derivados.py)
+INDICADORES.update(DERIVADOS)
 
-# Obtener el diccionario de países
-PAISES = obtener_paises_mundo()
+# Catálogo de países: se carga bajo demanda desde una instantánea local
+# (datos/paises.json) y se refresca en segundo plano, sin llamar a la API al importar
+def obtener_paises_mundo() -> Dict[str, Dict[str, str]]:
+    """Devuelve el catálogo de países (ISO3 -> nombre, nombre en inglés, ISO2)."""
+    return catalogo_paises.obtener_paises()
+
+def __getattr__(nombre: str):
+    # Compatibilidad: simple_app.PAISES sigue disponible, pero se construye al primer acceso
+    if nombre == 'PAISES':
+        return obtener_paises_mundo()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
 
 # Función para obtener el código ISO2 a partir del código ISO3
 def obtener_codigo_iso2(codigo_iso3: str) -> str:
     """Obtiene el código ISO2 a partir del código ISO3 del país."""
-    return PAISES.get(codigo_iso3, {}).get('iso2', '')
+    return obtener_paises_mundo().get(codigo_iso3, {}).get('iso2', '')
 
 # Utilidades de datos
+@rendimiento.medido(carga=True)
 def limpiar_datos(datos: Union[pd.DataFrame, pd.Series]) -> pd.DataFrame:
     """Limpia y formatea los datos de entrada de la API del Banco Mundial."""
     if datos is None or datos.empty:
@@ -349,8 +288,8 @@ def limpiar_datos(datos: Union[pd.DataFrame, pd.Series]) -> pd.DataFrame:
                 'value': 'pib_per_capita_usd'
             })
     else:
-        # Ya es un DataFrame
-        df = datos.copy()
+        # Ya es un DataFrame (con copy-on-write, renombrar no toca el original)
+        df = datos
         # Verificar y renombrar columnas si es necesario
         if 'Country' in df.columns and 'Year' in df.columns:
             df = df.rename(columns={
@@ -408,17 +347,20 @@ def obtener_nombre_pais(codigo: str) -> str:
     codigo = str(codigo).strip().upper()
     
     # Buscar por código de país (ej: 'MEX')
-    if codigo in PAISES:
-        return PAISES[codigo]['nombre']
+    paises = obtener_paises_mundo()
+    if codigo in paises:
+        return paises[codigo]['nombre']
     
     # Buscar por nombre en inglés (ej: 'Mexico')
-    for datos in PAISES.values():
-        if codigo == datos['nombre_ingles'].upper():
-            return datos['nombre']
+    nombre = catalogo_paises.nombre_desde_ingles(codigo)
+    if nombre is not None:
+        return nombre
     
     return f"Desconocido ({codigo})"
 
-@st.cache_data(ttl=3600)  # Cachear por 1 hora
+@rendimiento.medido(cache=True, carga=True)
+@conjuntos.compartido(ttl=3600)  # Cachear por 1 hora, un solo conjunto para todas las sesiones
+@rendimiento.medido(rendimiento.FALLO_CACHE)
 def obtener_datos_indicador(codigo_indicador: str, codigos_paises: List[str], anio_inicio: int, anio_fin: int) -> pd.DataFrame:
     """Obtiene datos de un indicador específico desde la API del Banco Mundial."""
     try:
@@ -439,14 +381,19 @@ def obtener_datos_indicador(codigo_indicador: str, codigos_paises: List[str], an
         with st.spinner(f"Obteniendo datos de {nombre_columna}..."):
             for pais in codigos_a_consultar:
                 try:
-                    datos = wb.get_series(
-                        codigo_indicador,
-                        country=pais,
-                        date=f"{anio_inicio}:{anio_fin}",
-                        id_or_value='id',
-                        simplify_index=True,
-                        raise_on_error=False
-                    )
+                    with rendimiento.tramo('wb.get_series', indicador=codigo_indicador, pais=pais):
+                        datos = vuelo_unico.ejecutar(
+                            vuelo_unico.clave_serie(codigo_indicador, pais, date=f"{anio_inicio}:{anio_fin}",
+                                                    id_or_value='id', simplify_index=True),
+                            lambda: wb.get_series(
+                                codigo_indicador,
+                                country=pais,
+                                date=f"{anio_inicio}:{anio_fin}",
+                                id_or_value='id',
+                                simplify_index=True,
+                                raise_on_error=False
+                            )
+                        )
                     if datos is None or datos.empty:
                         # Solo mostrar advertencia para los países seleccionados originalmente
                         if pais in codigos_paises:
@@ -484,6 +431,9 @@ def obtener_datos_indicador(codigo_indicador: str, codigos_paises: List[str], an
                             df_pais['seleccionado'] = pais in codigos_paises
                             resultados.append(df_pais)
                 except Exception as e:
+                    log.warning("Error al obtener datos", extra={
+                        'indicador': codigo_indicador, 'pais': pais, 'error': str(e)
+                    })
                     if pais in codigos_paises:  # Solo mostrar error para países seleccionados
                         st.error(f"Error al obtener datos para {obtener_nombre_pais(pais)}: {str(e)}")
                     continue
@@ -507,13 +457,23 @@ def obtener_datos_indicador(codigo_indicador: str, codigos_paises: List[str], an
         return df_final[columnas_salida]
                 
     except Exception as e:
+        log.exception("Error al obtener datos del indicador", extra={'indicador': codigo_indicador})
         st.error(f"Error al obtener datos del indicador {codigo_indicador}: {str(e)}")
         import traceback
         st.text(traceback.format_exc())
         return pd.DataFrame()
 
-def obtener_datos_multiples_indicadores(codigos_indicadores: List[str], codigos_paises: List[str], anio_inicio: int, anio_fin: int) -> Dict[str, pd.DataFrame]:
-    """Obtiene datos para múltiples indicadores y los devuelve en un diccionario."""
+def obtener_datos_multiples_indicadores(codigos_indicadores: List[str], codigos_paises: List[str], anio_inicio: int, anio_fin: int,
+                                        versiones: Optional[Dict[str, int]] = None,
+                                        retardos: Optional[Dict[str, int]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Obtiene datos para múltiples indicadores y los devuelve en un diccionario.
+    
+    Si se pasa ``versiones``, anota en él la versión de cada descarga en caché
+    (ver conjuntos.compartido), que identifica los datos sin recorrerlos.
+    ``retardos`` indica, por indicador, cuántos años antes de ``anio_inicio``
+    hay que empezar a descargarlo (ver derivados.retardos_bases).
+    """
     datos_por_indicador = {}
     
     # Asegurar que el rango de años sea válido
@@ -526,7 +486,10 @@ def obtener_datos_multiples_indicadores(codigos_indicadores: List[str], codigos_
     
     for codigo in codigos_indicadores:
         try:
-            df = obtener_datos_indicador(codigo, codigos_paises, anio_inicio, anio_fin)
+            desde = anio_inicio - (retardos or {}).get(codigo, 0)
+            df = obtener_datos_indicador(codigo, codigos_paises, desde, anio_fin)
+            if versiones is not None:
+                versiones[codigo] = obtener_datos_indicador.version(codigo, codigos_paises, desde, anio_fin)
             if not df.empty:
                 datos_por_indicador[codigo] = df
             else:
@@ -541,6 +504,28 @@ def obtener_datos_multiples_indicadores(codigos_indicadores: List[str], codigos_
     
     return datos_por_indicador
 
+def agregar_derivados(datos_por_indicador: Dict[str, pd.DataFrame], codigos_indicadores: List[str]) -> Dict[str, pd.DataFrame]:
+    """Calcula los indicadores derivados seleccionados a partir de las series ya descargadas."""
+    try:
+        calculados = derivados.calcular(codigos_indicadores, datos_por_indicador)
+    except derivados.ErrorExpresion as e:
+        st.error(f"Error en un indicador derivado: {str(e)}")
+        return datos_por_indicador
+    
+    # Mismas columnas que obtener_datos_indicador
+    for codigo, df in calculados.items():
+        if df.empty:
+            st.warning(f"No hay datos suficientes para calcular {INDICADORES[codigo]['nombre']}")
+            continue
+        nombres = {c: obtener_nombre_pais(c) for c in df['codigo_pais'].unique()}
+        datos_por_indicador[codigo] = df.assign(
+            pais=df['codigo_pais'].map(nombres),
+            pib_per_capita_usd=df['valor'],
+            indicador=INDICADORES[codigo]['nombre'],
+            codigo_indicador=codigo
+        )[['codigo_pais', 'pais', 'anio', 'valor', 'pib_per_capita_usd', 'indicador', 'codigo_indicador']]
+    return datos_por_indicador
+
 def crear_grafico_pib(df: pd.DataFrame, anio_inicio: int, anio_fin: int) -> None:
     """Crea y muestra un gráfico de líneas con los datos de PIB."""
     if df.empty:
@@ -601,7 +586,7 @@ def mostrar_sidebar() -> Tuple[List[str], List[str], int, int]:
     
     # Selección de países
     st.sidebar.subheader("Países")
-    paises_disponibles = [f"{datos['nombre']} ({codigo})" for codigo, datos in PAISES.items()]
+    paises_disponibles = [f"{datos['nombre']} ({codigo})" for codigo, datos in obtener_paises_mundo().items()]
     paises_seleccionados = st.sidebar.multiselect(
         "Selecciona uno o más países:",
         options=paises_disponibles,
@@ -662,7 +647,7 @@ def get_table_download_link(df: pd.DataFrame, filename: str, button_text: str) -
         return get_download_link(content, filename, button_text, 'csv')
     elif filename.endswith('.xlsx'):
         towrite = io.BytesIO()
-        df.to_excel(towrite, index=False, engine='openpyxl')
+        df.to_excel(towrite, index=False, engine='xlsxwriter')
         return get_download_link(towrite.getvalue(), filename, button_text, 'xlsx')
     return ""
 
@@ -722,6 +707,7 @@ def get_figure_download_link(fig, filename: str, button_text: str, width: int =
         st.error(f"Error al generar el enlace de descarga: {str(e)}")
         return ""
 
+@rendimiento.medido()
 def mostrar_datos_tabulares(datos_por_indicador: Dict[str, pd.DataFrame]):
     """Muestra los datos en formato tabular organizados por indicador con opciones de exportación."""
     for codigo_indicador, df in datos_por_indicador.items():
@@ -742,28 +728,57 @@ def mostrar_datos_tabulares(datos_por_indicador: Dict[str, pd.DataFrame]):
             aggfunc='first'
         ).round(2)
         
-        # Mostrar tabla con los datos
-        st.dataframe(df_pivot, use_container_width=True)
-        
-        # Botones de exportación
-        col1, col2, _ = st.columns([1, 1, 3])
+        # Mostrar tabla con los datos (numérica; el formato del indicador va en column_config)
+        info = INDICADORES.get(codigo_indicador, {})
+        st.dataframe(
+            df_pivot,
+            use_container_width=True,
+            column_config={pais: formato.columna(info, pais) for pais in df_pivot.columns}
+        )
         
-        with col1:
-            st.markdown(get_table_download_link(
-                df_pivot.reset_index(), 
-                f"{nombre_indicador.replace(' ', '_')}.csv", 
-                "📥 Descargar CSV"
-            ), unsafe_allow_html=True)
-            
-        with col2:
-            st.markdown(get_table_download_link(
-                df_pivot.reset_index(),
-                f"{nombre_indicador.replace(' ', '_')}.xlsx",
-                "📥 Descargar Excel"
-            ), unsafe_allow_html=True)
+        st.markdown(get_table_download_link(
+            df_pivot.reset_index(), 
+            f"{nombre_indicador.replace(' ', '_')}.csv", 
+            "📥 Descargar CSV"
+        ), unsafe_allow_html=True)
+    
+    mostrar_descarga_excel(datos_por_indicador)
+
+def mostrar_descarga_excel(datos_por_indicador: Dict[str, pd.DataFrame]):
+    """Ofrece un único libro Excel (una hoja por indicador más metadatos)."""
+    st.subheader("📥 Exportar a Excel")
+    
+    version = version_datos(datos_por_indicador)
+    futuro = solicitar_libro_excel(datos_por_indicador, INDICADORES, version)
+    
+    # Si el libro no está en caché se espera a que termine: las tablas de
+    # arriba ya están en pantalla y el botón aparece en cuanto está listo
+    if not futuro.done():
+        with st.spinner("⏳ Preparando el libro Excel..."):
+            futuro.exception()
+    
+    if futuro.exception() is not None:
+        st.error(f"Error al generar el libro Excel: {str(futuro.exception())}")
+        return
+    
+    st.download_button(
+        label="📥 Descargar Excel (todos los indicadores)",
+        data=futuro.result(),
+        file_name=f"datos_economicos_{datetime.now().strftime('%Y%m%d')}.xlsx",
+        mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        key=f"descarga_excel_{version}"
+    )
 
-def crear_grafico_indicador(df: pd.DataFrame, codigo_indicador: str, anio_inicio: int, anio_fin: int) -> None:
-    """Crea y muestra un gráfico interactivo con múltiples opciones de visualización."""
+@rendimiento.medido()
+def crear_grafico_indicador(df: pd.DataFrame, codigo_indicador: str, anio_inicio: int, anio_fin: int,
+                            version_descarga=None) -> None:
+    """
+    Crea y muestra un gráfico interactivo con múltiples opciones de visualización.
+    
+    ``version_descarga`` identifica las descargas de las que sale ``df`` (ver
+    obtener_datos_multiples_indicadores); con ella las estadísticas no tienen
+    que recorrer los datos para saber si ya están calculadas.
+    """
     if df.empty:
         st.warning(f"No hay datos disponibles para el indicador: {codigo_indicador}")
         return
@@ -776,7 +791,7 @@ def crear_grafico_indicador(df: pd.DataFrame, codigo_indicador: str, anio_inicio
     valor_col = 'valor' if 'valor' in df.columns else 'pib_per_capita_usd'
     
     # Filtrar por rango de años
-    df_filtrado = df[(df['anio'] >= anio_inicio) & (df['anio'] <= anio_fin)].copy()
+    df_filtrado = df[(df['anio'] >= anio_inicio) & (df['anio'] <= anio_fin)]
     
     if df_filtrado.empty:
         st.warning(f"No hay datos disponibles para el rango de años seleccionado: {anio_inicio}-{anio_fin}")
@@ -814,6 +829,29 @@ def crear_grafico_indicador(df: pd.DataFrame, codigo_indicador: str, anio_inicio
                 key=f"prom_region_{codigo_indicador}",
                 help="Mostrar promedios regionales relevantes"
             )
+        
+        # Relleno de huecos (años sin dato) antes de promedios y anotaciones
+        st.markdown("**Huecos en los datos:**")
+        metodo_relleno = st.selectbox(
+            "Rellenar años sin dato",
+            [None, *relleno.METODOS],
+            format_func=lambda metodo: "Sin rellenar" if metodo is None else relleno.METODOS[metodo],
+            key=f"relleno_{codigo_indicador}"
+        )
+        limite_relleno = st.slider(
+            "Años máximos a rellenar",
+            min_value=1,
+            max_value=10,
+            value=3,
+            key=f"limite_relleno_{codigo_indicador}",
+            disabled=metodo_relleno is None
+        )
+    
+    # Rellenar huecos: una sola operación sobre la matriz país x año del indicador
+    imputados = df_filtrado.iloc[:0]
+    if metodo_relleno is not None:
+        df_filtrado = relleno.rellenar(df_filtrado, 'pais', 'anio', valor_col, metodo_relleno, limite_relleno)
+        imputados = df_filtrado[df_filtrado[relleno.COLUMNA_IMPUTADO]]
     
     # Agregar promedios si está habilitado
     df_original = df_filtrado.copy()
@@ -824,6 +862,18 @@ def crear_grafico_indicador(df: pd.DataFrame, codigo_indicador: str, anio_inicio
             incluir_regiones=mostrar_promedio_region
         )
     
+    # Las estadísticas usan sólo datos observados (igual que app.py): sin las
+    # celdas imputadas ni promedios calculados a partir de ellas
+    df_estadisticas = df_filtrado
+    if metodo_relleno is not None:
+        df_estadisticas = df_original[~df_original[relleno.COLUMNA_IMPUTADO]]
+        if mostrar_promedio_mundo or mostrar_promedio_region:
+            df_estadisticas = agregar_promedios(
+                df_estadisticas,
+                incluir_mundo=mostrar_promedio_mundo,
+                incluir_regiones=mostrar_promedio_region
+            )
+    
     # Crear gráfico según el tipo seleccionado
     if tipo_grafico == "Línea":
         # Asegurar que los datos tengan el formato correcto
@@ -929,45 +979,38 @@ def crear_grafico_indicador(df: pd.DataFrame, codigo_indicador: str, anio_inicio
                     except Exception as e:
                         st.warning(f"No se pudo calcular la tendencia para {trace.name}")
     
-    # Añadir anotaciones para valores máximos y mínimos
-    for pais in df_filtrado['pais'].unique():
-        df_pais = df_filtrado[df_filtrado['pais'] == pais]
-        if not df_pais.empty:
-            max_idx = df_pais[valor_col].idxmax()
-            min_idx = df_pais[valor_col].idxmin()
-            
-            # Añadir anotación para el valor máximo
-            fig.add_annotation(
-                x=df_pais.loc[max_idx, 'anio'],
-                y=df_pais.loc[max_idx, valor_col],
-                text=f"Máx: {df_pais.loc[max_idx, valor_col]:.2f}",
-                showarrow=True,
-                arrowhead=1,
-                ax=0,
-                ay=-40,
-                bgcolor='white',
-                bordercolor='black',
-                borderwidth=1,
-                borderpad=4,
-                opacity=0.8
-            )
-            
-            # Añadir anotación para el valor mínimo si es significativamente diferente
-            if df_pais.loc[min_idx, valor_col] < df_pais[valor_col].mean() * 0.9:  # Solo si es al menos 10% menor que el promedio
-                fig.add_annotation(
-                    x=df_pais.loc[min_idx, 'anio'],
-                    y=df_pais.loc[min_idx, valor_col],
-                    text=f"Mín: {df_pais.loc[min_idx, valor_col]:.2f}",
-                    showarrow=True,
-                    arrowhead=1,
-                    ax=0,
-                    ay=40,
-                    bgcolor='white',
-                    bordercolor='black',
-                    borderwidth=1,
-                    borderpad=4,
-                    opacity=0.8
-                )
+    # Marcar los valores imputados al rellenar huecos
+    if not imputados.empty:
+        fig.add_scatter(
+            x=imputados['anio'],
+            y=imputados[valor_col],
+            mode='markers',
+            name='Valor imputado',
+            marker=dict(symbol='circle-open', size=10, color='gray', line=dict(width=2)),
+            customdata=imputados['pais'],
+            showlegend=True
+        )
+    
+    # Añadir anotaciones para valores máximos y mínimos (todas en una sola actualización del layout)
+    valores = df_filtrado[['pais', 'anio', valor_col]].dropna(subset=[valor_col])
+    por_pais = valores.groupby('pais', sort=False)[valor_col]
+    maximos = valores.loc[por_pais.idxmax()]
+    minimos = valores.loc[por_pais.idxmin()]
+    
+    # Mínimo sólo si es significativamente diferente (al menos 10% menor que el promedio del país)
+    minimos = minimos[minimos[valor_col].to_numpy() < por_pais.mean().reindex(minimos['pais']).to_numpy() * 0.9]
+    
+    info = INDICADORES.get(codigo_indicador, {})
+    estilo = dict(showarrow=True, arrowhead=1, ax=0, bgcolor='white', bordercolor='black',
+                  borderwidth=1, borderpad=4, opacity=0.8)
+    anotaciones = list(fig.layout.annotations)
+    for puntos, etiqueta, desplazamiento in ((maximos, 'Máx', -40), (minimos, 'Mín', 40)):
+        textos = etiqueta + ': ' + formato.formatear_serie(puntos[valor_col], info)
+        anotaciones.extend(
+            dict(x=x, y=y, text=texto, ay=desplazamiento, **estilo)
+            for x, y, texto in zip(puntos['anio'].tolist(), puntos[valor_col].tolist(), textos.tolist())
+        )
+    fig.update_layout(annotations=anotaciones)
     
     # Mejorar el diseño del gráfico
     fig.update_layout(
@@ -988,12 +1031,13 @@ def crear_grafico_indicador(df: pd.DataFrame, codigo_indicador: str, anio_inicio
     # Mejorar los tooltips
     fig.update_traces(
         hovertemplate="<b>%{x}</b><br>" +
-                    f"<b>{nombre_indicador}:</b> %{{y:,.2f}} {unidad}<br>" +
+                    f"<b>{nombre_indicador}:</b> {formato.plantilla_hover(info)}<br>" +
                     "<extra></extra>"
     )
     
-    # Mostrar el gráfico
-    st.plotly_chart(fig, use_container_width=True)
+    # Mostrar el gráfico (serializa la figura y la envía al navegador)
+    with rendimiento.tramo('st.plotly_chart', trazas=len(fig.data)):
+        st.plotly_chart(fig, use_container_width=True)
     
     # Botón de descarga único
     nombre_archivo = f"{nombre_indicador.replace(' ', '_')}_{anio_inicio}-{anio_fin}"
@@ -1038,58 +1082,173 @@ def crear_grafico_indicador(df: pd.DataFrame, codigo_indicador: str, anio_inicio
     
     # Mostrar estadísticas resumidas
     with st.expander("📊 Estadísticas resumidas", expanded=False):
-        # Calcular estadísticas básicas
-        stats = df_filtrado.groupby('pais')[valor_col].agg(['mean', 'min', 'max', 'std']).round(2)
-        stats.columns = ['Promedio', 'Mínimo', 'Máximo', 'Desv. Estándar']
+        # Estadísticas por país y promedio, calculadas una vez por versión de los datos mostrados:
+        # la de la descarga más el rango de años y los promedios incluidos
+        version = None
+        if version_descarga is not None:
+            version = (version_descarga, anio_inicio, anio_fin, mostrar_promedio_mundo, mostrar_promedio_region)
+        materializado = estadisticas.materializar(codigo_indicador, df_estadisticas, 'pais', 'anio', valor_col, version)
+        stats = materializado.seleccion(nombres=True).round(2)
         
-        # Identificar promedios
-        promedios = stats[stats.index.str.startswith('Promedio')]
-        paises = stats[~stats.index.str.startswith('Promedio')]
-        
-        # Si hay promedios, calcular diferencias porcentuales
-        if not promedios.empty and not paises.empty:
+        # Si hay promedios, calcular diferencias porcentuales (todas a la vez, sin recorrer filas)
+        comparacion = estadisticas.comparar_con_promedios(materializado.tabla)
+        if not comparacion.empty:
             st.markdown("### Comparación con promedios")
             
-            # Para cada país, comparar con cada promedio
-            comparaciones = []
-            for idx, pais in paises.iterrows():
-                for prom_idx, promedio in promedios.iterrows():
-                    dif_promedio = ((pais['Promedio'] - promedio['Promedio']) / promedio['Promedio'] * 100).round(2)
-                    comparacion = {
-                        'País': idx,
-                        'Promedio': prom_idx.replace('Promedio ', ''),
-                        'Valor': pais['Promedio'],
-                        'Promedio Valor': promedio['Promedio'],
-                        'Diferencia %': dif_promedio,
-                        'Comparación': 'Mayor' if dif_promedio > 0 else 'Menor' if dif_promedio < 0 else 'Igual'
-                    }
-                    comparaciones.append(comparacion)
-            
             # Mostrar tabla de comparación
-            if comparaciones:
-                df_comparacion = pd.DataFrame(comparaciones)
-                st.dataframe(
-                    df_comparacion.pivot_table(
-                        index='País',
-                        columns='Promedio',
-                        values='Diferencia %',
-                        aggfunc='first'
-                    ).style.format('{:.2f}%').applymap(
-                        lambda x: 'color: green' if x > 0 else 'color: red' if x < 0 else 'color: gray'
-                    ),
-                    use_container_width=True
-                )
+            st.dataframe(
+                comparacion.style.format('{:.2f}%').map(
+                    lambda x: 'color: green' if x > 0 else 'color: red' if x < 0 else 'color: gray'
+                ),
+                use_container_width=True
+            )
         
         # Mostrar estadísticas completas
         st.markdown("### Estadísticas detalladas")
         st.dataframe(
-            stats.style.format('{:,.2f}'),
+            stats.style.format(formato.formato_texto(info), subset=[estadisticas.COLUMNAS[c] for c in estadisticas.COLUMNAS_VALOR])
+                 .format('{:.0f}', subset=['Observaciones', 'Primer año', 'Último año']),
             use_container_width=True
         )
         
         # Nota explicativa
         st.caption("ℹ️ Los valores positivos en la comparación indican que el país está por encima del promedio.")
 
+@rendimiento.medido()
+def mostrar_ranking(codigos_indicadores: List[str]) -> None:
+    """Ranking de todos los países del almacén local (top/bottom-N por año o por variación interanual)."""
+    with st.expander("🏆 Ranking de países", expanded=False):
+        disponibles = [codigo for codigo in codigos_indicadores if rankings.disponible(codigo)]
+        if not disponibles:
+            st.info("El ranking usa el almacén local con todos los países. "
+                    "Créalo con `python src/ingesta_masiva.py` para los indicadores seleccionados.")
+            return
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            codigo = st.selectbox(
+                "Indicador",
+                disponibles,
+                format_func=lambda c: INDICADORES.get(c, {}).get('nombre', c),
+                key="ranking_indicador"
+            )
+        with col2:
+            tipo = st.selectbox("Ordenar por", ["Valor", "Variación interanual", "Variación interanual (%)"],
+                                key="ranking_tipo")
+        with col3:
+            anios = rankings.anios_disponibles(codigo)
+            opciones_anio = anios[::-1] if tipo != "Valor" else ["Último dato"] + anios[::-1]
+            anio = st.selectbox("Año", opciones_anio, key="ranking_anio")
+        with col4:
+            ordenes = {"Mayores": 'mayores', "Menores": 'menores'}
+            if tipo != "Valor":
+                ordenes["Mayores movimientos"] = 'absolutos'
+            orden = ordenes[st.selectbox("Primero", list(ordenes), key="ranking_orden")]
+        n = st.slider("Número de países", min_value=5, max_value=50, value=20, step=5, key="ranking_n")
+        rellenar = st.checkbox("Rellenar huecos (interpolación lineal, hasta 3 años)", value=False,
+                               key="ranking_relleno",
+                               help="Incluye países sin dato ese año interpolando entre sus años vecinos")
+        metodo_relleno, limite_relleno = ('lineal', 3) if rellenar else (None, None)
+        
+        info = INDICADORES.get(codigo, {})
+        if tipo == "Valor":
+            tabla = rankings.ranking(codigo, None if anio == "Último dato" else anio, n, orden,
+                                     metodo_relleno=metodo_relleno, limite_relleno=limite_relleno)
+            columnas = {'anio': st.column_config.NumberColumn("Año", format="%d"),
+                        'valor': formato.columna(info, info.get('nombre', codigo))}
+        else:
+            relativa = tipo.endswith("(%)")
+            tabla = rankings.variacion(codigo, anio, n, orden, relativa=relativa,
+                                       metodo_relleno=metodo_relleno, limite_relleno=limite_relleno)
+            columnas = {'anterior': formato.columna(info, str(anio - 1)),
+                        'valor': formato.columna(info, str(anio)),
+                        'variacion': formato.columna({'unidad': '%'} if relativa else info, "Variación")}
+        
+        if tabla.empty:
+            st.warning("No hay datos para ese año en el almacén local.")
+            return
+        if rellenar:
+            columnas['imputado'] = st.column_config.CheckboxColumn("Imputado")
+        
+        # Nombres de los países desde el catálogo (sin llamadas a la API)
+        catalogo = obtener_paises_mundo()
+        tabla = tabla.assign(pais=[catalogo.get(c, {}).get('nombre', c) for c in tabla['codigo_pais']])
+        st.dataframe(
+            tabla[['posicion', 'pais', 'codigo_pais', *columnas]],
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'posicion': st.column_config.NumberColumn("#", format="%d"),
+                'pais': st.column_config.TextColumn("País"),
+                'codigo_pais': st.column_config.TextColumn("Código"),
+                **columnas
+            }
+        )
+
+@rendimiento.medido()
+def mostrar_paises_similares(codigos_indicadores: List[str], codigos_paises: List[str],
+                             anio_inicio: int, anio_fin: int) -> None:
+    """Países más parecidos a uno dado según los indicadores seleccionados (almacén local, todos los países)."""
+    with st.expander("🧭 Países similares", expanded=False):
+        disponibles = similares.disponibles(codigos_indicadores)
+        if not disponibles:
+            st.info("La búsqueda de países similares usa el almacén local con todos los países. "
+                    "Créalo con `python src/ingesta_masiva.py` para los indicadores seleccionados.")
+            return
+        
+        catalogo = obtener_paises_mundo()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            opciones_pais = list(dict.fromkeys(codigos_paises))
+            pais = st.selectbox("País", opciones_pais,
+                                format_func=lambda c: catalogo.get(c, {}).get('nombre', c),
+                                key="similares_pais")
+        with col3:
+            k = st.slider("Número de países", min_value=3, max_value=25, value=10, key="similares_k")
+        ventana = (anio_inicio, anio_fin)
+        if anio_inicio < anio_fin:
+            ventana = st.slider("Años (un año o una ventana; se usa la media)", min_value=anio_inicio,
+                                max_value=anio_fin, value=(max(anio_inicio, anio_fin - 4), anio_fin),
+                                key="similares_ventana")
+        
+        indice = similares.indice(disponibles, *ventana)
+        with col2:
+            # Sólo regiones con algún país del almacén (las que listan agregados no tienen ninguno)
+            regiones = indice.grupos_con_paises({r: c for r, c in REGIONES.items() if r != 'Mundo'}, excluir=pais)
+            region = st.selectbox("Comparar con", ["Todos los países", *regiones], key="similares_region")
+        if pais not in indice:
+            st.warning("El país seleccionado no está en el almacén local.")
+            return
+        candidatos = None if region == "Todos los países" else REGIONES[region]
+        vecinos = indice.vecinos(pais, k, candidatos=candidatos)
+        if vecinos.empty:
+            st.warning("No hay países comparables con datos suficientes en esa ventana.")
+            return
+        
+        # Valores medios de la ventana del país elegido y sus vecinos, con el formato de cada indicador
+        tabla = indice.valores_de([pais, *vecinos['codigo_pais']]).reset_index()
+        tabla = tabla.merge(vecinos, on='codigo_pais', how='left').astype({'posicion': 'Int64'})
+        tabla = tabla.assign(
+            pais=[catalogo.get(c, {}).get('nombre', c) for c in tabla['codigo_pais']],
+            region=[obtener_region_pais(c) for c in tabla['codigo_pais']]
+        )
+        nombres = {codigo: INDICADORES.get(codigo, {}).get('nombre', codigo) for codigo in disponibles}
+        st.dataframe(
+            tabla[['posicion', 'pais', 'region', 'distancia', *disponibles]],
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'posicion': st.column_config.NumberColumn("#", format="%d"),
+                'pais': st.column_config.TextColumn("País"),
+                'region': st.column_config.TextColumn("Región"),
+                'distancia': st.column_config.NumberColumn("Distancia", format="%.3f"),
+                **{codigo: formato.columna(INDICADORES.get(codigo, {}), nombres[codigo]) for codigo in disponibles}
+            }
+        )
+        st.caption("La distancia compara los indicadores estandarizados sobre todos los países del almacén: "
+                   "cuanto menor, más parecido. La primera fila es el país elegido.")
+
+@rendimiento.rerun_medido('simple_app')
 def main():
     # Configurar la página
     configurar_pagina()
@@ -1120,11 +1279,22 @@ def main():
         
         # Obtener datos
         with st.spinner("Cargando datos..."):
+            # Cada serie base se descarga una sola vez, aunque la usen varios derivados;
+            # sólo las que leen yoy/cagr empiezan años antes, y luego se recorta
+            versiones = {}
+            retardos = derivados.retardos_bases(codigos_indicadores)
             datos_por_indicador = obtener_datos_multiples_indicadores(
-                codigos_indicadores,
+                list(retardos),
                 codigos_paises,
                 anio_inicio,
-                anio_fin
+                anio_fin,
+                versiones,
+                retardos
+            )
+            datos_por_indicador = agregar_derivados(datos_por_indicador, codigos_indicadores)
+            datos_por_indicador = derivados.recortar(
+                {c: datos_por_indicador[c] for c in codigos_indicadores if c in datos_por_indicador},
+                anio_inicio, anio_fin
             )
             
             if not datos_por_indicador:
@@ -1143,15 +1313,23 @@ def main():
             with tabs[idx]:
                 df = datos_por_indicador.get(codigo_indicador, pd.DataFrame())
                 if not df.empty:
-                    crear_grafico_indicador(df, codigo_indicador, anio_inicio, anio_fin)
+                    version_descarga = tuple(versiones.get(base) for base in derivados.bases_necesarias([codigo_indicador]))
+                    crear_grafico_indicador(df, codigo_indicador, anio_inicio, anio_fin, version_descarga)
                 else:
                     st.warning(f"No hay datos disponibles para {INDICADORES.get(codigo_indicador, {}).get('nombre', codigo_indicador)}")
         
         # Mostrar datos tabulares en una sección colapsable
         with st.expander("📊 Ver datos tabulares", expanded=False):
             mostrar_datos_tabulares(datos_por_indicador)
+        
+        # Ranking sobre todos los países del almacén local
+        mostrar_ranking(codigos_indicadores)
+        
+        # Países parecidos a uno de los seleccionados, sobre todo el catálogo
+        mostrar_paises_similares(codigos_indicadores, codigos_paises, anio_inicio, anio_fin)
     
     except Exception as e:
+        log.exception("Error al procesar los datos", extra={'indicadores': codigos_indicadores})
         st.error(f"❌ Error al procesar los datos: {str(e)}")
         st.exception(e)
         
@@ -1,7 +1,19 @@
+import os
+import sys
+
 import world_bank_data as wb
 import matplotlib.pyplot as plt
 import pandas as pd
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bitacora
+import trabajos
+import transporte
+from instantaneas import escribir_instantanea
+
+# Todas las peticiones de world_bank_data por la sesión HTTP compartida
+transporte.instalar()
+
 # Configurar pandas para mostrar más filas y columnas
 pd.set_option('display.max_columns', None)
 pd.set_option('display.max_rows', 10)
@@ -31,19 +43,24 @@ def obtener_datos_banco_mundial():
         # Obtener datos usando la API
         print(f"Descargando datos para {len(paises)} países (esto puede tomar un momento)...")
         
-        # Descargar en lotes para evitar timeouts
+        # Descargar en lotes para evitar timeouts. Los lotes se ejecutan como
+        # un trabajo reanudable: los fallidos se reintentan y, si el script se
+        # interrumpe, la siguiente ejecución sólo descarga los que faltan
         batch_size = 30
-        data_frames = []
-        
-        for i in range(0, len(paises), batch_size):
-            batch = paises[i:i + batch_size]
-            print(f"Procesando lote {i//batch_size + 1}/{(len(paises)-1)//batch_size + 1}...")
-            try:
-                batch_data = wb.get_series(indicador, country=batch, mrv=10)  # Últimos 10 años
-                if not batch_data.empty:
-                    data_frames.append(batch_data)
-            except Exception as e:
-                print(f"Advertencia: Error al procesar lote {i//batch_size + 1}: {str(e)}")
+        lotes = trabajos.dividir_en_lotes(indicador, paises, batch_size, mrv=10)  # Últimos 10 años
+        nombre_trabajo = f"ejemplo_api_wb_{indicador}"
+
+        def descargar_lote(lote):
+            print(f"Procesando lote {lote['lote'] + 1}/{len(lotes)}...")
+            return wb.get_series(indicador, country=lote['paises'], mrv=lote['mrv'])
+
+        resultados, fallidas = trabajos.ejecutar_trabajo(nombre_trabajo, lotes, descargar_lote)
+        data_frames = [batch_data for batch_data in resultados.values() if not batch_data.empty]
+        if fallidas:
+            print(f"Advertencia: {len(fallidas)} lotes no se pudieron descargar; "
+                  f"vuelve a ejecutar el script para completarlos.")
+        else:
+            trabajos.limpiar_trabajo(nombre_trabajo)
         
         if not data_frames:
             print("No se pudieron obtener datos. Verifica tu conexión a internet.")
@@ -132,6 +149,18 @@ def obtener_datos_banco_mundial():
                 print(f"\nDatos completos guardados en: {archivo_salida}")
             except Exception as e:
                 print(f"\nNo se pudo guardar el archivo: {str(e)}")
+
+            # Guardar también una instantánea memmap con índice por país y año,
+            # que se abre sin volver a parsear el CSV (ver instantaneas.py)
+            try:
+                ruta_instantanea = escribir_instantanea(
+                    'datos_economicos_completos',
+                    {indicador: df},
+                    metadatos={'indicador': nombre_indicador, 'fuente': 'wb.get_series'}
+                )
+                print(f"Instantánea memmap guardada en: {ruta_instantanea}/")
+            except Exception as e:
+                print(f"\nNo se pudo guardar la instantánea: {str(e)}")
                 
             # Mostrar estadísticas descriptivas
             print("\nEstadísticas descriptivas:")
@@ -158,4 +187,5 @@ def obtener_datos_banco_mundial():
         print("Asegúrate de tener conexión a internet e inténtalo de nuevo.")
 
 if __name__ == "__main__":
+    bitacora.mostrar_en_consola('trabajos')
     obtener_datos_banco_mundial()
@@ -0,0 +1,199 @@
+"""Descarga compartida de indicadores del Banco Mundial para los scripts de src/.
+
+Todos los indicadores se descargan en una sola pasada planificada (una
+petición por indicador y lote de países, en paralelo, como un trabajo
+reanudable de trabajos.py) y el resultado se guarda como una
+instantánea local memmap (ver instantaneas.py). panel_economico.py y
+panel_interactivo.py consumen la misma instantánea, de modo que ejecutarlos
+uno detrás de otro sólo descarga los datos una vez, y cargarla no requiere
+deserializar nada.
+"""
+import hashlib
+import os
+import sys
+import time
+
+import pandas as pd
+import world_bank_data as wb
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import trabajos
+import transporte
+import ultimos
+import vuelo_unico
+from bloqueo_archivo import bloqueado
+from instantaneas import ARCHIVO_INDICE, abrir_instantanea, escribir_instantanea, existe_instantanea
+
+# Todas las peticiones de world_bank_data por la sesión HTTP compartida
+transporte.instalar()
+
+# Carpeta de instantáneas locales (compartida por todos los scripts)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache')
+
+# Índice de la última observación por (indicador, país), actualizado en cada descarga
+RUTA_ULTIMOS = os.path.join(CACHE_DIR, 'ultimos.json')
+COLUMNAS = ('Pais', 'Año', 'Valor')
+
+# Horas durante las que una instantánea se considera vigente
+VIGENCIA_HORAS = 24
+
+# Descargas simultáneas contra la API
+MAX_DESCARGAS = 4
+
+# Países por petición
+LOTE_PAISES = 50
+
+
+def planificar_descarga(paises, indicadores, anios=10, lote=LOTE_PAISES):
+    """
+    Construye el plan de descarga: una unidad por indicador y lote de países.
+
+    Returns:
+        list: Unidades (código, info, lote de países, años) en el orden de los indicadores
+    """
+    paises = sorted(set(paises))
+    return [
+        {**unidad, 'info': info}
+        for codigo, info in indicadores.items()
+        for unidad in trabajos.dividir_en_lotes(codigo, paises, lote, mrv=anios)
+    ]
+
+
+def clave_plan(plan):
+    """Identificador estable de un plan (mismos países, indicadores y años -> misma clave)."""
+    huella = hashlib.sha1()
+    for clave in sorted(trabajos.clave_unidad(unidad) for unidad in plan):
+        huella.update(clave.encode('utf-8'))
+    return huella.hexdigest()[:16]
+
+
+def _descargar_unidad(unidad):
+    """Descarga un lote de un indicador y lo devuelve con las columnas Pais, Año y Valor."""
+    codigo = unidad['codigo']
+    # panel_economico y panel_interactivo lanzados a la vez comparten la descarga
+    data = vuelo_unico.ejecutar(
+        vuelo_unico.clave_serie(codigo, unidad['paises'], mrv=unidad['mrv']),
+        lambda: wb.get_series(codigo, country=unidad['paises'], mrv=unidad['mrv'])
+    )
+    if data.empty:
+        return None
+
+    df = data.reset_index()
+    df = df.rename(columns={
+        'Country': 'Pais',
+        'Year': 'Año',
+        codigo: 'Valor'
+    })
+    df = df[['Pais', 'Año', 'Valor']].dropna()
+    return df.assign(Año=df['Año'].astype(int))
+
+
+def ejecutar_plan(plan, max_descargas=MAX_DESCARGAS):
+    """
+    Ejecuta todas las unidades del plan en paralelo como un trabajo reanudable.
+
+    Las unidades que fallan se reintentan; si alguna agota sus intentos, los
+    lotes ya descargados quedan en el manifiesto del trabajo y la siguiente
+    ejecución del mismo plan sólo descarga los que faltan (ver trabajos.py).
+
+    Returns:
+        tuple: (nombre del indicador -> DataFrame con Pais, Año y Valor, unidades fallidas).
+               Sólo se incluyen los indicadores con todos sus lotes descargados.
+    """
+    print(f"\nDescargando {len(plan)} lotes de {len({u['codigo'] for u in plan})} indicadores "
+          f"del Banco Mundial en paralelo...")
+    nombre_trabajo = f"plan_{clave_plan(plan)}"
+    resultados, fallidas = trabajos.ejecutar_trabajo(nombre_trabajo, plan, _descargar_unidad, max_descargas)
+    codigos_fallidos = {u['codigo'] for u in fallidas}
+
+    # Unir los lotes de cada indicador manteniendo el orden del plan
+    lotes_por_indicador = {}
+    for unidad in plan:
+        lotes_por_indicador.setdefault(unidad['codigo'], (unidad['info'], []))[1].append(
+            resultados.get(trabajos.clave_unidad(unidad)))
+
+    datos_completos = {}
+    for codigo, (info, lotes) in lotes_por_indicador.items():
+        nombre = info['nombre']
+        if codigo in codigos_fallidos:
+            print(f"  [X] Faltan lotes de {nombre}; se completarán en la próxima ejecución")
+            continue
+        lotes = [df for df in lotes if df is not None and not df.empty]
+        if lotes:
+            datos_completos[nombre] = pd.concat(lotes, ignore_index=True) if len(lotes) > 1 else lotes[0]
+            print(f"  [OK] Datos obtenidos para {nombre}")
+        else:
+            print(f"  [X] No se encontraron datos para {nombre}")
+
+    if not fallidas:
+        trabajos.limpiar_trabajo(nombre_trabajo)
+    return datos_completos, fallidas
+
+
+def _ruta_instantanea(clave):
+    return os.path.join(CACHE_DIR, f"instantanea_{clave}")
+
+
+def cargar_instantanea(clave, vigencia_horas=VIGENCIA_HORAS):
+    """Abre una instantánea si existe y sigue vigente; si no, devuelve None."""
+    ruta = _ruta_instantanea(clave)
+    if not existe_instantanea(ruta):
+        return None
+    if time.time() - os.path.getmtime(os.path.join(ruta, ARCHIVO_INDICE)) > vigencia_horas * 3600:
+        return None
+    try:
+        return abrir_instantanea(ruta).a_diccionario()
+    except Exception as e:
+        print(f"  [X] No se pudo leer la instantánea local: {str(e)}")
+        return None
+
+
+def guardar_instantanea(clave, datos):
+    """Guarda una instantánea memmap (valores e índice se sustituyen de forma atómica)."""
+    return escribir_instantanea(_ruta_instantanea(clave), datos, metadatos={'plan': clave})
+
+
+def actualizar_ultimos(datos, ruta=RUTA_ULTIMOS):
+    """Incorpora los datos recién descargados al índice de últimos datos (entre procesos, con bloqueo)."""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(f"{ruta}.lock", 'a+b') as archivo, bloqueado(archivo):
+        indice = ultimos.cargar(ruta, COLUMNAS)
+        for nombre, df in datos.items():
+            indice.actualizar(nombre, df)
+        ultimos.guardar(indice, ruta)
+    return indice
+
+
+def cargar_ultimos(ruta=RUTA_ULTIMOS):
+    """Índice de últimos datos de las descargas anteriores (vacío si aún no hay ninguna)."""
+    return ultimos.cargar(ruta, COLUMNAS)
+
+
+def obtener_datos_banco_mundial(paises, indicadores, anios=10, forzar=False):
+    """
+    Obtiene datos del Banco Mundial para los países e indicadores especificados.
+
+    Usa la instantánea local si hay una vigente para el mismo plan; si no,
+    descarga todos los indicadores en una sola pasada y guarda la instantánea.
+
+    Returns:
+        dict: nombre del indicador -> DataFrame con Pais, Año y Valor
+    """
+    plan = planificar_descarga(paises, indicadores, anios)
+    clave = clave_plan(plan)
+
+    if not forzar:
+        datos = cargar_instantanea(clave)
+        if datos is not None:
+            print(f"\nUsando instantánea local de datos ({clave}).")
+            return datos
+
+    datos, fallidas = ejecutar_plan(plan)
+    if datos:
+        actualizar_ultimos(datos)
+    # Con lotes pendientes no se guarda la instantánea: la próxima ejecución
+    # reanuda el trabajo en lugar de reutilizar datos incompletos
+    if datos and not fallidas:
+        ruta = guardar_instantanea(clave, datos)
+        print(f"  [INFO] Instantánea guardada en: {ruta}")
+    return datos
@@ -0,0 +1,178 @@
+"""Ingesta masiva: todos los indicadores de EconoDash para todos los países.
+
+Descarga cada indicador de indicadores.INDICADORES para todos los países
+(no agregados) de wb.get_countries(), en lotes de países que se piden en
+paralelo como un trabajo reanudable (ver trabajos.py). Cada lote
+descargado se valida contra almacen.ESQUEMA; cuando un indicador tiene
+todos sus lotes, se escribe su partición en el almacén (ver almacen.py).
+
+Si la ejecución se interrumpe, la siguiente retoma desde el manifiesto del
+trabajo: sólo se descargan los lotes que faltan.
+
+Uso:
+    python src/ingesta_masiva.py
+    python src/ingesta_masiva.py --indicadores NY.GDP.PCAP.CD SP.POP.TOTL --hilos 8
+    python src/ingesta_masiva.py --desde-cero
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+import world_bank_data as wb
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import almacen
+import bitacora
+import trabajos
+import transporte
+from indicadores import INDICADORES
+
+# Todas las peticiones de world_bank_data por la sesión HTTP compartida
+transporte.instalar()
+
+# Países por petición (la API acepta listas separadas por ';')
+LOTE_PAISES = 50
+
+# Peticiones simultáneas contra la API
+MAX_HILOS = 8
+
+# Rango de años por defecto
+ANIO_INICIO = 1960
+ANIO_FIN = datetime.now().year
+
+CARPETA_PROGRESO = '_progreso'
+
+
+def paises_no_agregados():
+    """Códigos ISO3 y nombres de los países de wb.get_countries() que no son agregados."""
+    paises = wb.get_countries()
+    paises = paises[(paises['region'] != 'Aggregates') & (paises.index.str.len() == 3)]
+    return dict(zip(paises.index, paises['name']))
+
+
+def planificar(indicadores, paises, anio_inicio, anio_fin, lote=LOTE_PAISES):
+    """Divide el trabajo en unidades (indicador, lote de países, rango de años)."""
+    paises = sorted(paises)
+    return [
+        unidad
+        for codigo in indicadores
+        for unidad in trabajos.dividir_en_lotes(codigo, paises, lote, anio_inicio=anio_inicio, anio_fin=anio_fin)
+    ]
+
+
+def descargar_unidad(unidad):
+    """Descarga un lote de países de un indicador y lo valida."""
+    serie = wb.get_series(
+        unidad['codigo'],
+        country=unidad['paises'],
+        date=f"{unidad['anio_inicio']}:{unidad['anio_fin']}",
+        id_or_value='id',
+        simplify_index=False
+    )
+    # Sin simplify_index los niveles Country y Year siguen ahí aunque el lote
+    # tenga un solo país o la ventana un solo año
+    df = serie.droplevel('Series').rename('valor').reset_index()
+    df = df.rename(columns={'Country': 'codigo_pais', 'Year': 'anio'})[['codigo_pais', 'anio', 'valor']]
+    return almacen.validar_esquema(df, unidad['paises'], unidad['anio_inicio'], unidad['anio_fin'])
+
+
+def _consolidar_indicador(codigo, claves, resultados, raiz, nombres_paises):
+    """Une los lotes de un indicador en su partición."""
+    df = pd.concat([resultados[clave] for clave in claves], ignore_index=True)
+    if df.empty:
+        print(f"  [X] {codigo}: la API no devolvió datos para ningún país")
+        return
+    almacen.escribir_particion(codigo, df, raiz, metadatos={
+        'nombre': INDICADORES.get(codigo, {}).get('nombre', codigo),
+        'unidades': claves,
+        'paises_solicitados': len(nombres_paises),
+    })
+    almacen.actualizar_ultimos(codigo, df, raiz)
+    print(f"  [OK] {codigo}: partición escrita ({len(df)} filas, {df['codigo_pais'].nunique()} países)")
+
+
+def _particion_vigente(codigo, claves, raiz):
+    """La partición existe y se construyó con exactamente estas unidades."""
+    if not almacen.existe_particion(codigo, raiz):
+        return False
+    metadatos = almacen.abrir_particion(codigo, raiz).indice.get('metadatos', {})
+    return metadatos.get('unidades') == claves
+
+
+def ingerir(indicadores=None, anio_inicio=ANIO_INICIO, anio_fin=ANIO_FIN, raiz=almacen.ALMACEN_DIR,
+            lote=LOTE_PAISES, max_hilos=MAX_HILOS, desde_cero=False):
+    """
+    Construye (o completa) el almacén con todos los indicadores y países.
+
+    Returns:
+        bool: True si todas las unidades terminaron bien
+    """
+    inicio = time.perf_counter()
+    indicadores = list(indicadores or INDICADORES)
+    if desde_cero:
+        shutil.rmtree(raiz, ignore_errors=True)
+
+    print("Obteniendo la lista de países del Banco Mundial...")
+    nombres_paises = paises_no_agregados()
+    unidades = planificar(indicadores, nombres_paises, anio_inicio, anio_fin, lote)
+    claves = {codigo: [trabajos.clave_unidad(u) for u in unidades if u['codigo'] == codigo] for codigo in indicadores}
+    vigentes = [c for c in indicadores if _particion_vigente(c, claves[c], raiz)]
+    pendientes = [u for u in unidades if u['codigo'] not in vigentes]
+    print(f"{len(indicadores)} indicadores x {len(nombres_paises)} países = {len(unidades)} lotes "
+          f"({len(vigentes)} indicadores ya al día)")
+
+    # Los lotes descargados se guardan en el manifiesto del trabajo, dentro del
+    # almacén: si la ingesta se interrumpe, la siguiente sólo descarga los que faltan
+    progreso = os.path.join(raiz, CARPETA_PROGRESO)
+    nombre_trabajo = 'ingesta_masiva'
+    resultados, fallidas = trabajos.ejecutar_trabajo(
+        nombre_trabajo, pendientes, descargar_unidad, max_hilos,
+        no_reintentar=(almacen.ErrorEsquema,), vigencia_horas=None, raiz=progreso
+    )
+
+    # Consolidar los indicadores con todos sus lotes descargados
+    for codigo in indicadores:
+        if codigo not in vigentes and all(clave in resultados for clave in claves[codigo]):
+            _consolidar_indicador(codigo, claves[codigo], resultados, raiz, nombres_paises)
+    if not fallidas:
+        trabajos.limpiar_trabajo(nombre_trabajo, progreso)
+        shutil.rmtree(progreso, ignore_errors=True)
+
+    almacen.escribir_catalogo({
+        'actualizado': datetime.now().isoformat(timespec='seconds'),
+        'anio_inicio': anio_inicio,
+        'anio_fin': anio_fin,
+        'paises': nombres_paises,
+        'indicadores': {c: INDICADORES.get(c, {}).get('nombre', c) for c in almacen.particiones(raiz)},
+    }, raiz)
+
+    print(f"\nIngesta terminada en {time.perf_counter() - inicio:.1f} s: "
+          f"{len(almacen.particiones(raiz))} particiones en {raiz}")
+    if fallidas:
+        print(f"  [X] {len(fallidas)} lotes fallaron; vuelve a ejecutar el comando para reintentarlos.")
+    return not fallidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingesta masiva del Banco Mundial al almacén local")
+    parser.add_argument('--indicadores', nargs='+', help="Códigos a descargar (por defecto: todos)")
+    parser.add_argument('--desde', type=int, default=ANIO_INICIO, help="Primer año")
+    parser.add_argument('--hasta', type=int, default=ANIO_FIN, help="Último año")
+    parser.add_argument('--lote', type=int, default=LOTE_PAISES, help="Países por petición")
+    parser.add_argument('--hilos', type=int, default=MAX_HILOS, help="Peticiones simultáneas")
+    parser.add_argument('--destino', default=almacen.ALMACEN_DIR, help="Carpeta del almacén")
+    parser.add_argument('--desde-cero', action='store_true', help="Descartar el almacén y los puntos de control")
+    args = parser.parse_args()
+    bitacora.mostrar_en_consola('trabajos')
+
+    correcto = ingerir(args.indicadores, args.desde, args.hasta, args.destino,
+                       args.lote, args.hilos, args.desde_cero)
+    sys.exit(0 if correcto else 1)
+
+
+if __name__ == "__main__":
+    main()
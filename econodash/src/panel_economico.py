@@ -1,9 +1,12 @@
-import world_bank_data as wb
 import matplotlib.pyplot as plt
 import pandas as pd
 import os
 from datetime import datetime
 
+from ingesta import cargar_ultimos, obtener_datos_banco_mundial
+from renderizado import escribir_atomico, renderizar_graficos, tarea_grafico
+import bitacora  # ingesta añade la raíz del proyecto a sys.path
+
 # Configuración de visualización
 pd.set_option('display.max_columns', None)
 pd.set_option('display.max_rows', 10)
@@ -13,6 +16,11 @@ plt.style.use('ggplot')  # Usando 'ggplot' en lugar de 'seaborn' para mejor comp
 OUTPUT_DIR = '../output'
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Formatos en los que se exporta cada gráfico (formato y resolución por salida)
+FORMATOS_SALIDA = [
+    {'formato': 'png', 'dpi': 300}
+]
+
 # Definición de indicadores
 INDICADORES = {
     'NY.GDP.PCAP.CD': {
@@ -37,106 +45,96 @@ INDICADORES = {
     }
 }
 
-def obtener_datos_banco_mundial(paises, indicadores, anios=10):
-    """Obtiene datos del Banco Mundial para los países e indicadores especificados."""
-    print("\nDescargando datos del Banco Mundial...")
-    
-    datos_completos = {}
-    
-    for codigo, info in indicadores.items():
-        try:
-            print(f"Obteniendo datos para {info['nombre']}...")
-            data = wb.get_series(codigo, country=paises, mrv=anios)
-            
-            if not data.empty:
-                df = data.reset_index()
-                df = df.rename(columns={
-                    'Country': 'Pais',
-                    'Year': 'Año',
-                    codigo: 'Valor'
-                })
-                
-                # Filtrar solo las columnas necesarias
-                df = df[['Pais', 'Año', 'Valor']].dropna()
-                
-                # Guardar los datos
-                datos_completos[info['nombre']] = df
-                print(f"  [OK] Datos obtenidos para {info['nombre']}")
-            else:
-                print(f"  [X] No se encontraron datos para {info['nombre']}")
-                
-        except Exception as e:
-            print(f"  [ERROR] Error al obtener datos para {info['nombre']}: {str(e)}")
-    
-    return datos_completos
-
-def generar_grafico_evolucion(datos, indicador_info, ruta_guardado):
+def generar_grafico_evolucion(datos, indicador_info, ruta_guardado, formato='png', dpi=300):
     """Genera un gráfico de evolución temporal para un indicador."""
-    plt.figure(figsize=(12, 6))
+    fig, ax = plt.subplots(figsize=(12, 6))
     
-    for pais in datos['Pais'].unique():
-        datos_pais = datos[datos['Pais'] == pais]
-        plt.plot(datos_pais['Año'], datos_pais['Valor'], 
+    for pais, datos_pais in datos.groupby('Pais', sort=False):
+        ax.plot(datos_pais['Año'], datos_pais['Valor'], 
                 label=pais, marker='o', markersize=5)
     
-    plt.title(f"{indicador_info['nombre']} por país")
-    plt.xlabel('Año')
-    plt.ylabel(indicador_info['unidad'])
-    plt.grid(True, linestyle='--', alpha=0.7)
-    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
+    ax.set_title(f"{indicador_info['nombre']} por país")
+    ax.set_xlabel('Año')
+    ax.set_ylabel(indicador_info['unidad'])
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
     
     # Guardar el gráfico
-    nombre_archivo = f"{indicador_info['nombre'].lower().replace(' ', '_')}.png"
+    nombre_archivo = f"{indicador_info['nombre'].lower().replace(' ', '_')}.{formato}"
     ruta_completa = os.path.join(ruta_guardado, nombre_archivo)
-    plt.savefig(ruta_completa, bbox_inches='tight', dpi=300)
-    plt.close()
+    escribir_atomico(
+        ruta_completa,
+        lambda ruta_tmp: fig.savefig(ruta_tmp, format=formato, bbox_inches='tight', dpi=dpi)
+    )
+    plt.close(fig)
     
     return ruta_completa
 
-def generar_informe(datos_por_indicador, ruta_guardado):
-    """Genera un informe con los datos obtenidos."""
+def generar_informe(datos_por_indicador, ruta_guardado, indice=None):
+    """
+    Genera un informe con los datos obtenidos.
+    
+    Los últimos datos por país se leen de ``indice`` (ver ultimos.py); los
+    indicadores que no estén en él se indexan a partir de ``datos_por_indicador``.
+    """
+    if indice is None:
+        indice = cargar_ultimos()
     print("\nGenerando informe...")
-    print("  [INFO] Procesando graficos...")
     
-    with open(os.path.join(ruta_guardado, 'informe_economico.txt'), 'w', encoding='utf-8') as f:
-        f.write("=== INFORME ECONÓMICO ===\n")
-        f.write(f"Generado el: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        for indicador, datos in datos_por_indicador.items():
-            if datos is not None and not datos.empty:
-                f.write(f"\n=== {indicador.upper()} ===\n")
-                f.write("Últimos datos disponibles por país:\n\n")
-                
-                # Obtener el último año disponible para cada país
-                ultimos_datos = datos.loc[datos.groupby('Pais')['Año'].idxmax()]
-                f.write(ultimos_datos.to_string(index=False))
-                f.write("\n\n")
-                
-                # Generar gráfico
-                ruta_grafico = generar_grafico_evolucion(
-                    datos, 
-                    {'nombre': indicador, 'unidad': next((v['unidad'] for k, v in INDICADORES.items() 
-                                                      if v['nombre'] == indicador), '')},
-                    ruta_guardado
-                )
-                print(f"  [OK] Grafico generado: {ruta_grafico}")
+    lineas = [
+        "=== INFORME ECONÓMICO ===\n",
+        f"Generado el: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+    ]
+    tareas = []
+    
+    for indicador, datos in datos_por_indicador.items():
+        if datos is not None and not datos.empty:
+            lineas.append(f"\n=== {indicador.upper()} ===\n")
+            lineas.append("Últimos datos disponibles por país:\n\n")
+            
+            # Último año disponible para cada país, desde el índice de últimos datos;
+            # el índice se comparte entre ejecuciones con otros países, así que se
+            # completa con los países pedidos que aún no tenga
+            faltan = indice.faltantes(indicador, datos['Pais'])
+            if faltan:
+                indice.actualizar(indicador, datos[datos['Pais'].isin(faltan)])
+            ultimos_datos = indice.consultar(indicador, datos['Pais'].unique())
+            lineas.append(ultimos_datos.to_string(index=False))
+            lineas.append("\n\n")
+            
+            # Los gráficos se generan después, todos en paralelo
+            info = {'nombre': indicador, 'unidad': next((v['unidad'] for k, v in INDICADORES.items() 
+                                                          if v['nombre'] == indicador), '')}
+            for salida in FORMATOS_SALIDA:
+                tareas.append(tarea_grafico(generar_grafico_evolucion, datos, info, ruta_guardado,
+                                            formato=salida['formato'], dpi=salida.get('dpi')))
+    
+    ruta_informe = os.path.join(ruta_guardado, 'informe_economico.txt')
+    
+    def escribir_informe(ruta_tmp):
+        with open(ruta_tmp, 'w', encoding='utf-8') as f:
+            f.writelines(lineas)
+    
+    escribir_atomico(ruta_informe, escribir_informe)
+    
+    print(f"  [INFO] Procesando {len(tareas)} graficos en paralelo...")
+    for ruta_grafico in renderizar_graficos(tareas):
+        if ruta_grafico:
+            print(f"  [OK] Grafico generado: {ruta_grafico}")
     
-    print(f"\n[OK] Informe generado en: {os.path.join(ruta_guardado, 'informe_economico.txt')}")
+    print(f"\n[OK] Informe generado en: {ruta_informe}")
 
 def main():
     print("=== EconoDash - Panel de Analisis Economico ===\n")
+    bitacora.mostrar_en_consola('trabajos')
     
     # Configuración
     paises = ['MEX', 'USA', 'CAN', 'BRA', 'ESP']
     
     # Obtener datos
-    datos_por_indicador = {}
-    for codigo, info in INDICADORES.items():
-        datos = obtener_datos_banco_mundial(paises, {codigo: info})
-        if datos:
-            datos_por_indicador.update(datos)
+    datos_por_indicador = obtener_datos_banco_mundial(paises, INDICADORES)
     
     # Generar informe
     if datos_por_indicador:
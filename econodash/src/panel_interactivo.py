@@ -1,14 +1,34 @@
-import world_bank_data as wb
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 import os
+import sys
+import math
+import argparse
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bitacora
+import importaciones
+from indicadores import INDICADORES as INDICADORES_APP
+from ingesta import obtener_datos_banco_mundial
+from renderizado import escribir_atomico, renderizar_graficos, tarea_grafico
+from sitio_estatico import exportar_sitio_estatico
+
 # Configuración de directorios
 OUTPUT_DIR = '../output'
+SITIO_DIR = os.path.join(OUTPUT_DIR, 'sitio')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Formatos en los que se exporta cada gráfico (html o formatos estáticos vía kaleido)
+FORMATOS_SALIDA = [
+    {'formato': 'html'}
+]
+
+# A partir de este número de puntos (todas las trazas juntas) el dashboard usa
+# WebGL (Scattergl): los 14 indicadores x 5 países x 10 años son ~700 puntos
+UMBRAL_PUNTOS_WEBGL = 500
+
 # Definición de indicadores
 INDICADORES = {
     'NY.GDP.PCAP.CD': {
@@ -33,39 +53,8 @@ INDICADORES = {
     }
 }
 
-def obtener_datos_banco_mundial(paises, indicadores, anios=10):
-    """Obtiene datos del Banco Mundial para los países e indicadores especificados."""
-    print("\nDescargando datos del Banco Mundial...")
-    
-    datos_completos = {}
-    
-    for codigo, info in indicadores.items():
-        try:
-            print(f"Obteniendo datos para {info['nombre']}...")
-            data = wb.get_series(codigo, country=paises, mrv=anios)
-            
-            if not data.empty:
-                df = data.reset_index()
-                df = df.rename(columns={
-                    'Country': 'Pais',
-                    'Year': 'Año',
-                    codigo: 'Valor'
-                })
-                
-                df = df[['Pais', 'Año', 'Valor']].dropna()
-                
-                datos_completos[info['nombre']] = df
-                print(f"  [OK] Datos obtenidos para {info['nombre']}")
-            else:
-                print(f"  [X] No se encontraron datos para {info['nombre']}")
-                
-        except Exception as e:
-            print(f"  [ERROR] Error al obtener datos para {info['nombre']}: {str(e)}")
-    
-    return datos_completos
-
-def generar_grafico_interactivo(datos, indicador_info, ruta_guardado):
-    """Genera un gráfico interactivo con Plotly (solo HTML, sin PNG)."""
+def generar_grafico_interactivo(datos, indicador_info, ruta_guardado, formato='html', dpi=None):
+    """Genera un gráfico interactivo con Plotly (HTML por defecto)."""
 
     fig = px.line(
         datos, 
@@ -97,87 +86,151 @@ def generar_grafico_interactivo(datos, indicador_info, ruta_guardado):
         )
     
     # Guardar solo HTML (compatible con Streamlit Cloud)
-    nombre_archivo = f"{indicador_info['nombre'].lower().replace(' ', '_')}_interactivo.html"
-    ruta_completa = os.path.join(ruta_guardado, nombre_archivo)
-    
-    fig.write_html(ruta_completa, include_plotlyjs='cdn')
-
-    # Se elimina la exportación PNG que generaba el error en el deploy
-    ruta_imagen = None  # Antes generaba PNG, ahora no
+    if formato == 'html':
+        nombre_archivo = f"{indicador_info['nombre'].lower().replace(' ', '_')}_interactivo.html"
+        ruta_completa = os.path.join(ruta_guardado, nombre_archivo)
+        escribir_atomico(ruta_completa, lambda ruta_tmp: fig.write_html(ruta_tmp, include_plotlyjs='cdn'))
+        ruta_imagen = None
+    else:
+        # Exportación estática opcional (requiere kaleido)
+        nombre_archivo = f"{indicador_info['nombre'].lower().replace(' ', '_')}_interactivo.{formato}"
+        ruta_imagen = os.path.join(ruta_guardado, nombre_archivo)
+        escala = (dpi or 100) / 100
+        importaciones.configurar_exportacion_estatica()
+        escribir_atomico(ruta_imagen, lambda ruta_tmp: fig.write_image(ruta_tmp, format=formato, scale=escala))
+        ruta_completa = None
     
     return ruta_completa, ruta_imagen
 
-def generar_dashboard(datos_por_indicador, ruta_guardado):
-    """Genera un dashboard HTML con todos los gráficos."""
-    print("\nGenerando dashboard interactivo...")
-    
-    from plotly.subplots import make_subplots
-    import plotly.graph_objects as go
+def calcular_cuadricula(n_indicadores, max_columnas=3):
+    """Calcula filas y columnas del dashboard según el número de indicadores."""
+    if n_indicadores <= 0:
+        return 1, 1
+    if n_indicadores <= 2:
+        columnas = n_indicadores
+    elif n_indicadores <= 4:
+        columnas = 2
+    else:
+        columnas = max_columnas
+    filas = math.ceil(n_indicadores / columnas)
+    return filas, columnas
 
-    fig = make_subplots(
-        rows=2,
-        cols=2,
-        subplot_titles=[f"{k} ({v['unidad']})" for k, v in INDICADORES.items()]
-    )
+def construir_dashboard(datos_por_indicador, indicadores=None):
+    """Figura del dashboard: un gráfico por indicador con datos, en cuadrícula."""
+    from plotly.subplots import make_subplots
+    
+    indicadores = indicadores or INDICADORES
     
-    for i, (indicador, datos) in enumerate(datos_por_indicador.items(), 1):
+    # Indicadores con datos, en el orden en que se descargaron
+    validos = []
+    for indicador, datos in datos_por_indicador.items():
         if datos is None or datos.empty:
             continue
-            
-        info = next((v for k, v in INDICADORES.items() if v['nombre'] == indicador), None)
-        if not info:
-            continue
+        info = next((v for k, v in indicadores.items() if v['nombre'] == indicador), None)
+        if info:
+            validos.append((indicador, info, datos))
+    
+    filas, columnas = calcular_cuadricula(len(validos))
+    fig = make_subplots(
+        rows=filas,
+        cols=columnas,
+        subplot_titles=[f"{indicador} ({info['unidad']})" for indicador, info, _ in validos],
+        vertical_spacing=min(0.08, 0.3 / filas)
+    )
+    
+    if validos:
+        # Una sola pasada agrupada sobre todos los indicadores y países
+        combinado = pd.concat(
+            [datos[['Pais', 'Año', 'Valor']].assign(_panel=i) for i, (_, _, datos) in enumerate(validos)],
+            ignore_index=True
+        ).sort_values(['_panel', 'Pais', 'Año'])
+        grupos = combinado.groupby(['_panel', 'Pais'], sort=False)
+        
+        # Con muchos puntos se usa WebGL y líneas sin marcadores
+        usar_webgl = len(combinado) > UMBRAL_PUNTOS_WEBGL
+        Traza = go.Scattergl if usar_webgl else go.Scatter
+        modo = 'lines' if usar_webgl else 'lines+markers'
         
-        row = (i - 1) // 2 + 1
-        col = (i - 1) % 2 + 1
+        # Un color por país, el mismo en todos los gráficos, y una sola entrada de leyenda
+        paleta = px.colors.qualitative.Plotly
+        colores = {pais: paleta[i % len(paleta)] for i, pais in enumerate(combinado['Pais'].unique())}
         
-        for pais in datos['Pais'].unique():
-            df_pais = datos[datos['Pais'] == pais]
-            fig.add_trace(
-                go.Scatter(
-                    x=df_pais['Año'],
-                    y=df_pais['Valor'],
-                    name=pais,
-                    mode='lines+markers',
-                    showlegend=(i == 1)  # leyenda solo en el primer gráfico
-                ),
-                row=row,
-                col=col
-            )
+        trazas, filas_trazas, columnas_trazas = [], [], []
+        en_leyenda = set()
+        for (panel, pais), df_pais in grupos:
+            trazas.append(Traza(
+                x=df_pais['Año'].to_numpy(),
+                y=df_pais['Valor'].to_numpy(),
+                name=str(pais),
+                mode=modo,
+                legendgroup=str(pais),
+                showlegend=pais not in en_leyenda,
+                line=dict(color=colores[pais])
+            ))
+            en_leyenda.add(pais)
+            filas_trazas.append(panel // columnas + 1)
+            columnas_trazas.append(panel % columnas + 1)
+        
+        fig.add_traces(trazas, rows=filas_trazas, cols=columnas_trazas)
     
     fig.update_layout(
         title_text='Panel Económico Interactivo',
-        height=1000,
+        height=max(500, 350 * filas),
         showlegend=True,
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
     )
+    return fig
+
+def generar_dashboard(datos_por_indicador, ruta_guardado, indicadores=None):
+    """Genera un dashboard HTML con todos los gráficos."""
+    print("\nGenerando dashboard interactivo...")
     
+    fig = construir_dashboard(datos_por_indicador, indicadores)
     ruta_dashboard = os.path.join(ruta_guardado, 'dashboard_economico.html')
-    fig.write_html(ruta_dashboard, include_plotlyjs='cdn')
+    escribir_atomico(ruta_dashboard, lambda ruta_tmp: fig.write_html(ruta_tmp, include_plotlyjs='cdn'))
     
     print(f"[OK] Dashboard generado en: {ruta_dashboard}")
     return ruta_dashboard
 
 def main():
+    parser = argparse.ArgumentParser(description="Panel de Análisis Económico Interactivo")
+    parser.add_argument('--estatico', action='store_true',
+                        help="Exportar un sitio estático sin conexión (plotly.js local y datos en JSON)")
+    parser.add_argument('--todos-los-indicadores', action='store_true',
+                        help="Usar los 14 indicadores del panel (indicadores.py) en lugar de los 4 básicos")
+    args = parser.parse_args()
+    indicadores = INDICADORES_APP if args.todos_los_indicadores else INDICADORES
+    
     print("=== EconoDash - Panel de Analisis Economico Interactivo ===\n")
+    bitacora.mostrar_en_consola('trabajos')
     
     paises = ['MEX', 'USA', 'CAN', 'BRA', 'ESP']
     
-    datos_por_indicador = {}
-    for codigo, info in INDICADORES.items():
-        datos = obtener_datos_banco_mundial(paises, {codigo: info})
-        if datos:
-            datos_por_indicador.update(datos)
+    datos_por_indicador = obtener_datos_banco_mundial(paises, indicadores)
+    
+    if args.estatico:
+        print("\nExportando sitio estático...")
+        ruta_index = exportar_sitio_estatico(datos_por_indicador, indicadores, SITIO_DIR)
+        print(f"[OK] Sitio listo en: {os.path.abspath(os.path.dirname(ruta_index))}")
+        print("Sírvelo con: python -m http.server --directory " + os.path.abspath(SITIO_DIR))
+        return
     
     print("\nGenerando gráficos individuales...")
+    tareas = []
     for indicador, datos in datos_por_indicador.items():
         if datos is not None and not datos.empty:
-            info = next((v for k, v in INDICADORES.items() if v['nombre'] == indicador), None)
+            info = next((v for k, v in indicadores.items() if v['nombre'] == indicador), None)
             if info:
-                ruta_html, ruta_img = generar_grafico_interactivo(datos, info, OUTPUT_DIR)
-                print(f"  [OK] Gráfico HTML: {ruta_html}")
+                for salida in FORMATOS_SALIDA:
+                    tareas.append(tarea_grafico(generar_grafico_interactivo, datos, info, OUTPUT_DIR,
+                                                formato=salida['formato'], dpi=salida.get('dpi')))
+    
+    for resultado in renderizar_graficos(tareas):
+        if resultado:
+            ruta_html, ruta_img = resultado
+            print(f"  [OK] Gráfico: {ruta_html or ruta_img}")
     
-    ruta_dashboard = generar_dashboard(datos_por_indicador, OUTPUT_DIR)
+    ruta_dashboard = generar_dashboard(datos_por_indicador, OUTPUT_DIR, indicadores)
     
     print("\n¡Análisis completado exitosamente!")
     print(f"Dashboard listo en: {os.path.abspath(ruta_dashboard)}")
@@ -0,0 +1,118 @@
+"""Renderizado de gráficos en paralelo para los scripts de src/.
+
+Cada gráfico se describe como una tarea (función constructora, datos,
+información del indicador, formato y DPI) y las tareas se reparten entre
+un pool de procesos. Matplotlib usa siempre el backend no interactivo Agg
+y todos los archivos se escriben de forma atómica: primero a un archivo
+temporal en el mismo directorio y después se renombra con os.replace, de
+modo que nunca queda un gráfico a medio escribir en la carpeta de salida.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Formato y resolución por defecto si la tarea no indica otros
+FORMATO_POR_DEFECTO = 'png'
+DPI_POR_DEFECTO = 300
+
+
+def _inicializar_proceso():
+    """Configura cada proceso del pool con el backend no interactivo de matplotlib."""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def escribir_atomico(ruta, escribir):
+    """
+    Escribe un archivo de forma atómica.
+
+    Args:
+        ruta: Ruta final del archivo
+        escribir: Función que recibe la ruta temporal y escribe en ella el contenido
+
+    Returns:
+        str: La ruta final del archivo
+    """
+    directorio, nombre = os.path.split(os.path.abspath(ruta))
+    ruta_temporal = os.path.join(directorio, f".{nombre}.{os.getpid()}.tmp")
+    try:
+        escribir(ruta_temporal)
+        os.replace(ruta_temporal, ruta)
+    finally:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+    return ruta
+
+
+def tarea_grafico(funcion, datos, indicador_info, ruta_guardado, formato=None, dpi=None):
+    """
+    Describe un gráfico a renderizar.
+
+    Args:
+        funcion: Función a nivel de módulo que genera el gráfico. Se llama como
+            funcion(datos, indicador_info, ruta_guardado, formato=..., dpi=...)
+        datos: DataFrame con las columnas Pais, Año y Valor
+        indicador_info: Diccionario con nombre, unidad, etc. del indicador
+        ruta_guardado: Carpeta de salida
+        formato: Formato del archivo (png, svg, pdf, html...)
+        dpi: Resolución para formatos rasterizados
+    """
+    return {
+        'funcion': funcion,
+        'datos': datos,
+        'indicador_info': indicador_info,
+        'ruta_guardado': ruta_guardado,
+        'formato': formato or FORMATO_POR_DEFECTO,
+        'dpi': dpi or DPI_POR_DEFECTO
+    }
+
+
+def _ejecutar_tarea(tarea):
+    """Ejecuta una tarea de renderizado (en el proceso del pool)."""
+    return tarea['funcion'](
+        tarea['datos'],
+        tarea['indicador_info'],
+        tarea['ruta_guardado'],
+        formato=tarea['formato'],
+        dpi=tarea['dpi']
+    )
+
+
+def renderizar_graficos(tareas, max_procesos=None):
+    """
+    Renderiza una lista de tareas de gráficos repartiéndolas en un pool de procesos.
+
+    Args:
+        tareas: Lista de tareas creadas con tarea_grafico
+        max_procesos: Número máximo de procesos (por defecto, número de CPUs)
+
+    Returns:
+        list: Resultados de cada tarea, en el mismo orden que las tareas
+            (None para las tareas que fallaron)
+    """
+    if not tareas:
+        return []
+
+    max_procesos = max_procesos or os.cpu_count() or 1
+    resultados = [None] * len(tareas)
+
+    # Con un solo proceso no compensa levantar el pool
+    if max_procesos == 1 or len(tareas) == 1:
+        _inicializar_proceso()
+        for i, tarea in enumerate(tareas):
+            try:
+                resultados[i] = _ejecutar_tarea(tarea)
+            except Exception as e:
+                print(f"  [ERROR] No se pudo generar el gráfico de {tarea['indicador_info']['nombre']}: {str(e)}")
+        return resultados
+
+    with ProcessPoolExecutor(max_workers=min(max_procesos, len(tareas)),
+                             initializer=_inicializar_proceso) as pool:
+        futuros = {pool.submit(_ejecutar_tarea, tarea): i for i, tarea in enumerate(tareas)}
+        for futuro in as_completed(futuros):
+            i = futuros[futuro]
+            try:
+                resultados[i] = futuro.result()
+            except Exception as e:
+                print(f"  [ERROR] No se pudo generar el gráfico de {tareas[i]['indicador_info']['nombre']}: {str(e)}")
+
+    return resultados
@@ -0,0 +1,186 @@
+"""Exportación del panel interactivo como sitio estático sin conexión.
+
+Genera un sitio de varias páginas que se puede servir desde cualquier
+servidor estático local (por ejemplo ``python -m http.server``):
+
+    sitio/
+        index.html          Índice con enlaces a cada indicador
+        dashboard.html      Todos los indicadores en una sola página
+        <indicador>.html    Una página por indicador
+        plotly.min.js       Única copia de plotly.js, compartida por todas las páginas
+        econodash.js        Código que carga los datos y dibuja los gráficos
+        datos/<indicador>.json
+                            Datos de cada gráfico en JSON compacto (columnar),
+                            que se descargan sólo cuando la página los necesita
+"""
+import json
+import os
+import unicodedata
+
+import numpy as np
+
+from renderizado import escribir_atomico
+
+_PLANTILLA_PAGINA = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>{titulo}</title>
+<link rel="stylesheet" href="estilo.css">
+{cabecera}</head>
+<body>
+<nav><a href="index.html">&larr; Índice</a></nav>
+<h1>{titulo}</h1>
+{contenido}
+{script}</body>
+</html>
+"""
+
+# Scripts que sólo cargan las páginas con gráficos (plotly.min.js pesa ~3.5 MB)
+_CABECERA_GRAFICOS = """<script src="plotly.min.js"></script>
+<script src="econodash.js"></script>
+"""
+
+_ESTILO = """body { font-family: Arial, sans-serif; margin: 2rem; color: #222; }
+nav { margin-bottom: 1rem; }
+ul { line-height: 1.8; }
+.grafico { width: 100%; height: 520px; margin-bottom: 2rem; }
+.error { color: #a00; border: 1px solid #a00; padding: 1rem; height: auto; }
+"""
+
+# Dibuja un gráfico de líneas por país a partir de los datos columnares; si los
+# datos no se pueden cargar (p. ej. el sitio abierto con file://) lo dice en la página
+_SCRIPT = """function econodashGrafico(idDiv, urlDatos) {
+  fetch(urlDatos).then(function (r) {
+    if (!r.ok) { throw new Error('HTTP ' + r.status); }
+    return r.json();
+  }).then(function (d) {
+    var trazas = d.paises.map(function (pais, i) {
+      return {x: d.anios, y: d.valores[i], name: pais, type: 'scatter',
+              mode: 'lines+markers', connectgaps: false};
+    });
+    var titulo = d.nombre + ' (' + d.unidad + ')';
+    var layout = {title: {text: d.nombre + ' por país'},
+                  xaxis: {title: {text: 'Año'}}, yaxis: {title: {text: titulo}},
+                  hovermode: 'x unified', legend: {title: {text: 'País'}}};
+    if (d.es_porcentaje && d.promedio !== null) {
+      layout.shapes = [{type: 'line', xref: 'paper', x0: 0, x1: 1, y0: d.promedio, y1: d.promedio,
+                        line: {dash: 'dash', color: 'red'}}];
+    }
+    Plotly.newPlot(idDiv, trazas, layout, {responsive: true});
+  }).catch(function (error) {
+    var div = document.getElementById(idDiv);
+    div.classList.add('error');
+    div.textContent = 'No se pudieron cargar los datos de ' + urlDatos + ' (' + error.message + '). ' +
+      'Si abriste el sitio como archivo (file://), sírvelo con un servidor local, ' +
+      'por ejemplo: python -m http.server';
+  });
+}
+"""
+
+
+def _slug(nombre):
+    """Nombre de archivo seguro (ASCII, minúsculas, guiones bajos) para un indicador."""
+    ascii_ = unicodedata.normalize('NFKD', nombre).encode('ascii', 'ignore').decode('ascii')
+    return ''.join(c if c.isalnum() else '_' for c in ascii_.lower()).strip('_')
+
+
+def datos_grafico(datos, indicador_info):
+    """
+    Convierte los datos de un indicador a un diccionario columnar compacto.
+
+    Los valores se guardan como una matriz país x año (null donde no hay dato)
+    en lugar de una fila por observación.
+    """
+    tabla = datos.pivot_table(index='Pais', columns='Año', values='Valor', aggfunc='first')
+    valores = tabla.to_numpy(dtype=float)
+    return {
+        'nombre': indicador_info['nombre'],
+        'unidad': indicador_info['unidad'],
+        'es_porcentaje': bool(indicador_info.get('es_porcentaje', False)),
+        'promedio': float(np.nanmean(valores)) if np.isfinite(valores).any() else None,
+        'paises': [str(p) for p in tabla.index],
+        'anios': [int(a) for a in tabla.columns],
+        'valores': [[None if np.isnan(v) else round(float(v), 6) for v in fila] for fila in valores]
+    }
+
+
+def _escribir_texto(ruta, texto):
+    def escribir(ruta_tmp):
+        with open(ruta_tmp, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    return escribir_atomico(ruta, escribir)
+
+
+def _pagina(titulo, contenido, script=''):
+    """HTML de una página; plotly.js y econodash.js sólo se incluyen si dibuja algún gráfico."""
+    if not script:
+        return _PLANTILLA_PAGINA.format(titulo=titulo, contenido=contenido, cabecera='', script='')
+    return _PLANTILLA_PAGINA.format(titulo=titulo, contenido=contenido, cabecera=_CABECERA_GRAFICOS,
+                                    script=f"<script>{script}</script>\n")
+
+
+def _div_grafico(id_div, url_datos):
+    return (f'<div id="{id_div}" class="grafico"></div>',
+            f'econodashGrafico("{id_div}", "{url_datos}");')
+
+
+def exportar_sitio_estatico(datos_por_indicador, indicadores, ruta_sitio):
+    """
+    Genera el sitio estático completo.
+
+    Args:
+        datos_por_indicador: nombre del indicador -> DataFrame con Pais, Año y Valor
+        indicadores: Definición de los indicadores (para unidad y tipo)
+        ruta_sitio: Carpeta de salida del sitio
+
+    Returns:
+        str: Ruta del index.html generado
+    """
+    from plotly.offline import get_plotlyjs
+
+    os.makedirs(os.path.join(ruta_sitio, 'datos'), exist_ok=True)
+
+    # Recursos compartidos: una sola copia de plotly.js para todo el sitio
+    _escribir_texto(os.path.join(ruta_sitio, 'plotly.min.js'), get_plotlyjs())
+    _escribir_texto(os.path.join(ruta_sitio, 'econodash.js'), _SCRIPT)
+    _escribir_texto(os.path.join(ruta_sitio, 'estilo.css'), _ESTILO)
+
+    paginas = []
+    for nombre, datos in datos_por_indicador.items():
+        if datos is None or datos.empty:
+            continue
+        info = next((v for v in indicadores.values() if v['nombre'] == nombre), None)
+        if not info:
+            continue
+
+        slug = _slug(nombre)
+        _escribir_texto(
+            os.path.join(ruta_sitio, 'datos', f"{slug}.json"),
+            json.dumps(datos_grafico(datos, info), ensure_ascii=False, separators=(',', ':'))
+        )
+
+        div, script = _div_grafico('grafico', f"datos/{slug}.json")
+        _escribir_texto(
+            os.path.join(ruta_sitio, f"{slug}.html"),
+            _pagina(f"{nombre} ({info['unidad']})", div, script)
+        )
+        paginas.append((slug, nombre, info))
+
+    # Dashboard con todos los indicadores
+    divs, scripts = zip(*[_div_grafico(f"grafico_{slug}", f"datos/{slug}.json") for slug, _, _ in paginas]) \
+        if paginas else ((), ())
+    _escribir_texto(
+        os.path.join(ruta_sitio, 'dashboard.html'),
+        _pagina('Panel Económico Interactivo', '\n'.join(divs), '\n'.join(scripts))
+    )
+
+    enlaces = ['<li><a href="dashboard.html">Panel completo</a></li>'] + [
+        f'<li><a href="{slug}.html">{nombre}</a> ({info["unidad"]})</li>' for slug, nombre, info in paginas
+    ]
+    ruta_index = os.path.join(ruta_sitio, 'index.html')
+    _escribir_texto(
+        ruta_index,
+        _pagina('EconoDash - Panel Económico', '<ul>\n' + '\n'.join(enlaces) + '\n</ul>')
+    )
+    return ruta_index
@@ -1,6 +1,11 @@
 import world_bank_data as wb
 import pandas as pd
 
+import transporte
+
+# Probar la conexión con el mismo transporte HTTP que usan las apps
+transporte.instalar()
+
 def test_connection():
     print("Probando conexión con la API del Banco Mundial...")
     
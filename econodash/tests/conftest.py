@@ -0,0 +1,12 @@
+"""Configuración común de las pruebas.
+
+Los módulos de EconoDash se importan por su nombre (``import almacen``),
+igual que desde las apps y los scripts de src/.
+"""
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for ruta in (RAIZ, os.path.join(RAIZ, 'src')):
+    if ruta not in sys.path:
+        sys.path.insert(0, ruta)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import almacen
+
+
+def _filas(**columnas):
+    base = {'codigo_pais': ['MEX', 'CHL', 'ARG'], 'anio': [2020, 2021, 2022], 'valor': [1.5, None, 3.0]}
+    base.update(columnas)
+    return pd.DataFrame(base)
+
+
+def test_normaliza_tipos_y_descarta_filas_sin_valor():
+    df = almacen.validar_esquema(_filas(anio=['2020', '2021', '2022']), paises_esperados=['MEX', 'CHL', 'ARG'])
+
+    assert list(df.columns) == list(almacen.COLUMNAS)
+    assert df['anio'].dtype == 'int64' and df['valor'].dtype == 'float64'
+    assert pd.api.types.is_string_dtype(df['codigo_pais'])
+    assert df['codigo_pais'].tolist() == ['MEX', 'ARG']
+
+
+@pytest.mark.parametrize('cambio, mensaje', [
+    ({'anio': [2020, 'x', 2022]}, 'Años no numéricos'),
+    ({'anio': [1950, 2021, 2022]}, 'fuera de'),
+    ({'valor': [1.0, 'abc', 3.0]}, 'Valores no numéricos'),
+    ({'valor': [1.0, np.inf, 3.0]}, 'infinitos'),
+])
+def test_rechaza_datos_invalidos(cambio, mensaje):
+    with pytest.raises(almacen.ErrorEsquema, match=mensaje):
+        almacen.validar_esquema(_filas(**cambio))
+
+
+def test_rechaza_columnas_faltantes_y_paises_no_pedidos():
+    with pytest.raises(almacen.ErrorEsquema, match='Faltan columnas: valor'):
+        almacen.validar_esquema(_filas().drop(columns='valor'))
+    with pytest.raises(almacen.ErrorEsquema, match='Países no solicitados'):
+        almacen.validar_esquema(_filas(), paises_esperados=['MEX', 'CHL'])
+
+
+def test_particion_ida_y_vuelta(tmp_path):
+    raiz = str(tmp_path)
+    filas = almacen.validar_esquema(_filas())
+    almacen.escribir_particion('NY.GDP.PCAP.CD', filas, raiz)
+
+    assert almacen.particiones(raiz) == ['NY.GDP.PCAP.CD']
+    leido = almacen.leer_indicador('NY.GDP.PCAP.CD', raiz=raiz).sort_values('codigo_pais', ignore_index=True)
+    assert leido['codigo_pais'].tolist() == ['ARG', 'MEX']
+    assert leido['valor'].tolist() == [3.0, 1.5]
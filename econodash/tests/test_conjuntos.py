@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import conjuntos
+
+
+def _conjunto():
+    return {'PIB': pd.DataFrame({'Pais': ['México', 'Chile'], 'Valor': [1.0, 2.0]}),
+            'anios': (np.array([2020, 2021]), pd.Series([1, 2]))}
+
+
+@pytest.mark.parametrize('sin_copia', [True, False])
+def test_modificar_una_vista_no_alcanza_al_original(sin_copia):
+    original = _conjunto()
+    copia = conjuntos.vista(original, sin_copia=sin_copia)
+
+    copia['PIB']['Valor'] = 0.0
+    copia['PIB'].loc[0, 'Pais'] = 'Perú'
+    copia['anios'][1].iloc[0] = 99
+    copia['otro'] = 1
+
+    assert original['PIB']['Valor'].tolist() == [1.0, 2.0]
+    assert original['PIB']['Pais'].tolist() == ['México', 'Chile']
+    assert original['anios'][1].tolist() == [1, 2]
+    assert 'otro' not in original
+
+
+def test_arrays_de_numpy_de_solo_lectura():
+    original = _conjunto()
+    anios = conjuntos.vista(original)['anios'][0]
+
+    with pytest.raises(ValueError):
+        anios[0] = 1999
+    assert original['anios'][0].flags.writeable
+
+
+def test_vista_sin_copia_comparte_los_datos():
+    if not conjuntos.copy_on_write_activo():
+        pytest.skip("copy-on-write no está activo")
+    original = _conjunto()
+    copia = conjuntos.vista(original)
+
+    assert np.shares_memory(copia['PIB']['Valor'].to_numpy(), original['PIB']['Valor'].to_numpy())
+
+
+def test_version_cambia_solo_al_volver_a_ejecutar():
+    llamadas = []
+
+    @conjuntos.compartido()
+    def obtener(clave):
+        llamadas.append(clave)
+        return pd.DataFrame({'valor': [1.0, 2.0]})
+
+    version = obtener.version('a')
+    obtener('a')
+    assert obtener.version('a') == version
+    assert obtener.version('b') != version
+    assert llamadas == ['a', 'b']
+
+    obtener.clear()
+    assert obtener.version('a') != version
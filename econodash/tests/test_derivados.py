@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import derivados
+
+REGISTRO = {
+    'SALDO': {'expresion': 'EXP.ZS - IMP.ZS'},
+    'TOTAL': {'expresion': 'PCAP * POP'},
+    'YOY': {'expresion': 'yoy(PCAP)'},
+    'CAGR2': {'expresion': 'cagr(PCAP, 2)'},
+    'DOBLE_SALDO': {'expresion': 'SALDO * 2'},
+    'ACELERACION': {'expresion': 'yoy(YOY) + cagr(PCAP, 2) * 0'},
+    'A': {'expresion': 'B + 1'},
+    'B': {'expresion': 'A + 1'},
+}
+
+
+def _serie(valores, paises=('MEX', 'CHL'), anio_inicial=2000):
+    return pd.DataFrame([
+        {'codigo_pais': pais, 'anio': anio_inicial + i, 'valor': valor}
+        for pais in paises for i, valor in enumerate(valores) if valor is not None
+    ])
+
+
+def test_referencias_con_codigos_con_puntos():
+    assert derivados.referencias('SALDO', REGISTRO) == ['EXP.ZS', 'IMP.ZS']
+    assert derivados.referencias('CAGR2', REGISTRO) == ['PCAP']
+
+
+def test_orden_de_calculo_y_bases_necesarias():
+    assert derivados.orden_de_calculo(['DOBLE_SALDO'], REGISTRO) == ['SALDO', 'DOBLE_SALDO']
+    assert derivados.bases_necesarias(['X', 'DOBLE_SALDO', 'TOTAL'], REGISTRO) == ['X', 'EXP.ZS', 'IMP.ZS',
+                                                                                   'PCAP', 'POP']
+
+
+def test_dependencia_circular():
+    with pytest.raises(derivados.ErrorExpresion, match='circular'):
+        derivados.orden_de_calculo(['A'], REGISTRO)
+
+
+@pytest.mark.parametrize('expresion', [
+    '__import__("os").system("true")',
+    'open("x")',
+    'PCAP.__class__()',
+    'yoy(PCAP, anios=2)',
+    '"texto" * 2',
+    'lambda: 1',
+    'PCAP[0]',
+])
+def test_solo_se_admiten_expresiones_de_la_lista_blanca(expresion):
+    with pytest.raises(derivados.ErrorExpresion):
+        derivados.referencias('X', {'X': {'expresion': expresion}})
+
+
+def test_sintaxis_invalida():
+    with pytest.raises(derivados.ErrorExpresion, match='no válida'):
+        derivados.referencias('X', {'X': {'expresion': 'PCAP +'}})
+
+
+def test_aritmetica_alineada_por_pais_y_anio():
+    datos = {'EXP.ZS': _serie([30, 32, 35]), 'IMP.ZS': _serie([25, None, 40], paises=('MEX',))}
+    resultado = derivados.evaluar('SALDO', datos, registro=REGISTRO)
+
+    assert resultado.to_dict('records') == [
+        {'codigo_pais': 'MEX', 'anio': 2000, 'valor': 5.0},
+        {'codigo_pais': 'MEX', 'anio': 2002, 'valor': -5.0},
+    ]
+
+
+def test_yoy_y_cagr_coinciden_con_pandas():
+    valores = [100.0, 110.0, 99.0, 120.0, 150.0]
+    datos = {'PCAP': _serie(valores, paises=('MEX',))}
+    serie = pd.Series(valores, index=range(2000, 2005))
+
+    yoy = derivados.evaluar('YOY', datos, registro=REGISTRO).set_index('anio')['valor']
+    cagr = derivados.evaluar('CAGR2', datos, registro=REGISTRO).set_index('anio')['valor']
+
+    pd.testing.assert_series_equal(yoy, (serie.pct_change() * 100).dropna(), check_names=False, check_index_type=False)
+    esperado = ((serie / serie.shift(2)) ** 0.5 - 1) * 100
+    pd.testing.assert_series_equal(cagr, esperado.dropna(), check_names=False, check_index_type=False)
+
+
+def test_faltan_bases_devuelve_vacio():
+    assert derivados.evaluar('TOTAL', {'PCAP': _serie([1.0])}, registro=REGISTRO).empty
+
+
+def test_calcular_devuelve_solo_los_derivados_pedidos_y_cachea():
+    datos = {'EXP.ZS': _serie([30, 32]), 'IMP.ZS': _serie([25, 20])}
+    primero = derivados.calcular(['EXP.ZS', 'DOBLE_SALDO'], datos, registro=REGISTRO)
+
+    assert list(primero) == ['DOBLE_SALDO']
+    assert np.allclose(primero['DOBLE_SALDO']['valor'], [10, 24, 10, 24])
+    assert derivados.calcular(['DOBLE_SALDO'], datos, registro=REGISTRO)['DOBLE_SALDO'] is primero['DOBLE_SALDO']
+
+
+def test_retardo_por_funcion_e_intermedios():
+    assert derivados.retardo('PCAP', REGISTRO) == 0
+    assert derivados.retardo('SALDO', REGISTRO) == 0
+    assert derivados.retardo('YOY', REGISTRO) == 1
+    assert derivados.retardo('CAGR2', REGISTRO) == 2
+    assert derivados.retardo('ACELERACION', REGISTRO) == 2
+    with pytest.raises(derivados.ErrorExpresion, match='constantes'):
+        derivados.retardo('X', {'X': {'expresion': 'cagr(PCAP, PCAP)'}})
+
+
+def test_retardo_solo_en_las_bases_que_leen_funciones_con_retardo():
+    assert derivados.retardos_bases(['SALDO', 'YOY', 'CAGR2'], REGISTRO) == {'EXP.ZS': 0, 'IMP.ZS': 0, 'PCAP': 2}
+    # Una base pedida directamente o leída sin retardo por otro derivado se queda en 0...
+    assert derivados.retardos_bases(['POP', 'TOTAL', 'YOY'], REGISTRO) == {'POP': 0, 'PCAP': 1}
+    # ...y los retardos se acumulan a través de funciones anidadas e intermedios
+    assert derivados.retardos_bases(['ACELERACION'], REGISTRO) == {'PCAP': 2}
+    assert derivados.retardos_bases(['X'], {'X': {'expresion': 'yoy(DOBLE) + POP'},
+                                           'DOBLE': {'expresion': 'cagr(PCAP, 3) * 2'}}) == {'POP': 0, 'PCAP': 4}
+    assert derivados.retardos_bases([], REGISTRO) == {}
+
+
+def test_bases_desde_el_retardo_llenan_toda_la_ventana():
+    # Ventana 2003-2005: las bases se piden desde 2001 y el resultado se recorta
+    anio_inicio, anio_fin = 2003, 2005
+    desde = anio_inicio - derivados.retardos_bases(['YOY', 'CAGR2'], REGISTRO)['PCAP']
+    datos = {'PCAP': _serie([100.0, 110.0, 99.0, 120.0, 150.0], anio_inicial=desde)}
+
+    calculados = derivados.recortar(derivados.calcular(['YOY', 'CAGR2'], datos, registro=REGISTRO),
+                                    anio_inicio, anio_fin)
+
+    for df in calculados.values():
+        assert df.groupby('codigo_pais')['anio'].apply(list).to_dict() == {'CHL': [2003, 2004, 2005],
+                                                                          'MEX': [2003, 2004, 2005]}
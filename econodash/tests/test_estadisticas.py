@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import estadisticas
+
+
+def _datos():
+    return pd.DataFrame({
+        'pais': ['México'] * 4 + ['Chile'] * 3 + ['Perú'] * 2 + ['Promedio Mundial'] * 3 + ['Promedio Cero'] * 2,
+        'anio': [2019, 2020, 2021, 2022, 2019, 2020, 2021, 2020, 2021, 2019, 2020, 2021, 2020, 2021],
+        'valor': [1.0, 2.5, np.nan, 4.0, 3.0, 3.0, 6.0, 0.0, 0.0, 2.0, 4.0, np.nan, -1.0, 1.0],
+    })
+
+
+def _estadisticas_groupby(df):
+    """Cálculo anterior: groupby(...).agg por país."""
+    grupos = df.groupby('pais')['valor']
+    tabla = grupos.agg(['mean', 'min', 'max', 'std'])
+    tabla.columns = ['media', 'minimo', 'maximo', 'desv']
+    return tabla
+
+
+def _comparacion_iterrows(stats):
+    """Cálculo anterior: una fila por par país/promedio y luego un pivot."""
+    promedios = stats[stats.index.str.startswith('Promedio')]
+    paises = stats[~stats.index.str.startswith('Promedio')]
+    comparaciones = []
+    for idx, pais in paises.iterrows():
+        for prom_idx, promedio in promedios.iterrows():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                dif = round((pais['Promedio'] - promedio['Promedio']) / promedio['Promedio'] * 100, 2)
+            comparaciones.append({'País': idx, 'Promedio': prom_idx.replace('Promedio ', ''), 'Diferencia %': dif})
+    return pd.DataFrame(comparaciones).pivot_table(index='País', columns='Promedio', values='Diferencia %',
+                                                    aggfunc='first')
+
+
+def test_estadisticas_igual_que_groupby_sin_contar_nan():
+    df = _datos()
+    tabla = estadisticas.calcular_estadisticas(df, 'pais', 'anio', 'valor')
+
+    pd.testing.assert_frame_equal(tabla[['media', 'minimo', 'maximo', 'desv']], _estadisticas_groupby(df),
+                                  check_names=False)
+    assert tabla.loc['México', 'n'] == 3
+    assert tabla.loc['México', 'mediana'] == 2.5
+    # Primer y último año con dato: la fila NaN de Promedio Mundial (2021) no cuenta
+    assert tabla.loc['Promedio Mundial', ['anio_inicial', 'anio_final']].tolist() == [2019, 2020]
+    assert tabla.loc['Perú', 'desv'] == 0
+
+
+def test_promedio_anual_igual_que_groupby():
+    df = _datos()
+    mat = estadisticas.materializar('prueba_promedio', df, 'pais', 'anio', 'valor', version='v1')
+    seleccion = ['México', 'Chile', 'Perú']
+
+    esperado = df[df['pais'].isin(seleccion)].groupby('anio')['valor'].mean()
+    pd.testing.assert_series_equal(mat.promedio_anual(seleccion), esperado, check_names=False)
+    pd.testing.assert_series_equal(mat.promedio_anual(), df.groupby('anio')['valor'].mean(), check_names=False)
+
+
+def test_comparacion_igual_que_iterrows_con_promedio_cero():
+    df = _datos()
+    tabla = estadisticas.calcular_estadisticas(df, 'pais', 'anio', 'valor')
+    # Promedio Cero tiene media 0: la diferencia es infinita (o NaN si el país también es 0)
+    assert tabla.loc['Promedio Cero', 'media'] == 0
+
+    comparacion = estadisticas.comparar_con_promedios(tabla)
+    esperado = _comparacion_iterrows(tabla.rename(columns=estadisticas.COLUMNAS))
+
+    pd.testing.assert_frame_equal(comparacion, esperado, check_names=False)
+    assert np.isinf(comparacion.loc['México', 'Cero'])
+    assert np.isnan(comparacion.loc['Perú', 'Cero'])
+
+
+def test_materializar_por_version_sin_recorrer_los_datos(monkeypatch):
+    df = _datos()
+    monkeypatch.setattr(estadisticas, 'version_datos', lambda datos: pytest.fail('no debe recorrer los datos'))
+
+    mat = estadisticas.materializar('prueba_version', df, 'pais', 'anio', 'valor', version=('descarga', 1))
+    assert estadisticas.materializar('prueba_version', df.iloc[:3], 'pais', 'anio', 'valor', version=('descarga', 1)) is mat
+    assert estadisticas.materializar('prueba_version', df.iloc[:3], 'pais', 'anio', 'valor', version=('descarga', 2)) is not mat
+
+
+def test_materializar_sin_version_usa_el_contenido():
+    df = _datos()
+    mat = estadisticas.materializar('prueba_contenido', df, 'pais', 'anio', 'valor')
+
+    assert estadisticas.materializar('prueba_contenido', df.copy(), 'pais', 'anio', 'valor') is mat
+    otro = df.assign(valor=df['valor'] + 1)
+    assert estadisticas.materializar('prueba_contenido', otro, 'pais', 'anio', 'valor') is not mat
@@ -0,0 +1,61 @@
+import io
+
+import openpyxl
+import pandas as pd
+
+from exportacion import construir_libro_excel, version_datos
+
+
+def _datos():
+    return {
+        'NY.GDP.PCAP.CD': pd.DataFrame({
+            'pais': ['México', 'México', 'Chile'],
+            'anio': [2020, 2021, 2020],
+            'valor': [8000.0, 9000.0, 13000.0],
+        }),
+        'FP.CPI.TOTL.ZG': pd.DataFrame({'pais': ['México'], 'anio': [2021], 'valor': [5.7]}),
+        'VACIO': pd.DataFrame(columns=['pais', 'anio', 'valor']),
+    }
+
+
+INDICADORES = {
+    'NY.GDP.PCAP.CD': {'nombre': 'PIB per cápita', 'unidad': 'US$'},
+    'FP.CPI.TOTL.ZG': {'nombre': 'Inflación: precios/consumidor [anual]', 'unidad': '%'},
+}
+
+
+def test_una_hoja_por_indicador_con_datos_mas_metadatos():
+    libro = openpyxl.load_workbook(io.BytesIO(construir_libro_excel(_datos(), INDICADORES, version='abc')))
+
+    assert libro.sheetnames[0] == 'Metadatos'
+    assert 'PIB per cápita' in libro.sheetnames
+    # Nombre de hoja saneado (sin / [ ] :) y recortado a 31 caracteres
+    assert len(libro.sheetnames) == 3
+    assert all(len(nombre) <= 31 and not set('[]:*?/\\') & set(nombre) for nombre in libro.sheetnames)
+
+
+def test_tabla_anio_por_pais_con_huecos_vacios():
+    libro = openpyxl.load_workbook(io.BytesIO(construir_libro_excel(_datos(), INDICADORES)))
+    filas = list(libro['PIB per cápita'].values)
+
+    assert filas[0] == ('Año', 'Chile', 'México')
+    assert filas[1] == (2020, 13000, 8000)
+    assert filas[2] == (2021, None, 9000)
+
+
+def test_metadatos_incluyen_rango_y_version():
+    libro = openpyxl.load_workbook(io.BytesIO(construir_libro_excel(_datos(), INDICADORES, version='abc')))
+    filas = list(libro['Metadatos'].values)
+
+    assert filas[1][:2] == ('NY.GDP.PCAP.CD', 'PIB per cápita')
+    assert filas[1][4:] == (2, 2020, 2021)
+    assert ('Versión de datos', 'abc') in [fila[:2] for fila in filas]
+
+
+def test_version_datos_cambia_con_el_contenido():
+    datos = _datos()
+    version = version_datos(datos)
+    assert version == version_datos(_datos())
+
+    datos['NY.GDP.PCAP.CD'].loc[0, 'valor'] = 8001.0
+    assert version_datos(datos) != version
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import formato
+
+MONEDA = {'unidad': 'US$ a precios actuales', 'es_porcentaje': False}
+PORCENTAJE = {'unidad': '% anual', 'es_porcentaje': True}
+PERSONAS = {'unidad': 'Número de personas', 'es_porcentaje': False}
+NUMERO = {'unidad': 'Índice', 'es_porcentaje': False}
+
+
+@pytest.mark.parametrize('info, tipo', [
+    (MONEDA, 'moneda'), (PORCENTAJE, 'porcentaje'), (PERSONAS, 'personas'), (NUMERO, 'numero'),
+    ({'unidad': '% del PIB'}, 'porcentaje'), (None, 'numero'),
+])
+def test_tipo_formato(info, tipo):
+    assert formato.tipo_formato(info) == tipo
+
+
+@pytest.mark.parametrize('info', [MONEDA, PORCENTAJE, PERSONAS, NUMERO])
+def test_formatear_serie_igual_que_formatear_valor(info):
+    valores = [0.0, 1.005, -1234.5, 999.999, 1234567.891, -0.4, 12345678901.0]
+    esperado = [formato.formatear_valor(v, info) for v in valores]
+    assert formato.formatear_serie(valores, info).tolist() == esperado
+
+
+def test_formatear_serie_conserva_indice_y_deja_vacios_los_nan():
+    serie = pd.Series([1500.0, np.nan], index=['MEX', 'CHL'])
+    resultado = formato.formatear_serie(serie, MONEDA)
+
+    assert resultado.to_dict() == {'MEX': '$1,500.00', 'CHL': ''}
+
+
+def test_formatear_serie_vacia():
+    resultado = formato.formatear_serie(pd.Series([], dtype=float), MONEDA)
+
+    assert resultado.empty
+    assert ('Máx: ' + resultado).tolist() == []
+
+
+def test_plantilla_hover_y_formato_columna():
+    assert formato.plantilla_hover(MONEDA) == 'US$ %{y:,.2f}'
+    assert formato.plantilla_hover(PORCENTAJE, campo='x') == '%{x:.2f}%'
+    assert formato.formato_columna(PERSONAS) == '%,.0f'
@@ -0,0 +1,37 @@
+import pytest
+
+import ingesta_masiva
+from benchmarks import wb_grabado
+
+INDICADOR = 'NY.GDP.PCAP.CD'
+
+
+@pytest.fixture
+def paises(monkeypatch):
+    monkeypatch.setattr(ingesta_masiva.wb, 'get_series', wb_grabado.get_series)
+    return sorted(wb_grabado.get_countries().index[:3])
+
+
+def _unidad(paises, anio_inicio, anio_fin):
+    return {'codigo': INDICADOR, 'paises': paises, 'anio_inicio': anio_inicio, 'anio_fin': anio_fin}
+
+
+def test_lote_de_varios_paises_y_anios(paises):
+    df = ingesta_masiva.descargar_unidad(_unidad(paises, 2015, 2018))
+
+    assert set(df['codigo_pais']) <= set(paises)
+    assert set(df['anio']) <= set(range(2015, 2019))
+
+
+@pytest.mark.parametrize('cuantos, anio_inicio, anio_fin', [
+    (1, 2015, 2018),  # un solo país: la API no debe perder el nivel Country
+    (3, 2016, 2016),  # un solo año: ni el nivel Year
+    (1, 2016, 2016),
+])
+def test_lote_con_un_solo_pais_o_un_solo_anio(paises, cuantos, anio_inicio, anio_fin):
+    seleccion = paises[:cuantos]
+    df = ingesta_masiva.descargar_unidad(_unidad(seleccion, anio_inicio, anio_fin))
+
+    assert not df.empty
+    assert set(df['codigo_pais']) <= set(seleccion)
+    assert df['anio'].between(anio_inicio, anio_fin).all()
@@ -0,0 +1,53 @@
+import pytest
+
+import limitador
+
+HOST = 'api.prueba.local'
+
+
+@pytest.fixture(autouse=True)
+def directorio_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(limitador, 'LIMITADOR_DIR', str(tmp_path))
+    monkeypatch.setitem(limitador.LIMITES_POR_HOST, HOST, (10.0, 3.0))
+    limitador._factor_visto.clear()
+
+
+def test_limites_por_host_y_por_defecto():
+    assert limitador.limites(HOST) == (10.0, 3.0)
+    assert limitador.limites('otro.host') == (limitador.TASA_POR_DEFECTO, limitador.RAFAGA_POR_DEFECTO)
+
+
+def test_rafaga_consume_fichas_y_luego_espera():
+    esperas = [limitador._actualizar(HOST, limitador._tomar_ficha) for _ in range(4)]
+
+    assert esperas[:3] == [0.0, 0.0, 0.0]
+    # Sin fichas: esperar lo que tarda en llegar una a 10 por segundo
+    assert 0 < esperas[3] <= 0.1
+
+
+def test_penalizar_pausa_y_reduce_la_tasa():
+    pausa = limitador.penalizar(HOST, 429)
+    estado = limitador.estado(HOST)
+
+    assert pausa == pytest.approx(limitador.PAUSA_BASE * 2)
+    assert estado['factor'] == 2.0
+    assert estado['tasa_efectiva'] == pytest.approx(5.0)
+    assert limitador._actualizar(HOST, limitador._tomar_ficha) > 1.0
+
+
+def test_retry_after_manda_sobre_la_pausa_exponencial():
+    assert limitador.penalizar(HOST, 503, reintentar_tras=7) == pytest.approx(7, abs=0.05)
+
+
+def test_el_factor_tiene_tope_y_se_recupera_con_exitos():
+    for _ in range(10):
+        limitador.penalizar(HOST, 429, reintentar_tras=0)
+    assert limitador.estado(HOST)['factor'] == limitador.FACTOR_MAXIMO
+
+    limitador.registrar_exito(HOST)
+    assert limitador.estado(HOST)['factor'] == pytest.approx(limitador.FACTOR_MAXIMO * limitador.RECUPERACION)
+
+
+def test_adquirir_no_espera_con_fichas_disponibles():
+    limitador.adquirir(HOST)
+    assert limitador.estado(HOST)['fichas'] == pytest.approx(2.0, abs=0.01)
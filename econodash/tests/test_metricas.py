@@ -0,0 +1,86 @@
+import os
+
+import metricas
+
+
+def _muestras():
+    return metricas.analizar_exposicion(metricas.REGISTRO.exponer())
+
+
+def test_memoria_agregada_por_app_sin_ids_de_sesion(monkeypatch):
+    monkeypatch.setattr(metricas, '_sesiones', {})
+    metricas.registrar_sesion('prueba', 'id-secreto-1', 1000)
+    metricas.registrar_sesion('prueba', 'id-secreto-2', 3000)
+
+    texto = metricas.REGISTRO.exponer()
+    muestras = metricas.analizar_exposicion(texto)
+    assert 'id-secreto' not in texto
+    assert muestras[('econodash_sesiones_activas', 'app="prueba"')] == 2
+    assert muestras[('econodash_memoria_sesiones_bytes', 'app="prueba"')] == 4000
+    assert muestras[('econodash_memoria_sesion_maxima_bytes', 'app="prueba"')] == 3000
+
+
+def test_memoria_se_muestrea_por_sesion(monkeypatch):
+    monkeypatch.setattr(metricas, '_sesiones', {})
+    assert metricas.toca_medir_memoria('prueba', 's')
+    metricas.registrar_sesion('prueba', 's', 500)
+    assert not metricas.toca_medir_memoria('prueba', 's')
+
+    # Un rerun sin medición conserva el último valor
+    metricas.registrar_sesion('prueba', 's')
+    assert _muestras()[('econodash_memoria_sesiones_bytes', 'app="prueba"')] == 500
+
+    monkeypatch.setattr(metricas, 'INTERVALO_MEMORIA_S', 0)
+    assert metricas.toca_medir_memoria('prueba', 's')
+
+
+def test_servidor_escucha_solo_en_local_por_defecto():
+    assert metricas.HOST == '127.0.0.1'
+    servidor = metricas.iniciar_servidor()
+    try:
+        assert servidor.server_address[0] == '127.0.0.1'
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_archivo_estable_por_app_y_replica(monkeypatch, tmp_path):
+    monkeypatch.setattr(metricas, 'METRICAS_DIR', str(tmp_path))
+    monkeypatch.setattr(metricas, 'REPLICA', None)
+    assert metricas.ruta_archivo('simple_app') == str(tmp_path / 'simple_app.prom')
+
+    monkeypatch.setattr(metricas, 'REPLICA', '2')
+    assert metricas.ruta_archivo('simple_app') == str(tmp_path / 'simple_app-2.prom')
+
+
+def test_exportar_reescribe_el_mismo_archivo_y_lo_borra_al_salir(monkeypatch, tmp_path):
+    monkeypatch.setattr(metricas, 'METRICAS_DIR', str(tmp_path))
+    monkeypatch.setattr(metricas, 'REPLICA', None)
+    monkeypatch.setattr(metricas, 'PUERTO', None)
+    monkeypatch.setattr(metricas, '_estado', {'ultimo_archivo': 0.0, 'servidor': None, 'app': None, 'archivo': None})
+    registrados = []
+    monkeypatch.setattr(metricas.atexit, 'register', registrados.append)
+
+    metricas.exportar('prueba', forzar=True)
+    metricas.exportar('prueba', forzar=True)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['prueba.prom']
+    assert 'econodash_proceso_memoria_bytes{app="prueba"}' in (tmp_path / 'prueba.prom').read_text()
+    assert registrados == [metricas._borrar_archivo]
+    registrados[0]()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_barrido_borra_archivos_de_procesos_muertos(monkeypatch, tmp_path):
+    monkeypatch.setattr(metricas, '_proceso_vivo', lambda pid: pid == 111)
+    for nombre in ('app_111.prom', 'app_222.prom', 'simple_app_333.prom', 'app.prom', 'app-2.prom'):
+        (tmp_path / nombre).write_text('')
+
+    borrados = metricas.barrer_archivos_huerfanos(str(tmp_path))
+
+    assert sorted(os.path.basename(r) for r in borrados) == ['app_222.prom', 'simple_app_333.prom']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['app-2.prom', 'app.prom', 'app_111.prom']
+
+
+def test_proceso_vivo():
+    assert metricas._proceso_vivo(os.getpid())
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+import panel_interactivo
+
+INDICADORES = {
+    f"IND.{i}": {'nombre': f"Indicador {i}", 'unidad': '%', 'es_porcentaje': True} for i in range(14)
+}
+
+
+def _datos(n_indicadores, n_paises=5, n_anios=10):
+    return {
+        f"Indicador {i}": pd.DataFrame([
+            {'Pais': f"País {p}", 'Año': 2010 + a, 'Valor': float(i + p + a)}
+            for p in range(n_paises) for a in range(n_anios)
+        ])
+        for i in range(n_indicadores)
+    }
+
+
+@pytest.mark.parametrize('n_indicadores, webgl', [(4, False), (14, True)])
+def test_webgl_segun_el_total_de_puntos(n_indicadores, webgl):
+    fig = panel_interactivo.construir_dashboard(_datos(n_indicadores), INDICADORES)
+
+    assert len(fig.data) == n_indicadores * 5
+    assert {traza.type for traza in fig.data} == {'scattergl' if webgl else 'scatter'}
+    assert {traza.mode for traza in fig.data} == {'lines' if webgl else 'lines+markers'}
+
+
+def test_generar_dashboard_escribe_el_html(tmp_path):
+    ruta = panel_interactivo.generar_dashboard(_datos(2), str(tmp_path), INDICADORES)
+    assert ruta == str(tmp_path / 'dashboard_economico.html')
+    assert 'Panel Económico Interactivo' in open(ruta, encoding='utf-8').read()
+
+
+def test_cuadricula():
+    assert panel_interactivo.calcular_cuadricula(0) == (1, 1)
+    assert panel_interactivo.calcular_cuadricula(2) == (1, 2)
+    assert panel_interactivo.calcular_cuadricula(4) == (2, 2)
+    assert panel_interactivo.calcular_cuadricula(14) == (5, 3)
+
+
+def test_exportacion_estatica_aplica_los_ajustes_de_kaleido(tmp_path, monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(panel_interactivo.importaciones, 'configurar_exportacion_estatica',
+                        lambda: llamadas.append('configurar'))
+    monkeypatch.setattr(panel_interactivo, 'escribir_atomico', lambda ruta, escribir: llamadas.append(ruta))
+    info = INDICADORES['IND.0']
+
+    panel_interactivo.generar_grafico_interactivo(_datos(1)['Indicador 0'], info, str(tmp_path), formato='html')
+    assert llamadas == [str(tmp_path / 'indicador_0_interactivo.html')]
+
+    llamadas.clear()
+    _, ruta_imagen = panel_interactivo.generar_grafico_interactivo(_datos(1)['Indicador 0'], info, str(tmp_path),
+                                                                   formato='png', dpi=200)
+    assert llamadas == ['configurar', ruta_imagen]
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import almacen
+import rankings
+
+NAN = np.nan
+
+
+@pytest.mark.parametrize('orden, esperado', [
+    ('mayores', [4, 0, 3]),
+    ('menores', [5, 1, 3]),
+    ('absolutos', [5, 4, 0]),
+])
+def test_seleccionar(orden, esperado):
+    valores = np.array([3.0, -1.0, NAN, 2.0, 7.0, -9.0])
+    assert rankings.seleccionar(valores, 3, orden).tolist() == esperado
+
+
+def test_seleccionar_coincide_con_ordenacion_completa():
+    valores = np.random.default_rng(1).normal(size=500)
+    assert rankings.seleccionar(valores, 20).tolist() == np.argsort(-valores)[:20].tolist()
+
+
+def test_seleccionar_con_menos_valores_que_n():
+    assert rankings.seleccionar(np.array([NAN, 1.0, 2.0]), 10).tolist() == [2, 1]
+    assert rankings.seleccionar(np.array([NAN]), 5).tolist() == []
+    assert rankings.seleccionar(np.array([1.0]), 0).tolist() == []
+
+
+def test_orden_desconocido():
+    with pytest.raises(ValueError, match='Orden desconocido'):
+        rankings.seleccionar(np.array([1.0]), 1, 'aleatorio')
+
+
+def _almacen(raiz, con_ultimos):
+    rng = np.random.default_rng(7)
+    filas = pd.DataFrame([
+        {'codigo_pais': f"P{i:02d}", 'anio': anio, 'valor': rng.normal()}
+        for i in range(30) for anio in range(2000, 2010) if rng.random() > 0.3
+    ])
+    almacen.escribir_particion('IND.A', filas, str(raiz))
+    if con_ultimos:
+        almacen.actualizar_ultimos('IND.A', filas, str(raiz))
+    return str(raiz)
+
+
+@pytest.mark.parametrize('orden', ['mayores', 'menores'])
+def test_ranking_del_ultimo_dato_lee_el_indice_del_almacen(tmp_path, monkeypatch, orden):
+    sin_indice = rankings.ranking('IND.A', n=10, orden=orden, raiz=_almacen(tmp_path / 'a', False))
+    raiz = _almacen(tmp_path / 'b', True)
+
+    def no_abrir(*args, **kwargs):
+        raise AssertionError("con ultimos.json no hace falta abrir la partición")
+
+    monkeypatch.setattr(almacen, 'abrir_particion', no_abrir)
+    con_indice = rankings.ranking('IND.A', n=10, orden=orden, raiz=raiz)
+    pd.testing.assert_frame_equal(con_indice, sin_indice, check_dtype=False)
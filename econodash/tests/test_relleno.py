@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import relleno
+
+NAN = np.nan
+
+
+def test_lineal_solo_rellena_huecos_interiores():
+    matriz = np.array([[NAN, 1.0, NAN, NAN, 4.0, NAN]])
+    rellenada, imputada = relleno.rellenar_matriz(matriz, 'lineal')
+
+    np.testing.assert_allclose(rellenada, [[NAN, 1, 2, 3, 4, NAN]])
+    assert imputada.tolist() == [[False, False, True, True, False, False]]
+
+
+def test_lineal_con_limite_no_toca_huecos_largos():
+    matriz = np.array([[1.0, NAN, 3.0, NAN, NAN, NAN, 7.0]])
+    rellenada, imputada = relleno.rellenar_matriz(matriz, 'lineal', limite=2)
+
+    np.testing.assert_allclose(rellenada, [[1, 2, 3, NAN, NAN, NAN, 7]])
+    assert imputada.sum() == 1
+
+
+def test_anterior_con_limite():
+    matriz = np.array([[NAN, 5.0, NAN, NAN, NAN, 8.0, NAN]])
+    rellenada, imputada = relleno.rellenar_matriz(matriz, 'anterior', limite=2)
+
+    np.testing.assert_allclose(rellenada, [[NAN, 5, 5, 5, NAN, 8, 8]])
+    assert imputada.tolist() == [[False, False, True, True, False, False, True]]
+
+
+def test_coincide_con_interpolate_de_pandas():
+    rng = np.random.default_rng(0)
+    matriz = rng.normal(size=(40, 30))
+    matriz[rng.random(matriz.shape) < 0.4] = NAN
+
+    rellenada, _ = relleno.rellenar_matriz(matriz, 'lineal')
+    esperado = pd.DataFrame(matriz).T.interpolate(limit_area='inside').T.to_numpy()
+    np.testing.assert_allclose(rellenada, esperado)
+
+    rellenada, _ = relleno.rellenar_matriz(matriz, 'anterior')
+    np.testing.assert_allclose(rellenada, pd.DataFrame(matriz).T.ffill().T.to_numpy())
+
+
+def test_filas_vacias_y_metodo_desconocido():
+    rellenada, imputada = relleno.rellenar_matriz(np.full((2, 3), NAN))
+    assert np.isnan(rellenada).all() and not imputada.any()
+    with pytest.raises(ValueError, match='desconocido'):
+        relleno.rellenar_matriz(np.zeros((1, 1)), 'cubica')
+
+
+def test_rellenar_dataframe_largo():
+    df = pd.DataFrame({
+        'Pais': ['México', 'México', 'Chile', 'Chile'],
+        'Año': [2000, 2003, 2000, 2001],
+        'Valor': [1.0, 4.0, 10.0, 11.0],
+        'Indicador': ['PIB'] * 4,
+    })
+    resultado = relleno.rellenar(df, 'Pais', 'Año', 'Valor', col_imputado='Imputado')
+
+    assert list(resultado.columns) == ['Pais', 'Año', 'Valor', 'Indicador', 'Imputado']
+    mexico = resultado[resultado['Pais'] == 'México']
+    assert mexico['Año'].tolist() == [2000, 2001, 2002, 2003]
+    assert mexico['Valor'].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert mexico['Imputado'].tolist() == [False, True, True, False]
+    assert (resultado['Indicador'] == 'PIB').all()
+    assert resultado['Año'].dtype == df['Año'].dtype
@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import almacen
+import similares
+
+NAN = np.nan
+
+
+def _distancia_ingenua(indice, a, b):
+    """nan-euclídea sobre los rasgos estandarizados, país a país."""
+    za = (indice.valores[indice._pos[a]] - indice.medias) / indice.desviaciones
+    zb = (indice.valores[indice._pos[b]] - indice.medias) / indice.desviaciones
+    comunes = ~np.isnan(za) & ~np.isnan(zb)
+    return math.sqrt(((za - zb)[comunes] ** 2).sum() * len(za) / comunes.sum())
+
+
+@pytest.fixture
+def indice():
+    rng = np.random.default_rng(3)
+    valores = rng.normal(size=(30, 4)) * [1, 1000, 10, 0.1]
+    valores[rng.random(valores.shape) < 0.15] = NAN
+    return similares.IndiceSimilitud([f"P{i:02d}" for i in range(30)], valores, ['A', 'B', 'C', 'D'])
+
+
+def test_rasgos_estandarizados(indice):
+    rasgos = np.where(indice.presentes, indice.rasgos, NAN)
+    np.testing.assert_allclose(np.nanmean(rasgos, axis=0), 0, atol=1e-12)
+    np.testing.assert_allclose(np.nanstd(rasgos, axis=0), 1)
+
+
+def test_distancias_coinciden_con_el_calculo_pais_a_pais(indice):
+    distancias, comunes = indice.distancias('P00')
+
+    assert np.isnan(distancias[0])
+    for pais in indice.paises[1:]:
+        fila = indice._pos[pais]
+        if comunes[fila] >= 2:
+            assert distancias[fila] == pytest.approx(_distancia_ingenua(indice, 'P00', pais))
+        else:
+            assert np.isnan(distancias[fila])
+
+
+def test_vecinos_ordenados_sin_el_propio_pais(indice):
+    vecinos = indice.vecinos('P05', k=5)
+
+    assert len(vecinos) == 5
+    assert 'P05' not in vecinos['codigo_pais'].tolist()
+    assert vecinos['distancia'].is_monotonic_increasing
+    distancias, _ = indice.distancias('P05')
+    assert vecinos['distancia'].iloc[0] == pytest.approx(np.nanmin(distancias))
+
+
+def test_candidatos_y_pais_desconocido(indice):
+    vecinos = indice.vecinos('P00', k=5, candidatos=['P01', 'P02', 'P03'])
+    assert set(vecinos['codigo_pais']) <= {'P01', 'P02', 'P03'}
+    assert indice.vecinos('ZZZ', k=5).empty
+
+
+def test_indice_del_almacen_con_ventana_y_cache(tmp_path):
+    raiz = str(tmp_path)
+    for codigo, desplazamiento in (('IND.A', 0.0), ('IND.B', 100.0)):
+        filas = pd.DataFrame([
+            {'codigo_pais': pais, 'anio': anio, 'valor': desplazamiento + i * 10 + (anio - 2000)}
+            for i, pais in enumerate(['ARG', 'BRA', 'CHL', 'MEX']) for anio in range(2000, 2006)
+        ])
+        almacen.escribir_particion(codigo, filas, raiz)
+
+    indice = similares.indice(['IND.A', 'IND.B'], 2002, 2004, raiz=raiz)
+    assert indice is similares.indice(['IND.A', 'IND.B'], 2002, 2004, raiz=raiz)
+    # Media de la ventana 2002-2004 para Brasil en IND.A: 10 + 3
+    assert indice.valores_de(['BRA']).loc['BRA', 'IND.A'] == pytest.approx(13.0)
+    assert indice.vecinos('BRA', k=2)['codigo_pais'].tolist() in (['ARG', 'CHL'], ['CHL', 'ARG'])
+
+
+def test_grupos_con_paises_descarta_los_que_solo_tienen_agregados():
+    indice = similares.IndiceSimilitud(['ARG', 'BRA', 'MEX'], np.ones((3, 2)), ['A', 'B'])
+    grupos = {
+        'Europa': ['ECS', 'EMU', 'EUU'],
+        'América del Norte': ['NAC', 'USA', 'MEX', 'CAN'],
+        'América del Sur': ['ARG', 'BOL', 'BRA'],
+    }
+
+    assert indice.grupos_con_paises(grupos) == ['América del Norte', 'América del Sur']
+    # México es el país de referencia: su región no tiene con quién compararlo
+    assert indice.grupos_con_paises(grupos, excluir='MEX') == ['América del Sur']
+    assert indice.vecinos('ARG', k=5, candidatos=grupos['Europa']).empty
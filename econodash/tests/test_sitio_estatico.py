@@ -0,0 +1,31 @@
+import pandas as pd
+
+from sitio_estatico import exportar_sitio_estatico
+
+INDICADORES = {'NY.GDP.PCAP.CD': {'nombre': 'PIB per cápita', 'unidad': 'US$', 'es_porcentaje': False}}
+
+
+def test_plotly_solo_en_las_paginas_con_graficos(tmp_path):
+    datos = {'PIB per cápita': pd.DataFrame({'Pais': ['México', 'Chile'], 'Año': [2020, 2020],
+                                             'Valor': [8000.0, 13000.0]})}
+    ruta_index = exportar_sitio_estatico(datos, INDICADORES, str(tmp_path))
+
+    index = open(ruta_index, encoding='utf-8').read()
+    assert 'plotly.min.js' not in index and '<script' not in index
+    assert 'pib_per_capita.html' in index
+
+    for pagina in ('dashboard.html', 'pib_per_capita.html'):
+        html = (tmp_path / pagina).read_text(encoding='utf-8')
+        assert '<script src="plotly.min.js"></script>' in html
+        assert 'econodashGrafico(' in html
+    assert (tmp_path / 'datos' / 'pib_per_capita.json').exists()
+
+
+def test_error_visible_si_no_se_cargan_los_datos(tmp_path):
+    datos = {'PIB per cápita': pd.DataFrame({'Pais': ['México'], 'Año': [2020], 'Valor': [8000.0]})}
+    exportar_sitio_estatico(datos, INDICADORES, str(tmp_path))
+
+    script = (tmp_path / 'econodash.js').read_text(encoding='utf-8')
+    assert 'if (!r.ok)' in script
+    assert '.catch(function (error)' in script and 'textContent' in script
+    assert '.error {' in (tmp_path / 'estilo.css').read_text(encoding='utf-8')
@@ -0,0 +1,100 @@
+import logging
+
+import pytest
+
+import trabajos
+
+
+def _unidades():
+    return trabajos.dividir_en_lotes('NY.GDP.PCAP.CD', ['ARG', 'BRA', 'CHL', 'MEX', 'PER'], 2,
+                                     anio_inicio=2000, anio_fin=2020)
+
+
+def test_dividir_en_lotes():
+    unidades = _unidades()
+    assert [u['paises'] for u in unidades] == [['ARG', 'BRA'], ['CHL', 'MEX'], ['PER']]
+    assert [u['lote'] for u in unidades] == [0, 1, 2]
+    assert len({trabajos.clave_unidad(u) for u in unidades}) == 3
+
+
+def test_reanuda_solo_las_unidades_pendientes(tmp_path):
+    llamadas = []
+
+    def falla_el_ultimo_lote(unidad):
+        llamadas.append(unidad['lote'])
+        if unidad['lote'] == 2:
+            raise RuntimeError("API caída")
+        return unidad['paises']
+
+    resultados, fallidas = trabajos.ejecutar_trabajo('prueba', _unidades(), falla_el_ultimo_lote,
+                                                     reintentos=2, espera_base=0, raiz=str(tmp_path))
+    assert len(resultados) == 2
+    assert [u['lote'] for u in fallidas] == [2]
+    assert sorted(llamadas) == [0, 1, 2, 2]
+
+    # Segunda ejecución: sólo se repite el lote que falló
+    llamadas.clear()
+    resultados, fallidas = trabajos.ejecutar_trabajo('prueba', _unidades(), lambda u: llamadas.append(u['lote']) or u['paises'],
+                                                     espera_base=0, raiz=str(tmp_path))
+    assert llamadas == [2]
+    assert not fallidas
+    assert sorted(resultados.values()) == [['ARG', 'BRA'], ['CHL', 'MEX'], ['PER']]
+
+    manifiesto = trabajos.Manifiesto('prueba', str(tmp_path))
+    estado = manifiesto.unidades[trabajos.clave_unidad(_unidades()[2])]
+    assert estado['estado'] == trabajos.COMPLETA
+    assert estado['intentos'] == 3
+
+
+def test_reintentos_y_errores_van_a_la_bitacora(tmp_path):
+    eventos = []
+    manejador = logging.Handler()
+    manejador.emit = eventos.append
+    trabajos.log.addHandler(manejador)
+    try:
+        def siempre_falla(unidad):
+            raise RuntimeError("API caída")
+
+        trabajos.ejecutar_trabajo('prueba', _unidades()[:1], siempre_falla, reintentos=2, espera_base=0,
+                                  raiz=str(tmp_path))
+    finally:
+        trabajos.log.removeHandler(manejador)
+
+    assert [e.levelname for e in eventos] == ['WARNING', 'ERROR']
+    assert eventos[0].intento == 2 and eventos[1].intentos == 2
+    assert eventos[1].unidad == trabajos.clave_unidad(_unidades()[0])
+
+
+def test_errores_no_reintentables_fallan_al_primer_intento(tmp_path):
+    intentos = []
+
+    def esquema_invalido(unidad):
+        intentos.append(unidad['lote'])
+        raise ValueError("esquema")
+
+    _, fallidas = trabajos.ejecutar_trabajo('prueba', _unidades()[:1], esquema_invalido, reintentos=3,
+                                            espera_base=0, no_reintentar=(ValueError,), raiz=str(tmp_path))
+    assert intentos == [0]
+    assert len(fallidas) == 1
+
+
+def test_puntos_de_control_caducados_se_repiten(tmp_path):
+    trabajos.ejecutar_trabajo('prueba', _unidades(), lambda u: u['paises'], espera_base=0, raiz=str(tmp_path))
+    manifiesto = trabajos.Manifiesto('prueba', str(tmp_path))
+    clave = trabajos.clave_unidad(_unidades()[0])
+
+    assert manifiesto.completada(clave)
+    assert not manifiesto.completada(clave, vigencia_horas=-1)
+
+
+def test_limpiar_trabajo(tmp_path):
+    trabajos.ejecutar_trabajo('prueba', _unidades(), lambda u: u['paises'], espera_base=0, raiz=str(tmp_path))
+    trabajos.limpiar_trabajo('prueba', str(tmp_path))
+    assert not (tmp_path / 'prueba').exists()
+
+
+@pytest.mark.parametrize('contenido', ['{no es json', ''])
+def test_manifiesto_ilegible_empieza_de_cero(tmp_path, contenido):
+    (tmp_path / 'prueba').mkdir()
+    (tmp_path / 'prueba' / trabajos.ARCHIVO_MANIFIESTO).write_text(contenido)
+    assert trabajos.Manifiesto('prueba', str(tmp_path)).unidades == {}
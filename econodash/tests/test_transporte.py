@@ -0,0 +1,131 @@
+import pytest
+import requests
+
+import limitador
+import transporte
+
+URL = 'https://api.prueba.local/v2/country/MEX/indicator/NY.GDP.PCAP.CD'
+
+
+def _respuesta(codigo, contenido=b'', cabeceras=None):
+    respuesta = requests.Response()
+    respuesta.status_code = codigo
+    respuesta._content = contenido
+    respuesta.headers = requests.structures.CaseInsensitiveDict(cabeceras or {})
+    respuesta.url = URL
+    return respuesta
+
+
+class SesionFalsa:
+    """Devuelve las respuestas preparadas en orden y anota las cabeceras enviadas."""
+
+    def __init__(self, *respuestas):
+        self.respuestas = list(respuestas)
+        self.cabeceras = []
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        self.cabeceras.append(dict(headers or {}))
+        return self.respuestas.pop(0)
+
+
+@pytest.fixture
+def limitador_falso(monkeypatch):
+    """Sustituye el limitador por uno que sólo anota las llamadas (sin pausas ni archivos)."""
+    llamadas = []
+    monkeypatch.setattr(limitador, 'adquirir', lambda host: llamadas.append(('adquirir', host)))
+    monkeypatch.setattr(limitador, 'registrar_exito', lambda host: llamadas.append(('exito', host)))
+
+    def penalizar(host, codigo, reintentar_tras=None):
+        llamadas.append(('penalizar', codigo, reintentar_tras))
+        return reintentar_tras or 1.0
+
+    monkeypatch.setattr(limitador, 'penalizar', penalizar)
+    return llamadas
+
+
+@pytest.fixture
+def sesion(monkeypatch, limitador_falso):
+    monkeypatch.setattr(transporte, '_revalidables', type(transporte._revalidables)())
+    monkeypatch.setattr(transporte, '_estadisticas', {'peticiones': 0, 'revalidadas': 0})
+
+    def preparar(*respuestas):
+        falsa = SesionFalsa(*respuestas)
+        monkeypatch.setitem(transporte._estado, 'sesion', falsa)
+        return falsa
+    return preparar
+
+
+def test_revalida_con_etag_y_reutiliza_el_cuerpo_si_304(sesion):
+    falsa = sesion(
+        _respuesta(200, b'[{"valor": 1}]', {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT',
+                                            'Content-Type': 'application/json'}),
+        _respuesta(304, cabeceras={'ETag': '"v1"', 'Date': 'Tue, 02 Jan 2024 00:00:00 GMT'}),
+    )
+
+    primera = transporte.get(URL, params={'format': 'json'})
+    segunda = transporte.get(URL, params={'format': 'json'})
+
+    assert falsa.cabeceras[0] == {}
+    assert falsa.cabeceras[1] == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+    assert segunda.status_code == 200
+    assert segunda.content == primera.content == b'[{"valor": 1}]'
+    assert segunda.json() == [{'valor': 1}]
+    # Cabeceras guardadas más las de la respuesta 304
+    assert segunda.headers['Content-Type'] == 'application/json'
+    assert segunda.headers['Date'] == 'Tue, 02 Jan 2024 00:00:00 GMT'
+    assert transporte.estadisticas() == {'peticiones': 2, 'revalidadas': 1, 'revalidables': 1}
+
+
+def test_sin_etag_ni_last_modified_no_se_revalida(sesion):
+    falsa = sesion(_respuesta(200, b'a'), _respuesta(200, b'b'))
+
+    transporte.get(URL)
+    assert transporte.get(URL).content == b'b'
+    assert falsa.cabeceras == [{}, {}]
+
+
+def test_respuesta_nueva_sustituye_a_la_guardada(sesion):
+    falsa = sesion(
+        _respuesta(200, b'viejo', {'ETag': '"v1"'}),
+        _respuesta(200, b'nuevo', {'ETag': '"v2"'}),
+        _respuesta(304),
+    )
+
+    transporte.get(URL)
+    transporte.get(URL)
+
+    assert transporte.get(URL).content == b'nuevo'
+    assert falsa.cabeceras[2] == {'If-None-Match': '"v2"'}
+
+
+def test_429_y_5xx_se_reintentan_tras_frenar_el_host(sesion, limitador_falso):
+    falsa = sesion(
+        _respuesta(429, cabeceras={'Retry-After': '2'}),
+        _respuesta(503),
+        _respuesta(200, b'ok'),
+    )
+
+    assert transporte.get(URL).content == b'ok'
+    assert falsa.respuestas == []
+    assert limitador_falso == [
+        ('adquirir', 'api.prueba.local'), ('penalizar', 429, 2.0),
+        ('adquirir', 'api.prueba.local'), ('penalizar', 503, None),
+        ('adquirir', 'api.prueba.local'), ('exito', 'api.prueba.local'),
+    ]
+
+
+def test_agotados_los_reintentos_devuelve_la_ultima_respuesta(sesion, limitador_falso, monkeypatch):
+    monkeypatch.setattr(transporte, 'REINTENTOS_LIMITADAS', 2)
+    sesion(_respuesta(500), _respuesta(502), _respuesta(429), _respuesta(200, b'no se pide'))
+
+    assert transporte.get(URL).status_code == 429
+    assert [l[0] for l in limitador_falso].count('adquirir') == 3
+    assert ('exito', 'api.prueba.local') not in limitador_falso
+
+
+def test_errores_4xx_no_se_reintentan(sesion, limitador_falso):
+    falsa = sesion(_respuesta(404), _respuesta(200))
+
+    assert transporte.get(URL).status_code == 404
+    assert len(falsa.respuestas) == 1
+    assert limitador_falso == [('adquirir', 'api.prueba.local'), ('exito', 'api.prueba.local')]
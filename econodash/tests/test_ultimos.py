@@ -0,0 +1,57 @@
+import pandas as pd
+
+import ultimos
+
+
+def _df(filas):
+    return pd.DataFrame(filas, columns=['pais', 'anio', 'valor'])
+
+
+def test_ultimo_dato_no_nulo_por_pais():
+    indice = ultimos.IndiceUltimos()
+    indice.actualizar('PIB', _df([('MEX', 2020, 1.0), ('MEX', 2022, None), ('MEX', 2021, 2.0), ('CHL', 2019, 5.0)]))
+
+    assert indice.consultar('PIB').values.tolist() == [['CHL', 2019, 5.0], ['MEX', 2021, 2.0]]
+
+
+def test_actualizar_solo_avanza_o_revisa():
+    indice = ultimos.IndiceUltimos()
+    indice.actualizar('PIB', _df([('MEX', 2021, 2.0), ('CHL', 2019, 5.0)]))
+    # Más antiguo para MEX (se ignora), revisión del mismo año para CHL, país nuevo ARG
+    indice.actualizar('PIB', _df([('MEX', 2018, 9.0), ('CHL', 2019, 6.0), ('ARG', 2020, 3.0)]))
+
+    assert indice.consultar('PIB').values.tolist() == [
+        ['ARG', 2020, 3.0], ['CHL', 2019, 6.0], ['MEX', 2021, 2.0],
+    ]
+
+
+def test_consultar_seleccion_e_indicador_desconocido():
+    indice = ultimos.IndiceUltimos()
+    indice.actualizar('PIB', _df([('MEX', 2021, 2.0), ('CHL', 2019, 5.0)]))
+
+    assert indice.consultar('PIB', ['MEX', 'PER'])['pais'].tolist() == ['MEX']
+    assert indice.consultar('Otro').empty
+    assert indice.contiene('PIB') and not indice.contiene('Otro')
+
+
+def test_guardar_y_cargar(tmp_path):
+    indice = ultimos.IndiceUltimos(columnas=('Pais', 'Año', 'Valor'))
+    indice.actualizar('PIB', pd.DataFrame({'Pais': ['México'], 'Año': [2021], 'Valor': [2.5]}))
+    ruta = ultimos.guardar(indice, str(tmp_path / 'ultimos.json'))
+
+    cargado = ultimos.cargar(ruta, columnas=('Pais', 'Año', 'Valor'))
+    assert cargado.a_dict() == {'PIB': {'México': [2021, 2.5]}}
+    assert ultimos.cargar(str(tmp_path / 'no_existe.json')).indicadores() == []
+
+
+def test_faltantes_por_pais_en_un_indice_compartido():
+    indice = ultimos.IndiceUltimos()
+    indice.actualizar('PIB', _df([('MEX', 2021, 2.0), ('BRA', 2020, 4.0)]))
+
+    # Otra selección de países con el mismo indicador ya indexado
+    assert indice.faltantes('PIB', ['ARG', 'MEX', 'ARG']) == ['ARG']
+    assert indice.faltantes('Otro', ['ARG']) == ['ARG']
+
+    nuevos = _df([('ARG', 2019, 1.0), ('MEX', 2022, 9.0)])
+    indice.actualizar('PIB', nuevos[nuevos['pais'].isin(indice.faltantes('PIB', nuevos['pais']))])
+    assert indice.consultar('PIB', ['ARG', 'MEX']).values.tolist() == [['ARG', 2019, 1.0], ['MEX', 2021, 2.0]]
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+
+import pytest
+
+import vuelo_unico
+
+
+@pytest.fixture(autouse=True)
+def directorio_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(vuelo_unico, 'VUELO_DIR', str(tmp_path))
+
+
+def test_clave_serie_normaliza_paises_y_parametros():
+    assert (vuelo_unico.clave_serie('X', ['mex', 'ARG'], mrv=5, id_or_value='id')
+            == vuelo_unico.clave_serie('X', 'ARG;MEX', id_or_value='id', mrv=5))
+    assert vuelo_unico.clave_serie('X', ['MEX'], mrv=5) != vuelo_unico.clave_serie('X', ['MEX'], mrv=6)
+
+
+@pytest.mark.parametrize('entre_procesos', [False, True])
+def test_llamadas_simultaneas_comparten_una_ejecucion(entre_procesos):
+    empezada, liberar = threading.Event(), threading.Event()
+    ejecuciones, resultados = [], []
+
+    def descarga():
+        ejecuciones.append(1)
+        empezada.set()
+        liberar.wait(5)
+        return {'datos': 42}
+
+    def llamar():
+        resultados.append(vuelo_unico.ejecutar('clave', descarga, entre_procesos=entre_procesos))
+
+    lider = threading.Thread(target=llamar)
+    lider.start()
+    empezada.wait(5)
+    seguidores = [threading.Thread(target=llamar) for _ in range(4)]
+    for hilo in seguidores:
+        hilo.start()
+    liberar.set()
+    for hilo in [lider, *seguidores]:
+        hilo.join(5)
+
+    assert len(ejecuciones) == 1
+    assert len(resultados) == 5
+    assert all(r is resultados[0] for r in resultados)
+
+
+def test_el_error_llega_a_todos_y_no_se_queda_en_curso():
+    def falla():
+        raise RuntimeError("timeout")
+
+    with pytest.raises(RuntimeError, match='timeout'):
+        vuelo_unico.ejecutar('clave', falla)
+    assert 'clave' not in vuelo_unico._en_curso
+    assert vuelo_unico.ejecutar('clave', lambda: 1) == 1
+
+
+def test_llamadas_sucesivas_vuelven_a_ejecutar():
+    contador = []
+    for _ in range(2):
+        vuelo_unico.ejecutar('clave', lambda: contador.append(1))
+    assert len(contador) == 2
+
+
+def test_limpia_resultados_y_bloqueos_antiguos(tmp_path):
+    antiguos = [tmp_path / 'viejo.pkl', tmp_path / 'viejo.lock']
+    for ruta in antiguos:
+        ruta.write_bytes(b'')
+        hace_tiempo = time.time() - vuelo_unico.RETENCION_SEGUNDOS - 10
+        os.utime(ruta, (hace_tiempo, hace_tiempo))
+
+    vuelo_unico.ejecutar('nueva', lambda: 1)
+
+    restantes = sorted(p.suffix for p in tmp_path.iterdir())
+    assert not any(ruta.exists() for ruta in antiguos)
+    assert restantes == ['.lock', '.pkl']
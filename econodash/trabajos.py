@@ -0,0 +1,221 @@
+"""Trabajos de descarga reanudables con manifiesto y puntos de control.
+
+Un trabajo es una lista de unidades (indicador, lote de países, rango de
+años). Cada unidad terminada se guarda como punto de control y se anota en
+el manifiesto del trabajo:
+
+    cache/trabajos/<nombre>/
+        manifiesto.json          Estado, intentos y fecha de cada unidad
+        unidades/<clave>.pkl     Resultado de cada unidad completada
+
+Las unidades que fallan se reintentan con espera exponencial. Si el proceso
+se interrumpe o alguna unidad agota sus intentos, la siguiente ejecución del
+mismo trabajo sólo repite las unidades que faltan:
+
+    resultados, fallidas = trabajos.ejecutar_trabajo('panel', unidades, descargar)
+    if not fallidas:
+        trabajos.limpiar_trabajo('panel')
+
+Los reintentos, reanudaciones, errores y el avance se registran con bitacora
+(logger ``econodash.trabajos``); los scripts de línea de comandos los
+muestran además en la consola con ``bitacora.mostrar_en_consola('trabajos')``.
+"""
+import hashlib
+import json
+import os
+import pickle
+import random
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import bitacora
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TRABAJOS_DIR = os.path.join(BASE_DIR, 'cache', 'trabajos')
+ARCHIVO_MANIFIESTO = 'manifiesto.json'
+
+# Intentos por unidad y espera (segundos) antes del primer reintento; se duplica en cada uno
+REINTENTOS = 3
+ESPERA_BASE = 1.0
+ESPERA_MAXIMA = 30.0
+
+# Horas durante las que el punto de control de una unidad sigue siendo válido
+VIGENCIA_HORAS = 24
+
+log = bitacora.obtener_logger('trabajos')
+
+COMPLETA = 'completa'
+FALLIDA = 'fallida'
+
+
+def clave_unidad(unidad):
+    """Clave estable de una unidad: indicador, países y rango de años."""
+    rango = unidad.get('mrv') or f"{unidad.get('anio_inicio')}:{unidad.get('anio_fin')}"
+    huella = hashlib.sha1(f"{unidad['codigo']}|{','.join(unidad['paises'])}|{rango}".encode('utf-8'))
+    return huella.hexdigest()[:12]
+
+
+def dividir_en_lotes(codigo, paises, lote, **rango):
+    """
+    Unidades de un indicador con los países en lotes de ``lote``.
+
+    ``rango`` es ``mrv=10`` o ``anio_inicio=1960, anio_fin=2024``.
+    """
+    paises = list(paises)
+    return [
+        {'codigo': codigo, 'lote': n, 'paises': paises[inicio:inicio + lote], **rango}
+        for n, inicio in enumerate(range(0, len(paises), lote))
+    ]
+
+
+def describir_unidad(unidad):
+    return f"{unidad['codigo']} lote {unidad.get('lote', 0) + 1} ({len(unidad['paises'])} países)"
+
+
+class Manifiesto:
+    """Estado persistente de las unidades de un trabajo."""
+
+    def __init__(self, nombre, raiz=TRABAJOS_DIR):
+        self.ruta = os.path.join(raiz, nombre)
+        self._lock = threading.Lock()
+        self.unidades = {}
+        ruta_manifiesto = os.path.join(self.ruta, ARCHIVO_MANIFIESTO)
+        if os.path.exists(ruta_manifiesto):
+            try:
+                with open(ruta_manifiesto, encoding='utf-8') as f:
+                    self.unidades = json.load(f).get('unidades', {})
+            except (OSError, ValueError):
+                # Un manifiesto ilegible equivale a empezar de cero
+                self.unidades = {}
+
+    def _ruta_resultado(self, clave):
+        return os.path.join(self.ruta, 'unidades', f"{clave}.pkl")
+
+    def _guardar(self):
+        os.makedirs(self.ruta, exist_ok=True)
+        ruta = os.path.join(self.ruta, ARCHIVO_MANIFIESTO)
+        ruta_tmp = f"{ruta}.{os.getpid()}.tmp"
+        with open(ruta_tmp, 'w', encoding='utf-8') as f:
+            json.dump({'unidades': self.unidades}, f, ensure_ascii=False, indent=1)
+        os.replace(ruta_tmp, ruta)
+
+    def completada(self, clave, vigencia_horas=VIGENCIA_HORAS):
+        """La unidad terminó, su punto de control existe y sigue vigente."""
+        estado = self.unidades.get(clave)
+        if not estado or estado['estado'] != COMPLETA or not os.path.exists(self._ruta_resultado(clave)):
+            return False
+        antiguedad = time.time() - datetime.fromisoformat(estado['fecha']).timestamp()
+        return vigencia_horas is None or antiguedad <= vigencia_horas * 3600
+
+    def cargar(self, clave):
+        with open(self._ruta_resultado(clave), 'rb') as f:
+            return pickle.load(f)
+
+    def marcar_completa(self, clave, unidad, resultado, intentos):
+        ruta = self._ruta_resultado(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        ruta_tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(ruta_tmp, 'wb') as f:
+            pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(ruta_tmp, ruta)
+        self._anotar(clave, unidad, COMPLETA, intentos)
+
+    def marcar_fallida(self, clave, unidad, intentos, error):
+        self._anotar(clave, unidad, FALLIDA, intentos, error=str(error))
+
+    def _anotar(self, clave, unidad, estado, intentos, **extra):
+        with self._lock:
+            anterior = self.unidades.get(clave, {})
+            self.unidades[clave] = {
+                'unidad': describir_unidad(unidad),
+                'estado': estado,
+                'intentos': anterior.get('intentos', 0) + intentos,
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                **extra
+            }
+            self._guardar()
+
+
+def _ejecutar_con_reintentos(funcion, unidad, reintentos, espera_base, no_reintentar):
+    """Ejecuta la unidad; devuelve (resultado, intentos) o lanza el último error."""
+    for intento in range(1, reintentos + 1):
+        try:
+            return funcion(unidad), intento
+        except no_reintentar:
+            raise
+        except Exception as e:
+            if intento == reintentos:
+                e.intentos = intento
+                raise
+            # Espera exponencial con variación aleatoria para no reintentar todos a la vez
+            espera = min(ESPERA_MAXIMA, espera_base * 2 ** (intento - 1)) * random.uniform(0.5, 1.0)
+            log.warning(f"Reintento {describir_unidad(unidad)}: {e} (intento {intento + 1}/{reintentos} "
+                        f"en {espera:.1f} s)", extra={'unidad': clave_unidad(unidad), 'intento': intento + 1,
+                                                     'espera_s': round(espera, 2)})
+            time.sleep(espera)
+
+
+def ejecutar_trabajo(nombre, unidades, funcion, max_hilos=4, reintentos=REINTENTOS, espera_base=ESPERA_BASE,
+                     no_reintentar=(), vigencia_horas=VIGENCIA_HORAS, raiz=TRABAJOS_DIR):
+    """
+    Ejecuta (o reanuda) un trabajo.
+
+    Args:
+        nombre: Nombre del trabajo (carpeta de su manifiesto)
+        unidades: Lista de unidades (dicts con codigo, paises y mrv o anio_inicio/anio_fin)
+        funcion: Función que recibe una unidad y devuelve su resultado (serializable con pickle)
+        max_hilos: Unidades que se ejecutan a la vez
+        reintentos: Intentos por unidad antes de darla por fallida
+        espera_base: Segundos antes del primer reintento (se duplica en cada uno)
+        no_reintentar: Excepciones que no tiene sentido reintentar (p. ej. errores de esquema)
+        vigencia_horas: Antigüedad máxima de un punto de control (None: sin límite)
+
+    Returns:
+        tuple: ({clave: resultado} de las unidades completadas, lista de unidades fallidas)
+    """
+    manifiesto = Manifiesto(nombre, raiz)
+    resultados = {}
+    pendientes = []
+    for unidad in unidades:
+        clave = clave_unidad(unidad)
+        if manifiesto.completada(clave, vigencia_horas):
+            resultados[clave] = manifiesto.cargar(clave)
+        else:
+            pendientes.append(unidad)
+
+    if resultados:
+        log.info(f"Reanudando '{nombre}': {len(resultados)} de {len(unidades)} unidades ya completadas",
+                 extra={'trabajo': nombre, 'completadas': len(resultados), 'unidades': len(unidades)})
+
+    fallidas = []
+    with ThreadPoolExecutor(max_workers=max_hilos) as pool:
+        futuros = {
+            pool.submit(_ejecutar_con_reintentos, funcion, unidad, reintentos, espera_base, no_reintentar): unidad
+            for unidad in pendientes
+        }
+        for hechas, futuro in enumerate(as_completed(futuros), 1):
+            unidad = futuros[futuro]
+            clave = clave_unidad(unidad)
+            try:
+                resultado, intentos = futuro.result()
+            except Exception as e:
+                fallidas.append(unidad)
+                manifiesto.marcar_fallida(clave, unidad, getattr(e, 'intentos', 1), e)
+                log.error(f"{describir_unidad(unidad)}: {e}", extra={
+                    'trabajo': nombre, 'unidad': clave, 'intentos': getattr(e, 'intentos', 1), 'error': repr(e),
+                })
+                continue
+            manifiesto.marcar_completa(clave, unidad, resultado, intentos)
+            resultados[clave] = resultado
+            log.info(f"[{hechas}/{len(pendientes)}] {describir_unidad(unidad)}",
+                     extra={'trabajo': nombre, 'unidad': clave, 'intentos': intentos})
+
+    return resultados, fallidas
+
+
+def limpiar_trabajo(nombre, raiz=TRABAJOS_DIR):
+    """Borra el manifiesto y los puntos de control de un trabajo ya consolidado."""
+    shutil.rmtree(os.path.join(raiz, nombre), ignore_errors=True)
@@ -0,0 +1,196 @@
+"""Transporte HTTP compartido para las peticiones al Banco Mundial.
+
+world_bank_data hace cada petición con ``requests.get``, que abre (y cierra)
+una conexión TLS nueva cada vez. ``instalar()`` sustituye ese ``get`` por el
+de este módulo, que usa una única ``requests.Session`` para todo el proceso:
+
+- conexiones persistentes (keep-alive) en un pool por host, con tamaño
+  ajustado para las descargas en paralelo (POOL_POR_HOST);
+- respuestas comprimidas (gzip/deflate);
+- tiempos de espera de conexión y de lectura;
+- un límite de peticiones por host compartido entre hilos y procesos, con
+  frenado y reintento ante respuestas 429/5xx (ver limitador.py);
+- revalidación con ETag / Last-Modified: si el servidor responde 304 se
+  reutiliza el cuerpo ya descargado.
+
+requests sólo se importa con la primera petición, así que importar este
+módulo no retrasa el arranque de las apps:
+
+    wb = modulo_perezoso('world_bank_data', al_cargar=transporte.instalar)
+"""
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import bitacora
+import limitador
+
+# Tiempos de espera (segundos): establecer la conexión y recibir la respuesta
+TIEMPO_CONEXION = float(os.environ.get('ECONODASH_HTTP_TIEMPO_CONEXION', '5'))
+TIEMPO_LECTURA = float(os.environ.get('ECONODASH_HTTP_TIEMPO_LECTURA', '60'))
+
+# Conexiones persistentes por host (el resto de hosts usa POOL_POR_DEFECTO)
+POOL_POR_HOST = {
+    'https://api.worldbank.org': 16,
+}
+POOL_POR_DEFECTO = 4
+
+# Reintentos de una petición que recibe 429 o 5xx (tras la pausa del limitador)
+REINTENTOS_LIMITADAS = 3
+
+# Respuestas guardadas para revalidar con ETag / Last-Modified
+MAX_RESPUESTAS_REVALIDABLES = 256
+
+CABECERAS = {
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'User-Agent': 'EconoDash',
+}
+
+log = bitacora.obtener_logger('transporte')
+
+_estado = {'sesion': None, 'get_original': None}
+_revalidables = OrderedDict()
+_estadisticas = {'peticiones': 0, 'revalidadas': 0}
+_lock = threading.Lock()
+
+
+def sesion():
+    """La sesión HTTP compartida del proceso (se crea la primera vez)."""
+    if _estado['sesion'] is None:
+        with _lock:
+            if _estado['sesion'] is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                nueva = requests.Session()
+                nueva.headers.update(CABECERAS)
+                for prefijo in ('https://', 'http://'):
+                    nueva.mount(prefijo, HTTPAdapter(pool_connections=4, pool_maxsize=POOL_POR_DEFECTO))
+                for prefijo, tamano in POOL_POR_HOST.items():
+                    nueva.mount(prefijo, HTTPAdapter(pool_connections=1, pool_maxsize=tamano, pool_block=True))
+                _estado['sesion'] = nueva
+    return _estado['sesion']
+
+
+def _clave(url, params):
+    return url, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+
+
+def _respuesta_desde_guardada(guardada, respuesta_304):
+    """Reconstruye una respuesta 200 con el cuerpo guardado y las cabeceras nuevas."""
+    import requests
+
+    respuesta = requests.Response()
+    respuesta.status_code = 200
+    respuesta._content = guardada['contenido']
+    respuesta.encoding = guardada['codificacion']
+    respuesta.headers = requests.structures.CaseInsensitiveDict(guardada['cabeceras'])
+    respuesta.headers.update(respuesta_304.headers)
+    respuesta.url = respuesta_304.url
+    respuesta.request = respuesta_304.request
+    respuesta.elapsed = respuesta_304.elapsed
+    return respuesta
+
+
+def _reintentar_tras(respuesta):
+    """Segundos de la cabecera Retry-After (None si no hay o no son segundos)."""
+    try:
+        return float(respuesta.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return None
+
+
+def _get_limitado(url, params, cabeceras, kwargs):
+    """Petición con el límite del host; las respuestas 429/5xx frenan el host y se reintentan."""
+    host = urlsplit(url).hostname or ''
+    for intento in range(REINTENTOS_LIMITADAS + 1):
+        limitador.adquirir(host)
+        respuesta = sesion().get(url, params=params, headers=cabeceras, **kwargs)
+        if respuesta.status_code != 429 and respuesta.status_code < 500:
+            limitador.registrar_exito(host)
+            return respuesta
+        pausa = limitador.penalizar(host, respuesta.status_code, _reintentar_tras(respuesta))
+        log.warning("Respuesta limitada", extra={
+            'host': host, 'codigo': respuesta.status_code, 'pausa_s': round(pausa, 2), 'intento': intento + 1
+        })
+    return respuesta
+
+
+def get(url, params=None, **kwargs):
+    """
+    Equivalente a ``requests.get`` sobre la sesión compartida.
+
+    Añade el tiempo de espera por defecto y, si ya se descargó la misma URL
+    con un ETag o Last-Modified, la revalida en lugar de descargarla entera.
+    """
+    kwargs.setdefault('timeout', (TIEMPO_CONEXION, TIEMPO_LECTURA))
+    clave = _clave(url, params)
+    with _lock:
+        guardada = _revalidables.get(clave)
+        _estadisticas['peticiones'] += 1
+
+    cabeceras = dict(kwargs.pop('headers', None) or {})
+    if guardada is not None:
+        if guardada['etag']:
+            cabeceras.setdefault('If-None-Match', guardada['etag'])
+        if guardada['modificado']:
+            cabeceras.setdefault('If-Modified-Since', guardada['modificado'])
+
+    respuesta = _get_limitado(url, params, cabeceras, kwargs)
+
+    if respuesta.status_code == 304 and guardada is not None:
+        with _lock:
+            _revalidables.move_to_end(clave)
+            _estadisticas['revalidadas'] += 1
+        log.debug("Respuesta revalidada", extra={'url': respuesta.url})
+        return _respuesta_desde_guardada(guardada, respuesta)
+
+    etag = respuesta.headers.get('ETag')
+    modificado = respuesta.headers.get('Last-Modified')
+    if respuesta.status_code == 200 and (etag or modificado):
+        with _lock:
+            _revalidables[clave] = {
+                'etag': etag,
+                'modificado': modificado,
+                'contenido': respuesta.content,
+                'codificacion': respuesta.encoding,
+                'cabeceras': dict(respuesta.headers),
+            }
+            _revalidables.move_to_end(clave)
+            while len(_revalidables) > MAX_RESPUESTAS_REVALIDABLES:
+                _revalidables.popitem(last=False)
+    return respuesta
+
+
+def instalar(modulo=None):
+    """
+    Hace que world_bank_data use la sesión compartida (idempotente).
+
+    Acepta el módulo ya importado para poder usarse como ``al_cargar`` de
+    ``modulo_perezoso``.
+    """
+    import world_bank_data.request as peticion
+
+    with _lock:
+        if _estado['get_original'] is None:
+            _estado['get_original'] = peticion.get
+            peticion.get = get
+    return modulo
+
+
+def desinstalar():
+    """Devuelve a world_bank_data su ``requests.get`` original."""
+    import world_bank_data.request as peticion
+
+    with _lock:
+        if _estado['get_original'] is not None:
+            peticion.get = _estado['get_original']
+            _estado['get_original'] = None
+
+
+def estadisticas():
+    """Peticiones hechas y cuántas se resolvieron con una revalidación (304)."""
+    with _lock:
+        return dict(_estadisticas, revalidables=len(_revalidables))
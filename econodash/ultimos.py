@@ -0,0 +1,162 @@
+"""Índice de la última observación por (indicador, país).
+
+Las vistas de resumen y los informes buscaban el último dato de cada país
+ordenando y agrupando el indicador completo en cada ejecución
+(``sort_values(...).groupby(...).last()`` o ``groupby(...).idxmax()``).
+``IndiceUltimos`` guarda, para cada indicador, el año y el valor no nulo más
+recientes de cada país, y se actualiza al ingerir datos nuevos: sólo se
+comparan las observaciones recién llegadas con las ya indexadas. Consultar
+los últimos datos de una selección cuesta lo que el número de países
+seleccionados:
+
+    indice = ultimos.IndiceUltimos(columnas=('Pais', 'Año', 'Valor'))
+    indice.actualizar('PIB per cápita', df)          # al descargar
+    indice.consultar('PIB per cápita', ['México'])   # Pais, Año, Valor
+
+Dónde se mantiene:
+
+- app.py: un índice en memoria por descarga (``indice(fuente)``), que se
+  actualiza dentro de la función cacheada, es decir, sólo cuando llegan
+  datos nuevos;
+- src/ingesta.py: cache/ultimos.json, actualizado tras cada descarga;
+- src/ingesta_masiva.py: ultimos.json dentro del almacén (ver almacen.py),
+  del que rankings.py saca el ranking del último dato disponible.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from importaciones import modulo_perezoso
+
+pd = modulo_perezoso('pandas')
+
+# Índices en memoria (uno por descarga) que se conservan en el proceso
+MAX_INDICES = 64
+
+
+class IndiceUltimos:
+    """Año y valor más recientes de cada (indicador, país)."""
+
+    def __init__(self, columnas=('pais', 'anio', 'valor')):
+        self.columnas = tuple(columnas)
+        self._tablas = {}  # indicador -> DataFrame (índice: país; columnas: año, valor)
+        self._lock = threading.Lock()
+
+    def _ultimos_de(self, df):
+        """Última observación no nula de cada país en ``df``."""
+        col_pais, col_anio, col_valor = self.columnas
+        validos = df[[col_pais, col_anio, col_valor]].dropna()
+        validos = validos.sort_values(col_anio, kind='stable').drop_duplicates(col_pais, keep='last')
+        return pd.DataFrame(
+            {col_anio: validos[col_anio].astype('int64').to_numpy(), col_valor: validos[col_valor].to_numpy(dtype=float)},
+            index=pd.Index(validos[col_pais].to_numpy(), name=col_pais)
+        )
+
+    def actualizar(self, indicador, df):
+        """
+        Incorpora observaciones nuevas de ``indicador``.
+
+        Un país sólo cambia si llega un año igual (revisión) o posterior al indexado.
+        """
+        nuevos = self._ultimos_de(df)
+        if nuevos.empty:
+            return
+        col_anio = self.columnas[1]
+        with self._lock:
+            actual = self._tablas.get(indicador)
+            if actual is not None:
+                combinado = pd.concat([actual, nuevos]).sort_values(col_anio, kind='stable')
+                nuevos = combinado[~combinado.index.duplicated(keep='last')]
+            self._tablas[indicador] = nuevos.sort_index()
+
+    def contiene(self, indicador):
+        return indicador in self._tablas
+
+    def indicadores(self):
+        return list(self._tablas)
+
+    def faltantes(self, indicador, paises):
+        """Países de ``paises`` sin ninguna observación indexada de ``indicador``."""
+        tabla = self._tablas.get(indicador)
+        paises = pd.Index(list(paises)).unique()
+        return list(paises if tabla is None else paises.difference(tabla.index, sort=False))
+
+    def consultar(self, indicador, paises=None):
+        """
+        Últimos datos de ``indicador`` (todos los países o sólo ``paises``).
+
+        Returns:
+            DataFrame: Columnas país, año y valor, ordenado por país
+        """
+        col_pais = self.columnas[0]
+        tabla = self._tablas.get(indicador)
+        if tabla is None:
+            return pd.DataFrame(columns=list(self.columnas))
+        if paises is not None:
+            tabla = tabla.loc[tabla.index.intersection(pd.Index(list(paises))).sort_values()]
+        return tabla.rename_axis(col_pais).reset_index()
+
+    def a_dict(self):
+        """Contenido serializable en JSON: {indicador: {país: [año, valor]}}."""
+        col_anio, col_valor = self.columnas[1:]
+        with self._lock:
+            return {
+                indicador: {
+                    str(pais): [int(anio), float(valor)]
+                    for pais, anio, valor in zip(tabla.index, tabla[col_anio], tabla[col_valor])
+                }
+                for indicador, tabla in self._tablas.items()
+            }
+
+    @classmethod
+    def desde_dict(cls, contenido, columnas=('pais', 'anio', 'valor')):
+        indice = cls(columnas)
+        col_pais, col_anio, col_valor = indice.columnas
+        for indicador, por_pais in contenido.items():
+            filas = [(pais, anio, valor) for pais, (anio, valor) in por_pais.items()]
+            indice.actualizar(indicador, pd.DataFrame(filas, columns=[col_pais, col_anio, col_valor]))
+        return indice
+
+
+def cargar(ruta, columnas=('pais', 'anio', 'valor')):
+    """Índice guardado en ``ruta`` (vacío si no existe o no se puede leer)."""
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return IndiceUltimos.desde_dict(json.load(f), columnas)
+    except (OSError, ValueError):
+        return IndiceUltimos(columnas)
+
+
+def guardar(indice, ruta):
+    """Guarda el índice en JSON de forma atómica."""
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    ruta_tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(indice.a_dict(), f, ensure_ascii=False)
+    os.replace(ruta_tmp, ruta)
+    return ruta
+
+
+def clave_fuente(*partes):
+    """Clave de una descarga (países, rango de años...) para ``indice``."""
+    return '|'.join(
+        ';'.join(sorted(map(str, parte))) if isinstance(parte, (list, tuple, set)) else str(parte)
+        for parte in partes
+    )
+
+
+_indices = OrderedDict()
+_lock = threading.Lock()
+
+
+def indice(fuente, columnas=('pais', 'anio', 'valor')):
+    """Índice en memoria de una descarga (se crea vacío la primera vez)."""
+    with _lock:
+        existente = _indices.get(fuente)
+        if existente is None:
+            existente = _indices[fuente] = IndiceUltimos(columnas)
+            while len(_indices) > MAX_INDICES:
+                _indices.popitem(last=False)
+        _indices.move_to_end(fuente)
+        return existente
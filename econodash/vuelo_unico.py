@@ -0,0 +1,170 @@
+"""Coalescencia de descargas idénticas simultáneas (single-flight).
+
+Cuando caduca la caché y varias sesiones piden a la vez la misma selección,
+cada una lanzaría su propio ``wb.get_series``. Con ``ejecutar`` sólo una de
+ellas descarga; las demás esperan a que termine y reciben el mismo
+resultado (o la misma excepción):
+
+    clave = vuelo_unico.clave_serie(codigo, paises, mrv=30, id_or_value='id')
+    data = vuelo_unico.ejecutar(clave, lambda: wb.get_series(codigo, country=paises, mrv=30, id_or_value='id'))
+
+Funciona en dos niveles:
+
+- entre hilos del mismo proceso (las sesiones de un servidor Streamlit),
+  con un registro en memoria de las llamadas en curso;
+- entre procesos de la misma máquina (varias apps o scripts de src/), con
+  un archivo de bloqueo por clave en cache/vuelo_unico/. Quien obtiene el
+  bloqueo descarga y deja el resultado junto al bloqueo; quien esperaba lo
+  reutiliza si terminó después de empezar a esperar.
+
+Los resultados se comparten tal cual: no deben modificarse en el sitio.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+import metricas
+import rendimiento
+from bloqueo_archivo import bloqueado
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+VUELO_DIR = os.path.join(BASE_DIR, 'cache', 'vuelo_unico')
+
+# Segundos que se conservan los resultados compartidos entre procesos (y sus
+# archivos de bloqueo, contados desde el último uso)
+RETENCION_SEGUNDOS = 120
+
+LLAMADAS_COALESCIDAS = metricas.REGISTRO.agregar(metricas.Contador(
+    'econodash_vuelo_unico_total', 'Descargas ejecutadas o compartidas por la capa single-flight.',
+    ('resultado',)))
+
+
+class _Llamada:
+    def __init__(self):
+        self.hecha = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+_en_curso = {}
+_lock = threading.Lock()
+
+
+def clave_serie(codigo, paises, **parametros):
+    """
+    Clave normalizada de una descarga: indicador, países y parámetros (años, formato...).
+
+    El orden y las mayúsculas de los países no importan.
+    """
+    if isinstance(paises, str):
+        paises = paises.split(';')
+    paises = ';'.join(sorted({str(p).upper() for p in paises}))
+    extra = '|'.join(f"{k}={parametros[k]}" for k in sorted(parametros))
+    return f"{codigo}|{paises}|{extra}"
+
+
+def _registrar(resultado):
+    LLAMADAS_COALESCIDAS.inc(resultado=resultado)
+    rendimiento.contar(f"vuelo_unico.{resultado}")
+
+
+def _limpiar_antiguos(ahora):
+    """
+    Borra los resultados y bloqueos sin usar desde hace más de RETENCION_SEGUNDOS.
+
+    Si otro proceso tenía abierto un bloqueo borrado, en el peor caso esa
+    clave se descarga dos veces; los resultados se escriben de forma atómica.
+    """
+    try:
+        nombres = os.listdir(VUELO_DIR)
+    except OSError:
+        return
+    for nombre in nombres:
+        if nombre.endswith(('.pkl', '.lock')):
+            ruta = os.path.join(VUELO_DIR, nombre)
+            try:
+                if ahora - os.path.getmtime(ruta) > RETENCION_SEGUNDOS:
+                    os.remove(ruta)
+            except OSError:
+                pass
+
+
+def _ejecutar_entre_procesos(clave, funcion):
+    """Ejecuta ``funcion`` con el bloqueo de la clave o reutiliza el resultado de otro proceso."""
+    os.makedirs(VUELO_DIR, exist_ok=True)
+    huella = hashlib.sha1(clave.encode('utf-8')).hexdigest()[:20]
+    ruta_resultado = os.path.join(VUELO_DIR, f"{huella}.pkl")
+    inicio = time.time()
+
+    ruta_bloqueo = os.path.join(VUELO_DIR, f"{huella}.lock")
+    with open(ruta_bloqueo, 'a+b') as archivo, bloqueado(archivo):
+        # Marca el bloqueo como en uso para que _limpiar_antiguos no lo borre
+        try:
+            os.utime(ruta_bloqueo)
+        except OSError:
+            pass
+        # Otro proceso terminó la misma descarga mientras esperábamos el bloqueo
+        try:
+            if os.path.getmtime(ruta_resultado) >= inicio:
+                with open(ruta_resultado, 'rb') as f:
+                    resultado = pickle.load(f)
+                _registrar('compartida_proceso')
+                return resultado
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass
+
+        resultado = funcion()
+        _registrar('ejecutada')
+        try:
+            ruta_tmp = f"{ruta_resultado}.{os.getpid()}.tmp"
+            with open(ruta_tmp, 'wb') as f:
+                pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(ruta_tmp, ruta_resultado)
+        except (OSError, pickle.PicklingError):
+            # Sin resultado compartido, el siguiente proceso descargará por su cuenta
+            pass
+        _limpiar_antiguos(time.time())
+        return resultado
+
+
+def ejecutar(clave, funcion, entre_procesos=True):
+    """
+    Ejecuta ``funcion()`` una sola vez para todas las llamadas simultáneas con la misma clave.
+
+    Args:
+        clave: Clave normalizada (ver ``clave_serie``)
+        funcion: Función sin argumentos que hace la descarga
+        entre_procesos: Coordinar también con otros procesos mediante un archivo de bloqueo
+
+    Returns:
+        El resultado de la descarga (compartido, no modificar)
+    """
+    with _lock:
+        llamada = _en_curso.get(clave)
+        lider = llamada is None
+        if lider:
+            llamada = _en_curso[clave] = _Llamada()
+
+    if not lider:
+        llamada.hecha.wait()
+        _registrar('compartida_hilo')
+        if llamada.error is not None:
+            raise llamada.error
+        return llamada.resultado
+
+    try:
+        if entre_procesos:
+            llamada.resultado = _ejecutar_entre_procesos(clave, funcion)
+        else:
+            llamada.resultado = funcion()
+            _registrar('ejecutada')
+        return llamada.resultado
+    except BaseException as e:
+        llamada.error = e
+        raise
+    finally:
+        with _lock:
+            del _en_curso[clave]
+        llamada.hecha.set()